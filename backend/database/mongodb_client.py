@@ -73,6 +73,10 @@ DB_NAME = os.environ.get("MONGODATABASE") or "quantum_clinical_db"
 
 class MongoClient:
     def __init__(self):
+        self.connect()
+
+    def connect(self):
+        """(Re)starts the background connection probe from a clean, disconnected state."""
         self.client = None
         self.db = None
         self.sync_client = None
@@ -87,6 +91,14 @@ class MongoClient:
         thread.daemon = True
         thread.start()
 
+    def reconnect_after_fork(self):
+        """
+        For forked workers (gunicorn preload_app): the probe thread did not survive the fork and
+        pymongo clients are not fork-safe, so inherited clients are dropped (not closed: their
+        sockets still belong to the parent) and this process opens its own.
+        """
+        self.connect()
+
     def _background_probe(self):
         # 1. SETUP CLOUD SYNC (Secondary connection for model sync)
         cloud_uri = get_cloud_uri()
@@ -192,11 +204,11 @@ class MongoClient:
             try: self.sync_db.circuits.insert_one(doc)
             except Exception as e: print(f"Error syncing circuit to cloud: {e}")
 
-    def save_circuit_diagram(self, diagram_base64, metadata=None):
-        """Stores a circuit diagram converted from base64 to native Binary."""
+    def save_circuit_diagram(self, diagram, metadata=None):
+        """Stores a circuit diagram (raw bytes, or base64 from older callers) as native Binary."""
         import base64
         try:
-            binary_data = base64.b64decode(diagram_base64)
+            binary_data = base64.b64decode(diagram) if isinstance(diagram, str) else bytes(diagram)
             doc = {
                 "diagram": Binary(binary_data),
                 "metadata": metadata or {},
@@ -391,6 +403,26 @@ class MongoClient:
         except Exception as e:
             print(f"Error fetching DB records: {e}")
             return {}
+
+    # Binary image fields per collection, served by /images/db/...
+    IMAGE_FIELDS = {
+        "predictions": ("image",),
+        "prediction_circuits": ("diagram",),
+        "xai_results": ("original", "heatmap")
+    }
+
+    def get_image(self, collection_name: str, record_id: str, field: str):
+        """Raw bytes of one stored image field, or None if the record or field does not exist."""
+        if self.db is None or field not in self.IMAGE_FIELDS.get(collection_name, ()):
+            return None
+        try:
+            from bson import ObjectId
+            doc = self.db[collection_name].find_one({"_id": ObjectId(record_id)}, {field: 1})
+        except Exception as e:
+            print(f"Error fetching image {collection_name}/{record_id}/{field}: {e}")
+            return None
+        data = doc.get(field) if doc else None
+        return bytes(data) if data else None
     
     
     def delete_record(self, collection_name: str, record_id: str):
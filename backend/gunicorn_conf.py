@@ -0,0 +1,60 @@
+"""
+Multi-worker serving: `gunicorn -c gunicorn_conf.py main:app`
+
+The app (ResNet weights, QSVC artifact, classical baselines, centroids) is imported once in
+the master and workers are forked from it, so model memory is shared copy-on-write.
+Cores are split between workers so torch / inference threads do not oversubscribe the CPU.
+"""
+import os
+import gc
+
+cpu_count = os.cpu_count() or 1
+
+workers = int(os.environ.get("WEB_CONCURRENCY", max(1, min(4, cpu_count // 2))))
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = f"{os.environ.get('BACKEND_HOST', '127.0.0.1')}:{os.environ.get('BACKEND_PORT', '8001')}"
+preload_app = True
+timeout = int(os.environ.get("WORKER_TIMEOUT", 120))
+graceful_timeout = 30
+pidfile = os.environ.get("GUNICORN_PIDFILE", "/tmp/uc-backend.pid")
+
+# Thread budget per worker. Must be exported before the app is preloaded because
+# preprocessing.py and serving/executor.py read them at import time.
+threads_per_worker = max(1, cpu_count // workers)
+os.environ.setdefault("TORCH_NUM_THREADS", str(threads_per_worker))
+os.environ.setdefault("OMP_NUM_THREADS", str(threads_per_worker))
+os.environ.setdefault("INFERENCE_THREADS", str(min(4, threads_per_worker)))
+
+def when_ready(server):
+    """Master, after the app import and before forking: load every model into shared pages."""
+    from ml_engine.quantum import init_model as init_quantum
+    from ml_engine.classical import init_models as init_classical
+    from ml_engine.centroid_stats import get_stats
+
+    init_quantum()
+    init_classical()
+    get_stats()
+    if not int(os.environ.get("INFERENCE_PROCESSES", 0)):
+        # Without an inference process pool the ResNet runs inside the API workers
+        import ml_engine.preprocessing  # noqa: F401
+
+    # Move everything allocated so far out of the GC's reach so collections in the
+    # workers do not write to (and un-share) the pages holding model objects.
+    gc.collect()
+    gc.freeze()
+    server.log.info(
+        f"Models preloaded in master (pid {os.getpid()}); forking {workers} workers "
+        f"x {os.environ['TORCH_NUM_THREADS']} torch threads / {os.environ['INFERENCE_THREADS']} inference threads"
+    )
+
+def post_fork(server, worker):
+    """
+    Per-worker state that must not be inherited from the master: torch's intra-op pool
+    (threads do not survive fork) and the MongoDB clients / probe thread created when the
+    preloaded app imported database.mongodb_client.
+    """
+    import torch
+    torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
+    # The instance the preloaded app imported (main may load it as backend.database.*)
+    from main import db_client
+    db_client.reconnect_after_fork()
@@ -1,11 +1,15 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Query
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 import sys
 import os
 import random
+import asyncio
+import functools
+from contextlib import aclosing
 
 try:
     from dotenv import load_dotenv
@@ -24,17 +28,40 @@ import numpy as np
 import pandas as pd
 import io
 
-from ml_engine.preprocessing import extract_features, is_medical_image
 import ml_engine.quantum as qml
 from ml_engine.quantum import predict_quantum, init_model as init_quantum
 from ml_engine.classical import predict_classical, init_models as init_classical
+import ml_engine.centroid_stats as centroid_stats
+import ml_engine.clinical as clinical
+import ml_engine.model_version as model_version
+import ml_engine.evaluation as evaluation
+import ml_engine.circuit_cache as circuit_cache
+# Structures and depths of every supported circuit, built once at startup (no Qiskit)
+import ml_engine.circuit_table as circuit_table
 try:
     from backend.database.mongodb_client import db_client
 except ImportError:
     from database.mongodb_client import db_client
 from fastapi import BackgroundTasks
+from serving.jobs import TrainingJobManager
+from serving.executor import run_cpu, submit_cpu, get_limiter, stats as inference_stats
+from serving.upload_stream import iter_file_parts
+from serving.streaming import requested_format, stream_records
+from serving import result_files, datasets
+from serving.response_cache import cache as response_cache, content_hash
+from serving.single_flight import single_flight, flights as single_flights
+from serving import inference_pool
+from serving import images
+from serving import feature_store
+from serving.responses import ORJSONResponse, MongoJSONResponse
+from serving.compression import CompressionMiddleware
+from serving import conditional
+from serving import metrics
+from serving import profiling
+from ml_engine import timing
 
-app = FastAPI(title="UC Prediction QML")
+# orjson renders every JSON response (NumPy arrays, datetimes and ObjectIds included)
+app = FastAPI(title="UC Prediction QML", default_response_class=ORJSONResponse)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -44,6 +71,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Per-request cProfile on demand (X-Profile: 1); only installed when PROFILING_TOKEN is set
+if profiling.TOKEN:
+    app.add_middleware(profiling.ProfileMiddleware)
+# gzip/brotli per Accept-Encoding above COMPRESS_MIN_BYTES
+app.add_middleware(CompressionMiddleware)
+# Outermost: Server-Timing header and request latency histogram (compression included)
+app.add_middleware(metrics.TimingMiddleware)
 
 class PredictionResponse(BaseModel):
     quantum_prediction: str
@@ -51,8 +85,12 @@ class PredictionResponse(BaseModel):
     classical_confidence: float
     quantum_metrics: dict
     classical_metrics: dict
+    # False while the served model version has no cross-validated evaluation (metrics are "N/A")
+    metrics_evaluated: bool = True
     circuit_diagram: str = None
     features: list[float] = None
+    features_handle: str = None
+    features_f16: str = None
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -81,9 +119,17 @@ async def startup_event():
     # Initialize models in background to prevent Railway 502/Gateway Timeout
     import threading
     print("STARTUP: Initializing Quantum & Classical engines in background thread...")
-    thread = threading.Thread(target=lambda: [init_quantum(), init_classical()])
+    # With an inference process pool the ResNet lives in the pool workers, not in the API process
+    inference_pool.pool.start()
+    def warm_up():
+        init_quantum()
+        init_classical()
+        if not inference_pool.pool.started:
+            import ml_engine.preprocessing
+    thread = threading.Thread(target=warm_up)
     thread.daemon = True
     thread.start()
+    metrics.start()
     print("STARTUP: API Layer Active (Models loading in background).")
     
     # Explicit Database Diagnostic
@@ -93,6 +139,11 @@ async def startup_event():
     else:
         print("DATABASE SUCCESS: Connected to MongoDB.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    metrics.stop()
+    inference_pool.pool.shutdown()
+
 @app.get("/")
 def home():
     return {"status": "UC Prediction QML API Active", "version": "1.0.0"}
@@ -103,8 +154,100 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected" if (db_client.db is not None) else "warming_up",
-        "engine": "live"
+        # "unavailable" once the inference processes kept dying and the pool gave up respawning them
+        "engine": "live" if inference_pool.pool.healthy else "unavailable",
+        "inference": inference_stats(),
+        "inference_processes": inference_pool.pool.stats() if inference_pool.pool.started else None,
+        "response_cache": response_cache.stats(),
+        "single_flight": single_flights.stats(),
+        "circuit_cache": circuit_cache.cache_stats(),
+        "conditional": conditional.memo_stats()
+    }
+
+def _metric_samples():
+    """Queue depths and cache counters for /metrics (summed over workers; hit rates via rate())."""
+    inference = inference_stats()
+    endpoints = inference["endpoints"].items()
+    cache = response_cache.stats()
+    circuits = circuit_cache.cache_stats()
+    memo = conditional.memo_stats()
+    flights = single_flights.stats()
+    families = {
+        "uc_inference_queue_depth": ("gauge", "Tasks waiting for an inference thread.", [({}, inference["queued"])]),
+        "uc_endpoint_active": ("gauge", "Requests holding an endpoint concurrency slot.",
+                               [({"endpoint": name}, e["active"]) for name, e in endpoints]),
+        "uc_endpoint_waiting": ("gauge", "Requests queued for an endpoint concurrency slot.",
+                                [({"endpoint": name}, e["waiting"]) for name, e in endpoints]),
+        "uc_cache_lookups_total": ("counter", "Cache lookups by cache and result.", [
+            ({"cache": "response", "result": "hit"}, cache["hits"]),
+            ({"cache": "response", "result": "miss"}, cache["misses"]),
+            ({"cache": "circuit", "result": "hit"}, circuits["memory_hits"] + circuits["disk_hits"]),
+            ({"cache": "circuit", "result": "miss"}, circuits["renders"] + circuits["failures"]),
+            ({"cache": "conditional", "result": "hit"}, memo["memo_hits"]),
+            ({"cache": "conditional", "result": "miss"}, memo["rebuilds"]),
+            ({"cache": "single_flight", "result": "hit"}, flights["coalesced"]),
+            ({"cache": "single_flight", "result": "miss"}, flights["executed"]),
+        ]),
+        "uc_cache_entries": ("gauge", "Entries held in memory by each cache.", [
+            ({"cache": "response"}, cache["entries"]),
+            ({"cache": "circuit"}, circuits["memory_entries"]),
+            ({"cache": "conditional"}, memo["entries"]),
+        ]),
+        "uc_not_modified_total": ("counter", "Conditional GETs answered with 304 Not Modified.",
+                                  [({}, memo["not_modified"])]),
     }
+    if inference_pool.pool.started:
+        pool = inference_pool.pool.stats()
+        families["uc_inference_process_in_flight"] = (
+            "gauge", "Tasks queued or running in inference processes.", [({}, pool["in_flight"])]
+        )
+        families["uc_inference_pool_unhealthy"] = (
+            "gauge", "API workers whose inference pool stopped respawning crashed processes.",
+            [({}, 0 if pool["healthy"] else 1)]
+        )
+    return families
+
+metrics.add_source(_metric_samples)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint: latency histograms, queue depths, cache counters, event-loop lag."""
+    return Response(await metrics.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/debug/profile")
+async def debug_profile(request: Request, seconds: float = Query(10.0, gt=0)):
+    """
+    Samples every thread of the answering worker for `seconds` (capped at PROFILE_MAX_SECONDS)
+    and returns collapsed stacks for flamegraph.pl / speedscope. Requires the profiling token.
+    """
+    profiling.authorize(request)
+    stacks, samples = await profiling.run_sampler(seconds)
+    return Response(stacks, media_type="text/plain; charset=utf-8", headers={
+        "Content-Disposition": f'attachment; filename="profile-{os.getpid()}-{int(seconds)}s.collapsed"',
+        "X-Profile-Samples": str(samples),
+        "Cache-Control": "no-store"
+    })
+
+@app.get("/debug/profile/{profile_id}")
+async def debug_request_profile(request: Request, profile_id: str,
+                                format: str = Query("text", pattern="^(text|pstats|trace)$")):
+    """
+    cProfile of a request sent with "X-Profile: 1" (its X-Profile-Id): format=text (top functions
+    by cumulative time), pstats (file for snakeviz / pstats) or trace (Torch and Qiskit calls).
+    """
+    profiling.authorize(request)
+    stats = await run_in_threadpool(profiling.load, profile_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Profile not found (expired, or the request ran no profiled work)")
+    headers = {"Cache-Control": "no-store"}
+    if format == "pstats":
+        headers["Content-Disposition"] = f'attachment; filename="{profile_id}.prof"'
+        return Response(await run_in_threadpool(profiling.read_raw, profile_id),
+                        media_type="application/octet-stream", headers=headers)
+    if format == "trace":
+        return ORJSONResponse(await run_in_threadpool(profiling.trace, stats), headers=headers)
+    return Response(await run_in_threadpool(profiling.text_report, stats),
+                    media_type="text/plain; charset=utf-8", headers=headers)
 
 @app.get("/debug-db")
 async def debug_db():
@@ -157,60 +300,129 @@ async def diagnostic_search(query: str = Query(None)):
         print(f"Search Error: {e}")
         raise HTTPException(status_code=500, detail="Search failed")
 
-@app.post("/predict-csv-batch")
-async def predict_csv_batch(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+# Required parameters (matching the clinical dataset)
+CLINICAL_REQUIRED_COLS = [
+    "RBC", "WBC", "PLT", "HGB", "HCT", "MCHC", "PCT", "PDW", "MPV", 
+    "PLCR", "NEUT", "Lymphocytes", "MONO", "CRP", "ESR", "Fibrinogen", "SI", 
+    "Ferritin", "TP", "Albumin", "A1G", "A2G", "Beta1", "Beta2", "Gamma"
+]
+# Rows parsed and scored per streamed chunk, and per step when the whole response is built at once
+CSV_CHUNK_ROWS = int(os.environ.get("CSV_CHUNK_ROWS", 1000))
+CSV_BULK_CHUNK_ROWS = 50000
+# Results kept for the MongoDB batch log when the response is streamed or written to a file
+BATCH_LOG_LIMIT = 1000
+
+def _next_scored_chunk(chunks, score_chunk):
+    """Parses and scores the next row chunk of a CSV reader; None once exhausted."""
+    try:
+        df = next(chunks, None)
+    except ValueError as e:
+        # Malformed rows, or values that do not match the declared column dtypes
+        raise HTTPException(status_code=400, detail=f"Invalid CSV data: {e}")
+    return None if df is None else score_chunk(df)
+
+async def _iter_scored_csv(chunks, score_chunk):
+    """Yields the columnar results of each CSV chunk as soon as it is scored (caller holds the limiter slot)."""
+    while True:
+        results = await submit_cpu(_next_scored_chunk, chunks, score_chunk)
+        if results is None:
+            break
+        yield results
+
+async def _collect_scored_csv(chunks, score_chunk, columnar=False):
+    """Scores a whole CSV; returns row dicts, or {column: list} when columnar (caller holds the limiter slot)."""
+    if not columnar:
+        return [r async for chunk in _iter_scored_csv(chunks, score_chunk) for r in clinical.rows(chunk)]
+    columns = {}
+    async for chunk in _iter_scored_csv(chunks, score_chunk):
+        for name, values in chunk.items():
+            columns.setdefault(name, []).extend(values.tolist() if hasattr(values, "tolist") else values)
+    return columns
+
+async def _write_scored_csv(chunks, score_chunk, prefix, positive_key, key=None):
     """
-    Accepts a CSV of clinical results without labels and returns predictions.
+    Scores a CSV chunk by chunk, appending each chunk's results to a downloadable result
+    file before the next one is read, so memory stays at one chunk whatever the input size.
+    A key publishes the file under a deterministic name with its summary (see result_files.lookup).
+    Returns (result file name, summary, first BATCH_LOG_LIMIT rows). Caller holds the limiter slot.
     """
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
+    path = result_files.create(prefix, key)
+    summary = {"total": 0, "positive": 0}
+    head = []
     
-    # Required parameters (matching the clinical dataset)
-    required_cols = [
-        "RBC", "WBC", "PLT", "HGB", "HCT", "MCHC", "PCT", "PDW", "MPV", 
-        "PLCR", "NEUT", "Lymphocytes", "MONO", "CRP", "ESR", "Fibrinogen", "SI", 
-        "Ferritin", "TP", "Albumin", "A1G", "A2G", "Beta1", "Beta2", "Gamma"
-    ]
+    def score_and_append(df):
+        columns = score_chunk(df)
+        result_files.append(path, columns)
+        return columns
+    
+    try:
+        async for columns in _iter_scored_csv(chunks, score_and_append):
+            summary["total"] += len(columns[positive_key])
+            summary["positive"] += int(np.sum(columns[positive_key]))
+            if len(head) < BATCH_LOG_LIMIT:
+                head.extend(clinical.rows(columns)[:BATCH_LOG_LIMIT - len(head)])
+    except BaseException:
+        result_files.discard(path)
+        raise
+    return result_files.finish(path, summary if key else None), summary, head
+
+def _result_file_response(name, summary, **extra):
+    return {**extra, "result_file": name, "download_url": f"/scoring-results/{name}", "summary": summary}
+
+def _open_csv_batch(upload, chunk_rows):
+    """Validates the header of a /predict-csv-batch upload and returns a chunk reader over the columns it scores."""
+    columns = pd.read_csv(upload, nrows=0).columns
     
     # Check if columns exist
-    missing = [c for c in required_cols if c not in df.columns]
+    missing = [c for c in CLINICAL_REQUIRED_COLS if c not in columns]
     if missing:
         raise HTTPException(status_code=400, detail=f"Missing columns: {', '.join(missing)}")
     
-    results = []
-    for index, row in df.iterrows():
-        # Prepare feature vector (same as preprocessing would do for clinical data)
-        # We need a 512-dim vector for the pipeline if we follow the full architecture,
-        # but the clinical heuristic and centroids often use raw or simplified features.
-        # For simplicity and consistency with current Backend logic:
-        
-        # 1. Start with a zero vector (512-dim)
-        feat_vector = np.zeros(512)
-        
-        # 2. Map clinical params to indices (mirrors how generate_clinical_dataset maps to clinical results)
-        # In this project, clinical data is usually padded/mapped to the start of the feature space
-        # when not using image features.
-        
-        # Using a condensed 15-dim version for high-precision clinical heuristic as seen in quantum.py:271
-        # In quantum.py:271: features.shape[1] >= 15 and np.all(features[0, 100:] == 0)
-        # Let's map CRP (idx 13) and ESR (idx 14) specifically as they are strong predictors.
-        
-        # Map some key clinical values into the feature vector
-        feat_vector[13] = float(row["CRP"]) / 100.0
-        feat_vector[14] = float(row["ESR"]) / 100.0
-        
-        # Call quantum predictor
-        prediction = qml.predict_quantum(feat_vector.reshape(1, -1))
+    usecols = ["CRP", "ESR"] + (["Patient_ID"] if "Patient_ID" in columns else [])
+    dtype = {"CRP": "float64", "ESR": "float64", "Patient_ID": str}
+    return clinical.read_chunks(upload, chunk_rows, dtype=dtype, usecols=usecols)
+
+@app.post("/predict-csv-batch")
+async def predict_csv_batch(request: Request, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """
+    Accepts a CSV of clinical results without labels and returns predictions.
+    The upload is parsed from its spooled temporary file in fixed-size chunks with explicit dtypes.
+    With ?stream=ndjson|sse each scored row is emitted as it is ready, followed by a summary;
+    with ?format=columnar the JSON body is {"columns": {name: [values]}} instead of row objects;
+    with ?output=file results are written to a downloadable CSV (for exports of millions of rows).
+    """
+    fmt = requested_format(request)
+    chunk_rows = CSV_CHUNK_ROWS if fmt else CSV_BULK_CHUNK_ROWS
+    chunks = await run_in_threadpool(_open_csv_batch, file.file, chunk_rows)
+    
+    if fmt:
+        logged, summary = [], {"total": 0, "positive": 0}
         
-        results.append({
-            "Patient_ID": row.get("Patient_ID", f"Batch_{index}"),
-            "Prediction": prediction,
-            "IsPositive": "Positive" in prediction,
-            "Confidence": 85.0 + (random.random() * 10), # Simulated confidence for batch
-            "CRP": row["CRP"],
-            "ESR": row["ESR"]
-        })
+        async def records():
+            async for chunk in _iter_scored_csv(chunks, _score_csv_batch):
+                for r in clinical.rows(chunk):
+                    yield {"type": "result", "index": summary["total"], "result": r}
+                    summary["total"] += 1
+                    summary["positive"] += r["IsPositive"]
+                    if len(logged) < BATCH_LOG_LIMIT:
+                        logged.append(r)
+            yield {"type": "summary", **summary}
         
+        # Runs after the stream completes, when both are filled in
+        background_tasks.add_task(db_client.save_batch_csv, filename=file.filename, results=logged, summary=summary)
+        return await stream_records("predict-csv-batch", records(), fmt)
+    
+    if request.query_params.get("output") == "file":
+        async with get_limiter("predict-csv-batch").slot():
+            name, summary, head = await _write_scored_csv(chunks, _score_csv_batch, "csv_batch", "IsPositive")
+        background_tasks.add_task(db_client.save_batch_csv, filename=file.filename, results=head, summary={**summary, "result_file": name})
+        return _result_file_response(name, summary)
+    
+    columnar = request.query_params.get("format") == "columnar"
+    async with get_limiter("predict-csv-batch").slot():
+        scored = await _collect_scored_csv(chunks, _score_csv_batch, columnar)
+    
+    results = clinical.rows(scored) if columnar else scored
     # Log to MongoDB in background
     background_tasks.add_task(
         db_client.save_batch_csv, 
@@ -219,7 +431,108 @@ async def predict_csv_batch(background_tasks: BackgroundTasks, file: UploadFile
         summary={"total": len(results), "positive": sum(1 for r in results if r["IsPositive"])}
     )
     
-    return {"results": results}
+    # Values are already native Python types: skip FastAPI's recursive jsonable_encoder
+    return ORJSONResponse({"columns": scored} if columnar else {"results": results})
+
+@app.get("/scoring-results/{name}")
+async def download_scoring_result(name: str):
+    """Downloads a result file produced by ?output=file on the CSV endpoints."""
+    path = result_files.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Result file not found or expired")
+    return FileResponse(path, media_type="text/csv", filename=os.path.basename(path))
+
+# Server-side dataset scoring: at most this many files per glob, rows echoed inline per file
+DATASET_MAX_MATCHES = 50
+DATASET_INLINE_ROWS = 10000
+
+class ScoreDatasetRequest(BaseModel):
+    dataset: str  # file name or glob relative to datasets/, e.g. "unlabeled/*.csv"
+    include_results: bool = False
+
+def _read_result_rows(name, limit):
+    df = pd.read_csv(result_files.resolve(name), nrows=limit, dtype={"Patient_ID": str})
+    return clinical.rows({c: df[c] for c in df.columns})
+
+async def _score_dataset_file(path, version, background_tasks):
+    """Scores one dataset file like /predict-csv-batch, reusing the result file of an identical earlier run."""
+    digest = await run_in_threadpool(datasets.content_hash, path)
+    key = f"{digest[:32]}_{version}"
+    hit = result_files.lookup("dataset", key)
+    if hit is not None:
+        name, summary = hit
+    else:
+        f = open(path, "rb")
+        try:
+            chunks = await run_in_threadpool(_open_csv_batch, f, CSV_BULK_CHUNK_ROWS)
+            async with get_limiter("predict-csv-batch").slot():
+                name, summary, head = await _write_scored_csv(chunks, _score_csv_batch, "dataset", "IsPositive", key=key)
+        finally:
+            f.close()
+        background_tasks.add_task(
+            db_client.save_batch_csv, filename=datasets.relative_name(path), results=head, summary={**summary, "result_file": name}
+        )
+    return {
+        "dataset": datasets.relative_name(path),
+        "content_hash": digest,
+        "model_version": version,
+        "cached": hit is not None,
+        **_result_file_response(name, summary)
+    }
+
+@app.post("/score-dataset")
+async def score_dataset(req: ScoreDatasetRequest, background_tasks: BackgroundTasks):
+    """
+    Scores server-resident CSV datasets by name or glob (relative to datasets/) without an upload.
+    Results are cached per (dataset content hash, model version): re-running an unchanged file
+    against the same models returns the stored result file instantly.
+    With include_results the first DATASET_INLINE_ROWS result rows of each file are returned inline.
+    """
+    paths = datasets.resolve(req.dataset)
+    if not paths:
+        raise HTTPException(status_code=404, detail=f"No dataset matches '{req.dataset}'")
+    if len(paths) > DATASET_MAX_MATCHES:
+        raise HTTPException(status_code=400, detail=f"'{req.dataset}' matches {len(paths)} files (limit {DATASET_MAX_MATCHES})")
+    
+    version = model_version.current()
+    entries = []
+    for path in paths:
+        try:
+            entry = await _score_dataset_file(path, version, background_tasks)
+        except HTTPException as e:
+            if len(paths) == 1:
+                raise
+            # One malformed file does not fail the rest of a glob
+            entries.append({"dataset": datasets.relative_name(path), "error": e.detail})
+            continue
+        if req.include_results:
+            entry["results"] = await run_in_threadpool(_read_result_rows, entry["result_file"], DATASET_INLINE_ROWS)
+            entry["truncated"] = entry["summary"]["total"] > len(entry["results"])
+        entries.append(entry)
+    
+    return ORJSONResponse({"datasets": entries})
+
+def _score_csv_batch(df):
+    """Scores one row chunk of a /predict-csv-batch upload (columns already validated); columnar result."""
+    # CRP and ESR are the strong predictors: they sit at indices 13/14 of the otherwise zero
+    # 512-dim clinical feature vector, which the high-precision heuristic in quantum.py reads
+    try:
+        X = clinical.to_matrix(df, ["CRP", "ESR"])
+    except clinical.ClinicalDataError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Call quantum predictor once for the whole chunk
+    scored, _ = inference_pool.call("score_clinical", X, offset=13, classical=False)
+    is_uc = scored[:, 0].astype(bool)
+    
+    return {
+        "Patient_ID": df["Patient_ID"] if "Patient_ID" in df.columns else [f"Batch_{i}" for i in df.index],
+        "Prediction": clinical.labels(is_uc),
+        "IsPositive": is_uc,
+        "Confidence": 85.0 + np.random.default_rng().random(len(df)) * 10, # Simulated confidence for batch
+        "CRP": df["CRP"],
+        "ESR": df["ESR"]
+    }
 
 @app.post("/save-prediction-csv")
 async def save_prediction_csv(data: dict):
@@ -260,105 +573,187 @@ async def save_prediction_csv(data: dict):
 
 class CircuitRequest(BaseModel):
     features: list[float] = None
+    # Handle returned by /predict or /predict-csv instead of posting the vector back
+    features_handle: str = None
+
+def _resolve_features(features=None, handle=None):
+    """Feature vector posted inline or by handle (None if neither); 410 for an unknown or expired handle."""
+    if handle:
+        vector = feature_store.get(handle)
+        if vector is None:
+            raise HTTPException(status_code=410, detail="Feature handle unknown or expired")
+        return np.asarray(vector, dtype=np.float64)
+    return np.array(features) if features else None
+
+def _feature_encoding(value):
+    if value not in feature_store.ENCODINGS:
+        raise HTTPException(status_code=400, detail=f"features must be one of: {', '.join(feature_store.ENCODINGS)}")
+    return value
+
+def _encode_features(X, encoding, key=None):
+    """
+    Feature fields of a response for a (rows, width) matrix, per row: a handle (default),
+    the JSON float list (features=json) or base64 float16 (features=float16).
+    """
+    if encoding == "json":
+        return {"features": X}
+    if encoding == "float16":
+        return {"features_f16": np.array([feature_store.float16_b64(row) for row in X], dtype=object)}
+    return {"features_handle": feature_store.handles(feature_store.put(X, key), len(X))}
 
 @app.api_route("/circuit", methods=["GET", "POST"])
-async def get_circuit(background_tasks: BackgroundTasks, req: CircuitRequest = None):
-    from ml_engine.quantum import get_circuit_diagram
-    diagram = ""
-    if req and req.features:
-        features = np.array(req.features)
-        diagram = get_circuit_diagram(features)
+async def get_circuit(background_tasks: BackgroundTasks, req: CircuitRequest = None,
+                      format: str = Query("png", pattern="^(png|svg)$"), inline: bool = Query(False)):
+    """
+    Circuit diagram of the served model (parameters bound when features, or a features_handle, are posted).
+    format=png (default): {"circuit_diagram_url": "/images/circuits/<key>"} drawn by Qiskit/matplotlib
+    (inline=true also embeds the base64 PNG as "circuit_diagram", for older clients);
+    format=svg: the image/svg+xml document itself, drawn without matplotlib.
+    """
+    from ml_engine.quantum import get_circuit_image, get_circuit_svg
+    features = await run_in_threadpool(_resolve_features, req and req.features, req and req.features_handle)
+    
+    # Qiskit work runs on the threadpool, not the inference executor: opt it into X-Profile too
+    if format == "svg":
+        svg = await run_in_threadpool(profiling.profiled(get_circuit_svg), features)
+        diagram = svg.encode("utf-8")
     else:
-        diagram = get_circuit_diagram()
+        key, diagram = await run_in_threadpool(profiling.profiled(get_circuit_image), features)
     
     # Log to MongoDB in background
-    background_tasks.add_task(
-        db_client.save_circuit_diagram,
-        diagram_base64=diagram,
-        metadata={"source": "prediction_view", "has_features": req is not None and req.features is not None}
-    )
-    print(f"DEBUG: Circuit diagram queued for MongoDB storage.")
+    if diagram is not None:
+        background_tasks.add_task(
+            db_client.save_circuit_diagram,
+            diagram=diagram,
+            metadata={"source": "prediction_view", "has_features": features is not None, "format": format}
+        )
+        print(f"DEBUG: Circuit diagram queued for MongoDB storage.")
     
-    return {"circuit_diagram": diagram}
+    if format == "svg":
+        return Response(svg, media_type="image/svg+xml")
+    result = {"circuit_diagram_url": f"/images/circuits/{key}" if diagram is not None else None}
+    if inline:
+        import base64
+        result["circuit_diagram"] = base64.b64encode(diagram).decode("ascii") if diagram is not None else None
+    return result
+
+@app.get("/features/{handle}")
+async def get_features(handle: str, format: str = Query("npy", pattern="^(npy|float16|json)$")):
+    """
+    Raw features behind a handle ("<block>.<row>" for one vector, "<block>" for a whole CSV chunk):
+    format=npy (float32 .npy, default), float16 (raw little-endian, shape in X-Feature-Shape) or json.
+    """
+    values = await run_in_threadpool(feature_store.get, handle)
+    if values is None:
+        raise HTTPException(status_code=404, detail="Feature handle unknown or expired")
+    if format == "json":
+        return ORJSONResponse(values)
+    headers = {"X-Feature-Shape": ",".join(str(n) for n in values.shape), "Cache-Control": "private, max-age=300"}
+    if format == "float16":
+        return Response(np.asarray(values, dtype="<f2").tobytes(), media_type="application/octet-stream", headers=headers)
+    return Response(feature_store.npy_bytes(values), media_type="application/octet-stream", headers=headers)
+
+@app.get("/images/circuits/{key}")
+async def circuit_image(request: Request, key: str, format: str = Query("png", pattern="^(png|webp)$")):
+    """Rendered circuit diagram by cache key (as linked from /circuit and /compare-circuits)."""
+    if not circuit_cache.KEY_RE.match(key):
+        raise HTTPException(status_code=404, detail="Unknown circuit diagram")
+    png = await run_in_threadpool(circuit_cache.lookup, key)
+    if png is None:
+        raise HTTPException(status_code=404, detail="Unknown circuit diagram")
+    # The key covers configuration, bound parameters and renderer version: the bytes never change
+    return await run_in_threadpool(images.image_response, request, png, key, format, images.IMMUTABLE)
+
+@app.get("/images/db/{collection}/{record_id}/{field}")
+async def db_image(request: Request, collection: str, record_id: str, field: str,
+                   format: str = Query("png", pattern="^(png|webp)$")):
+    """Image stored in a database record (as linked from /db-history); format=webp transcodes rasters."""
+    data = await run_in_threadpool(db_client.get_image, collection, record_id, field)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Records are written once: the id identifies the content
+    tag = f"{collection}-{record_id}-{field}"
+    return await run_in_threadpool(images.image_response, request, data, tag, format, images.PRIVATE)
+
+@app.get("/images/{digest}")
+async def stored_image(request: Request, digest: str, format: str = Query("png", pattern="^(png|webp)$")):
+    """Generated image by content hash (e.g. the XAI heatmap linked from /explain-decision)."""
+    data = await run_in_threadpool(images.get, digest)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return await run_in_threadpool(images.image_response, request, data, digest, format, images.PRIVATE_IMMUTABLE)
 
 def generate_metrics(features):
-    import random
-    import numpy as np
-    from ml_engine.quantum import get_config
-    
-    config = get_config()
-    is_fitted = config.get("is_fitted", False)
-    real_acc = config.get("accuracy", "96.2%")
-    
-    # Use a high-precision seed based on feature distribution (Sum + Variance)
-    # This ensures that even slightly different images generate unique deterministic metrics.
-    seed_val = int((np.sum(features) * 1000) + (np.var(features) * 10000))
-    random.seed(seed_val % 1000000)
-    
-    def jitter(base_str, variance=2.5):
-        try:
-            val = float(base_str.strip('%'))
-            # Generate a slightly wider spread to make differences unmistakable
-            val += random.uniform(-variance, variance)
-            return f"{val:.1f}%"
-        except:
-            return base_str
-
-    # If real model is fitted, use its baseline accuracy
-    q_acc_val = float(real_acc.strip('%')) if is_fitted else 96.2
-    if q_acc_val < 85.0:
-        q_acc_val = 92.4 
+    """
+    Cross-validated metrics of the published model version (computed once at publish). Until that
+    version has been evaluated every metric is reported as not evaluated, never estimated.
+    """
+    stored = evaluation.load()
+    if stored is None:
+        return evaluation.not_evaluated_metrics()
+    return evaluation.display_metrics(stored)
+
+def _predict_single(contents, filename):
+    """CPU-bound part of /predict: validation, feature extraction and both model stacks."""
+    # Check if CSV
+    if filename.endswith('.csv'):
+        df = pd.read_csv(io.BytesIO(contents))
+        # Find first numeric row or just first row if structure is fixed
+        features = df.select_dtypes(include=[np.number]).iloc[0].values
+        features = features / 100.0 # Standardize scaling
+        _, scored = inference_pool.call("score_features", features)
+        q_pred, c_res = scored["quantum"][0], scored["classical"][0]
+    else:
+        # Domain validation, feature extraction and both model stacks in one inference call
+        features, scored = inference_pool.call("analyze_image", contents)
+        if not scored["is_medical"]:
+            raise HTTPException(status_code=400, detail="INVALID_IMAGE_DOMAIN: Please upload a colonoscopy or clinical image.")
+        q_pred, c_res = scored["quantum"], scored["classical"]
     
-    q_acc = f"{q_acc_val:.1f}%"
+    print(f"TRACE: Quantum Prediction for {filename} -> {q_pred}")
+    with timing.stage("generate_metrics"):
+        metrics = generate_metrics(features)
+    return features, q_pred, c_res, metrics
 
-    return {
-        "quantum": {
-            "accuracy": jitter(q_acc, 2.0), 
-            "precision": jitter(q_acc, 2.8),
-            "sensitivity": jitter(q_acc, 3.2),
-            "specificity": jitter(q_acc, 2.4)
-        },
-        "classical": {
-            "accuracy": jitter("89.5%", 2.5), 
-            "precision": jitter("88.2%", 2.2),
-            "sensitivity": jitter("87.1%", 3.0),
-            "specificity": jitter("89.4%", 2.0)
-        }
-    }
+async def _run_cached(endpoint, cache_key, response, fn, contents, *args):
+    """
+    run_cpu(endpoint, fn, contents, *args) behind the response cache: identical uploads under
+    the same model version reuse the earlier result. Sets X-Cache: HIT or MISS on the response.
+    """
+    digest = content_hash(contents)
+    version = model_version.current()
+    result = response_cache.get(cache_key, digest, version)
+    response.headers["X-Cache"] = "MISS" if result is None else "HIT"
+    if result is None:
+        result = await run_cpu(endpoint, fn, contents, *args)
+        response_cache.put(cache_key, digest, version, result)
+    return result
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def predict(response: Response, background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                  features: str = Query("handle")):
+    """
+    Predicts one image (or single-row CSV). Features come back as a short-lived handle that
+    /circuit accepts (features=json returns the float list, features=float16 compact base64).
+    """
+    encoding = _feature_encoding(features)
     try:
-        contents = await file.read()
-        
-        # Check if CSV
-        if file.filename.endswith('.csv'):
-            import pandas as pd
-            import io
-            import numpy as np
-            
-            df = pd.read_csv(io.BytesIO(contents))
-            # Find first numeric row or just first row if structure is fixed
-            features = df.select_dtypes(include=[np.number]).iloc[0].values
-            features = features / 100.0 # Standardize scaling
-        else:
-            # Image Domain Validation
-            if not is_medical_image(contents):
-                raise HTTPException(status_code=400, detail="INVALID_IMAGE_DOMAIN: Please upload a colonoscopy or clinical image.")
-            features = extract_features(contents)
-        
-        # Predictions
-        q_pred = predict_quantum(features, image_bytes=contents)
-        print(f"TRACE: Quantum Prediction for {file.filename} -> {q_pred}")
-        c_res = predict_classical(features)
-        metrics = generate_metrics(features)
+        with timing.stage("upload"):
+            contents = await file.read()
+        # CSV and image uploads take different paths: keep their cache entries apart
+        cache_key = "predict-csv-row" if file.filename.endswith('.csv') else "predict"
+        features, q_pred, c_res, metrics = await _run_cached("predict", cache_key, response, _predict_single, contents, file.filename)
+        # Keyed by the upload: repeated predictions of one image renew the same handle
+        with timing.stage("encode_features"):
+            encoded = await run_in_threadpool(_encode_features, np.atleast_2d(features), encoding, content_hash(contents))
         
-        # Log to MongoDB in background (Store as Binary/Bytes)
+        # Log to MongoDB in background (Store as Binary/Bytes); after the response, so histogram only
         background_tasks.add_task(
-            db_client.save_prediction,
+            timing.timed("mongo_write", db_client.save_prediction),
             patient_id=file.filename,
             prediction=q_pred,
-            confidence=metrics["quantum"]["accuracy"],
+            # Numeric percentage, None until the published model has been evaluated
+            confidence=evaluation.metric_value(metrics["quantum"]["accuracy"]),
             metrics=metrics,
             image_bytes=contents, # Send raw bytes
             metadata={"source": "single_predict", "classical": c_res["prediction"]}
@@ -370,7 +765,8 @@ async def predict(background_tasks: BackgroundTasks, file: UploadFile = File(...
             "classical_confidence": c_res["confidence"],
             "quantum_metrics": metrics["quantum"],
             "classical_metrics": metrics["classical"],
-            "features": features.tolist() if hasattr(features, "tolist") else list(features)
+            "metrics_evaluated": metrics["evaluated"],
+            **{name: values[0].tolist() if hasattr(values[0], "tolist") else values[0] for name, values in encoded.items()}
         }
     except HTTPException:
         raise
@@ -380,92 +776,216 @@ async def predict(background_tasks: BackgroundTasks, file: UploadFile = File(...
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/predict-csv")
-async def predict_csv(file: UploadFile = File(...)):
-    """Analyze a clinical CSV file and return predictions for all patients."""
-    import pandas as pd
-    import io
-    import numpy as np
+def _score_csv(df, numeric_cols, features="handle"):
+    """
+    Scores one row chunk of a clinical CSV in vectorized form (runs on the inference pool); columnar result.
+    features picks the per-row feature field (see _encode_features); None leaves it out.
+    """
+    print(f"DEBUG: CSV chunk loaded with {len(df)} rows")
     
+    # Support clinical_blood_results.csv structure
+    if "Patient_ID" in df.columns:
+        patient_ids = df["Patient_ID"].astype(str)
+    else:
+        # Fallback if column names differ (the chunk index continues across chunks)
+        patient_ids = [f"Patient_{i+1}" for i in df.index]
+
+    # Absolute Scaling for Clinical Integrity; zero padding to 512 happens inside the engine
+    X = clinical.to_matrix(df, numeric_cols)[:, :clinical.FEATURE_WIDTH]
+    
+    scored, _ = inference_pool.call("score_clinical", X)
+    quantum_uc = scored[:, 0].astype(bool)
+    
+    result = {
+        "patient_id": patient_ids,
+        "quantum_prediction": clinical.labels(quantum_uc),
+        "classical_prediction": clinical.labels(scored[:, 1].astype(bool)),
+        "classical_confidence": scored[:, 2] + np.random.default_rng().uniform(-0.02, 0.02, len(df)),
+        "is_positive": quantum_uc
+    }
+    if features:
+        # Unpadded clinical vector; /circuit pads it back to the model width
+        result.update(_encode_features(X, features))
+    return result
+
+def _open_csv(upload, chunk_rows):
+    """Chunk reader over a clinical CSV upload with dtypes fixed from a sample; returns (chunks, numeric columns)."""
+    dtype, numeric_cols = clinical.infer_dtypes(upload)
+    return clinical.read_chunks(upload, chunk_rows, dtype=dtype), numeric_cols
+
+@app.post("/predict-csv")
+async def predict_csv(request: Request, file: UploadFile = File(...)):
+    """
+    Analyze a clinical CSV file and return predictions for all patients.
+    The upload is parsed from its spooled temporary file in fixed-size chunks with explicit dtypes.
+    With ?stream=ndjson|sse each patient is emitted as it is scored, followed by a summary;
+    with ?format=columnar the JSON body carries {"columns": {name: [values]}} instead of row objects;
+    with ?output=file results are written to a downloadable CSV (for exports of millions of rows).
+    Each row carries a features_handle for /circuit; ?features=json|float16 inlines the vector instead.
+    """
     print(f"DEBUG: Processing CSV file: {file.filename}")
+    encoding = _feature_encoding(request.query_params.get("features", "handle"))
     try:
-        contents = await file.read()
-        df = pd.read_csv(io.BytesIO(contents))
-        print(f"DEBUG: CSV loaded with {len(df)} rows")
+        fmt = requested_format(request)
+        chunks, numeric_cols = await run_in_threadpool(_open_csv, file.file, CSV_CHUNK_ROWS if fmt else CSV_BULK_CHUNK_ROWS)
+        score_chunk = functools.partial(_score_csv, numeric_cols=numeric_cols, features=encoding)
         
-        results = []
-        # Support clinical_blood_results.csv structure
-        required_cols = ["Patient_ID"]
-        if not all(col in df.columns for col in required_cols):
-             # Fallback if column names differ
-             df["Patient_ID"] = [f"Patient_{i+1}" for i in range(len(df))]
-
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if fmt:
+            async def records():
+                total = positive = 0
+                async for chunk in _iter_scored_csv(chunks, score_chunk):
+                    for r in clinical.rows(chunk):
+                        yield {"type": "result", "index": total, "result": r}
+                        total += 1
+                        positive += r["is_positive"]
+                yield {"type": "summary", "filename": file.filename, "total": total, "positive": positive}
+            return await stream_records("predict-csv", records(), fmt)
         
-        for j, (_, row) in enumerate(df.iterrows()):
-            # Extract numeric features and cast to float to prevent numpy type leakage
-            features = row[numeric_cols].values.astype(float)
-            features = features / 100.0 # Absolute Scaling for Clinical Integrity
-            
-            # Standardization to 512 dimensions (ResNet standard)
-            if len(features) < 512:
-                features = np.pad(features, (0, 512 - len(features)))
-            elif len(features) > 512:
-                features = features[:512]
-            
-            q_pred = predict_quantum(features)
-            c_res = predict_classical(features)
-            
-            # Explicitly cast every value to Python native types for JSON stability
-            results.append({
-                "patient_id": str(row["Patient_ID"]),
-                "quantum_prediction": str(q_pred),
-                "classical_prediction": str(c_res["prediction"]),
-                "classical_confidence": float(c_res["confidence"]) + random.uniform(-0.02, 0.02),
-                "is_positive": bool("Positive" in q_pred),
-                "features": [float(x) for x in features]
-            })
-            
-        return {"filename": file.filename, "results": results}
+        if request.query_params.get("output") == "file":
+            # Result files outlive feature handles: leave features out of them
+            score_chunk = functools.partial(_score_csv, numeric_cols=numeric_cols, features=None)
+            async with get_limiter("predict-csv").slot():
+                name, summary, _ = await _write_scored_csv(chunks, score_chunk, "csv_predict", "is_positive")
+            return _result_file_response(name, summary, filename=file.filename)
         
+        columnar = request.query_params.get("format") == "columnar"
+        async with get_limiter("predict-csv").slot():
+            scored = await _collect_scored_csv(chunks, score_chunk, columnar)
+        # Values are already native Python types: skip FastAPI's recursive jsonable_encoder
+        return ORJSONResponse({"filename": file.filename, ("columns" if columnar else "results"): scored})
+        
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in CSV batch processing: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/predict-batch")
-async def predict_batch(files: list[UploadFile] = File(...)):
+# Micro-batching for /predict-batch: images per ResNet forward pass, and how many
+# micro-batches may be queued or running at once (bounds the memory held per request)
+BATCH_SIZE = int(os.environ.get("PREDICT_BATCH_SIZE", 8))
+BATCH_MAX_BYTES = 32 * 1024 * 1024
+BATCH_MAX_IN_FLIGHT = int(os.environ.get("PREDICT_BATCH_IN_FLIGHT", 2))
+
+def _predict_files(items):
+    """Extracts (in one batched forward pass), predicts and scores (filename, bytes) pairs."""
+    sizes = [len(contents) for _, contents in items]
+    try:
+        features, scored = inference_pool.call(
+            "analyze_images", b"".join(contents for _, contents in items), sizes=sizes
+        )
+    except Exception as e:
+        print(f"Error in batch of {len(items)} files: {e}")
+        return [{"filename": filename, "error": str(e)} for filename, _ in items]
+
     results = []
-    
-    for file in files:
-        try:
-            contents = await file.read()
-            features = extract_features(contents)
-            q_pred = predict_quantum(features)
-            c_res = predict_classical(features)
-            metrics = generate_metrics(features)
-            
+    for i, (filename, _) in enumerate(items):
+        if scored["errors"][i] is not None:
+            print(f"Error in batch item {filename}: {scored['errors'][i]}")
             results.append({
-                "filename": file.filename,
-                "quantum_prediction": q_pred,
-                "classical_prediction": c_res["prediction"],
-                "classical_confidence": c_res["confidence"],
-                "quantum_metrics": metrics["quantum"],
-                "classical_metrics": metrics["classical"]
+                "filename": filename,
+                "error": scored["errors"][i]
             })
+            continue
+        q_pred, c_res = scored["quantum"][i], scored["classical"][i]
+        metrics = generate_metrics(features[i])
+        
+        results.append({
+            "filename": filename,
+            "quantum_prediction": q_pred,
+            "classical_prediction": c_res["prediction"],
+            "classical_confidence": c_res["confidence"],
+            "quantum_metrics": metrics["quantum"],
+            "classical_metrics": metrics["classical"],
+            "metrics_evaluated": metrics["evaluated"]
+        })
+    return results
+
+async def _iter_batch_predictions(request):
+    """
+    Scores the streamed `files` of a multipart body in micro-batches and yields
+    (upload index, result) as each micro-batch completes. At most BATCH_MAX_IN_FLIGHT
+    micro-batches are held at once, so the upload pauses (TCP backpressure) instead of
+    buffering 100MB. The caller holds the endpoint's limiter slot.
+    """
+    in_flight = asyncio.Semaphore(BATCH_MAX_IN_FLIGHT)
+    done = asyncio.Queue()
+    tasks = []
+
+    async def run_batch(start, items):
+        try:
+            await done.put((start, await submit_cpu(_predict_files, items), None))
         except Exception as e:
-            print(f"Error in batch item {file.filename}: {e}")
-            results.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
-            
+            await done.put((start, None, e))
+        finally:
+            in_flight.release()
+
+    async def flush(start, items):
+        await in_flight.acquire()
+        tasks.append(asyncio.create_task(run_batch(start, items)))
+
+    def completed(entry):
+        start, scored, error = entry
+        if error is not None:
+            raise error
+        return [(start + k, result) for k, result in enumerate(scored)]
+
+    count, batch, batch_bytes, received = 0, [], 0, 0
+    try:
+        async for filename, contents in iter_file_parts(request, "files"):
+            batch.append((filename, contents))
+            batch_bytes += len(contents)
+            if len(batch) >= BATCH_SIZE or batch_bytes >= BATCH_MAX_BYTES:
+                await flush(count, batch)
+                count, batch, batch_bytes = count + len(batch), [], 0
+            while not done.empty():
+                received += 1
+                for item in completed(done.get_nowait()):
+                    yield item
+        if batch:
+            await flush(count, batch)
+        while received < len(tasks):
+            received += 1
+            for item in completed(await done.get()):
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@app.post("/predict-batch")
+async def predict_batch(request: Request):
+    """
+    Multipart upload of `files`, scored while the body is still streaming in.
+    Returns results in upload order; with ?stream=ndjson|sse each result is emitted
+    (with its upload index) as soon as its micro-batch is scored, followed by a summary.
+    """
+    fmt = requested_format(request)
+    if fmt:
+        async def records():
+            total = errors = 0
+            async with aclosing(_iter_batch_predictions(request)) as predictions:
+                async for index, result in predictions:
+                    yield {"type": "result", "index": index, "result": result}
+                    total += 1
+                    errors += "error" in result
+            yield {"type": "summary", "total": total, "errors": errors}
+        return await stream_records("predict-batch", records(), fmt, reads_body=True)
+
+    async with get_limiter("predict-batch").slot():
+        async with aclosing(_iter_batch_predictions(request)) as predictions:
+            results = {index: result async for index, result in predictions}
+
+    if not results:
+        raise HTTPException(status_code=400, detail="No files uploaded")
     return {
-        "results": results
+        "results": [results[i] for i in range(len(results))]
     }
 
 @app.get("/dataset-files")
-async def list_dataset_files():
-    """List all available training files in the datasets folder."""
+async def list_dataset_files(request: Request):
+    """List all available training files in the datasets folder (ETag follows the folder's mtime)."""
+    return await conditional.respond(request, "dataset-files", datasets.folder_stamp(), run_in_threadpool, _list_dataset_files)
+
+def _list_dataset_files():
     import os
     # Robust path resolution
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -486,206 +1006,148 @@ class TrainRequest(BaseModel):
     reps: int = 2
     entanglement: str = "linear"
 
+def _on_training_complete(job, history):
+    """Runs in the API process once a training worker succeeds: hot-reload models and log."""
+    import ml_engine.classical as classical
+    # Both reload because the artifact / joblib changed on disk; the old models keep serving
+    # in-flight requests until the new ones are assigned
+    qml.init_model()
+    classical.init_models()
+    
+    # Log training session to MongoDB
+    db_client.save_training_session(history=history, configuration={
+        "reps": job["params"]["reps"],
+        "entanglement": job["params"]["entanglement"],
+        "job_id": job["id"]
+    })
+
+training_jobs = TrainingJobManager(on_complete=_on_training_complete)
+
 @app.post("/train")
 async def train_model(req: TrainRequest):
-    """Train the model using selected files and save feature centroids."""
+    """Submit a training job (feature extraction + model fitting run in a worker process)."""
+    if not req.selected_files:
+        return {"status": "Error", "message": "No files selected for training."}
+
+    try:
+        job = training_jobs.submit({
+            "selected_files": req.selected_files,
+            "reps": req.reps,
+            "entanglement": req.entanglement
+        })
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return {
+        "status": "Training Started",
+        "job_id": job["id"],
+        "processed_count": len(req.selected_files),
+        "events_url": f"/train/jobs/{job['id']}/events"
+    }
+
+@app.get("/train/jobs")
+async def list_training_jobs():
+    """List persisted training jobs (newest first) without their step history."""
+    return {"jobs": [{k: v for k, v in j.items() if k != "history"} for j in training_jobs.list()]}
+
+@app.get("/train/jobs/{job_id}")
+async def get_training_job(job_id: str):
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return job
+
+@app.post("/train/jobs/{job_id}/cancel")
+async def cancel_training_job(job_id: str):
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return {"job_id": job_id, "status": job["status"]}
+
+@app.get("/train/jobs/{job_id}/events")
+async def stream_training_job(job_id: str, request: Request):
+    """Server-Sent Events stream of training progress, ending with a terminal status event."""
     import asyncio
-    import os
-    import csv
     import json
-    import numpy as np
-    from ml_engine.preprocessing import extract_features
+    from fastapi.responses import StreamingResponse
     
-    selected_files = req.selected_files
-    reps = req.reps
-    entanglement = req.entanglement
+    if training_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
 
-    # Robust path resolution for config
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    config_dir = os.path.join(base_dir, "ml_engine")
-    if not os.path.exists(config_dir): os.makedirs(config_dir, exist_ok=True)
-    config_path = os.path.join(config_dir, "model_config.json")
-    
-    with open(config_path, "w") as f:
-        json.dump({"reps": reps, "entanglement": entanglement}, f)
-    
-    # Force re-init of quantum model with new config
-    qml.pipeline = None
-    qml.init_model()
-    
-    # Robust path resolution for datasets
-    # ... (datasets path was already fixed earlier) ...
-    
-    # Robust path resolution for datasets
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    dataset_dir = os.path.join(base_dir, "datasets")
-    
-    if not selected_files:
-        return {"status": "Error", "message": "No files selected for training."}
+    # Resume after the last event the browser saw when EventSource reconnects
+    try:
+        start = int(request.headers.get("last-event-id", -1)) + 1
+    except ValueError:
+        start = 0
 
-    training_steps = []
-    healthy_features = []
-    uc_features = []
-    
-    for i, file_name in enumerate(selected_files):
-        file_path = os.path.join(dataset_dir, file_name)
-        if not os.path.exists(file_path):
-            continue
-            
-        await asyncio.sleep(0.5) # Simulate processing
-        
-        if file_name.endswith('.csv'):
-            # Process clinical cases
-            with open(file_path, mode='r') as f:
-                reader = csv.DictReader(f)
-                rows = list(reader)
-                
-                # Identify numeric columns for signature extraction
-                # We expect columns like RBC, WBC, CRP etc based on clinical_blood_results.csv
-                numeric_keys = [k for k in rows[0].keys() if k not in ["Patient_ID", "Label"]]
-                
-                for j, row in enumerate(rows):
-                    label = row.get("Label", "Healthy")
-                    is_pos = "Ulcerative Colitis" in label
-                    
-                    # Extract numeric data for centroid learning
-                    try:
-                        vals = []
-                        for k in numeric_keys:
-                            try:
-                                val = float(row[k])
-                                vals.append(val)
-                            except:
-                                pass
-                        
-                        features = np.array(vals)
-                        features = features / 100.0 # Absolute Scaling
-                        
-                        # Standardization to 512 dimensions (match inference padding)
-                        if len(features) < 512:
-                            features = np.pad(features, (0, 512 - len(features)))
-                        elif len(features) > 512:
-                            features = features[:512]
-                        
-                        # Fallback heuristic (Clinical Aware)
-                        try:
-                            if features.shape[0] >= 15: # Check for 1D array, use shape[0]
-                                crp = features[13] * 100.0
-                                esr = features[14] * 100.0
-                                with open("diagnostic_trace.txt", "a") as f:
-                                    f.write(f"DEBUG: Internal Heuristic Check -> CRP: {crp:.2f}, ESR: {esr:.2f}\n")
-                                if crp > 10.0 or esr > 20.0:
-                                    with open("diagnostic_trace.txt", "a") as f:
-                                        f.write("DEBUG: Heuristic Result -> POSITIVE\n")
-                                    # This part is for diagnostic tracing, not for changing the actual label for training
-                                else:
-                                    with open("diagnostic_trace.txt", "a") as f:
-                                        f.write("DEBUG: Heuristic Result -> NEGATIVE\n")
-                            else:
-                                with open("diagnostic_trace.txt", "a") as f:
-                                    f.write(f"DEBUG: Heuristic Check skipped, features length: {len(features)}\n")
-                        except Exception as e:
-                            with open("diagnostic_trace.txt", "a") as f:
-                                f.write(f"DEBUG: Heuristic Exception: {e}\n")
-                            pass
-                            
-                        if is_pos:
-                            uc_features.append(features.tolist())
-                        else:
-                            healthy_features.append(features.tolist())
-                            
-                    except Exception as e:
-                        print(f"DEBUG: Failed to extract features from CSV row {j}: {e}")
-
-                    training_steps.append({
-                        "epoch": f"{i+1}.{j+1}",
-                        "source": file_name,
-                        "id": row.get("Patient_ID", "Unknown"),
-                        "accuracy": f"{88 + random.uniform(0, 10):.1f}%",
-                        "status": f"Clinical Profile: {label}",
-                        "is_positive": is_pos
-                    })
-        else:
-            # Process endoscopy image and extract REAL features
-            with open(file_path, "rb") as f:
-                img_bytes = f.read()
-            
-            features = extract_features(img_bytes)
-            
-            # Extract Patient ID from filename (e.g. P101_Healthy.png -> P101)
-            patient_id = file_name.split('_')[0] if '_' in file_name else file_name
-            
-            # Label based on filename for training ground truth
-            file_lower = file_name.lower()
-            if any(term in file_lower for term in ["healthy", "control", "normal"]):
-                healthy_features.append(features.tolist())
-                label = "Healthy"
-                is_positive = False
-            else:
-                uc_features.append(features.tolist())
-                label = "Ulcerative Colitis"
-                is_positive = True
-                
-            training_steps.append({
-                "epoch": i + 1,
-                "source": file_name,
-                "id": patient_id,
-                "accuracy": f"{92 + random.uniform(0, 5):.1f}%", # Slightly higher visual confidence for real data
-                "status": f"Pattern Learned: {label}",
-                "is_positive": is_positive
-            })
-    
-    # Real Model Retraining
-    if healthy_features or uc_features:
-        X = []
-        y = []
-        for feat in healthy_features:
-            X.append(feat)
-            y.append(0)
-        for feat in uc_features:
-            X.append(feat)
-            y.append(1)
-        
-        # Call the actual quantum retraining
-        qml.retrain_model(X, y, reps=reps, entanglement=entanglement)
-
-        # Save centroids for fallback logic
-        centroids = {}
-        if healthy_features:
-            centroids["healthy"] = np.mean(healthy_features, axis=0).tolist()
-        if uc_features:
-            centroids["uc"] = np.mean(uc_features, axis=0).tolist()
-            
-        if uc_features:
-            centroids["uc"] = np.mean(uc_features, axis=0).tolist()
-            
-        # Absolute path for centroids
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        centroids_path = os.path.join(base_dir, "ml_engine", "centroids.json")
-        
-        with open(centroids_path, "w") as f:
-            json.dump(centroids, f)
-        print("DEBUG: Model retrained and centroids saved.")
-    
-    # Log training session to MongoDB
-    db_client.save_training_session(history=training_steps, configuration={"reps": req.reps, "entanglement": req.entanglement})
+    async def event_stream():
+        index = start
+        while True:
+            events, finished = training_jobs.events_since(job_id, index)
+            for offset, event in enumerate(events):
+                yield f"id: {index + offset}\ndata: {json.dumps(event)}\n\n"
+            index += len(events)
+            if finished and not events:
+                break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+class ConfirmedDiagnosisRequest(BaseModel):
+    features: list[float] = None
+    # Handle returned by /predict instead of posting the vector back
+    features_handle: str = None
+    label: str
+    remove: bool = False
 
+@app.post("/confirm-diagnosis")
+async def confirm_diagnosis(req: ConfirmedDiagnosisRequest):
+    """Folds a clinician-confirmed sample into (or out of) the learned centroids."""
+    label = req.label.lower()
+    if label not in centroid_stats.CLASSES:
+        raise HTTPException(status_code=400, detail=f"Label must be one of: {', '.join(centroid_stats.CLASSES)}")
+    features = await run_in_threadpool(_resolve_features, req.features, req.features_handle)
+    if features is None:
+        raise HTTPException(status_code=400, detail="No features provided")
+
+    try:
+        count = centroid_stats.update_sample(label, features, remove=req.remove)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return {
-        "status": "Training Complete", 
-        "processed_count": len(selected_files),
-        "history": training_steps
+        "status": "removed" if req.remove else "added",
+        "label": label,
+        "class_count": count
     }
 
+# Cloud-synced models have no cheap change token: the registry is re-read at most this often
+REGISTRY_REFRESH_SECONDS = int(os.environ.get("REGISTRY_REFRESH_SECONDS", 30))
+# Bumped by /save-model and /delete-model (covers cloud-only deletes in this process)
+_registry_revision = [0]
+
+def _registry_token():
+    """Model registry version: saved_models/ mtime (any local save or delete) plus the local revision."""
+    try:
+        mtime = os.stat(os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_models")).st_mtime_ns
+    except OSError:
+        mtime = None
+    return mtime, _registry_revision[0]
+
 @app.get("/models")
-async def list_models():
+async def list_models(request: Request):
     """List available model configurations (default, saved on disk, and synced in cloud)."""
+    return await conditional.respond(request, "models", _registry_token(), _models,
+                                     max_age_seconds=REGISTRY_REFRESH_SECONDS)
+
+async def _models():
+    # Disk and MongoDB reads are blocking: keep them off the event loop
+    return await run_in_threadpool(_list_models)
+
+def _list_models():
     import os
     import json
     
-    presets = [
-        {"id": "v1_linear", "name": "Production (ZZ Linear)", "params": {"reps": 2, "entanglement": "linear"}},
-        {"id": "v2_circular", "name": "Experimental (ZZ Circular)", "params": {"reps": 3, "entanglement": "circular"}}
-    ]
+    presets = [dict(p) for p in qml.MODEL_PRESETS]
     
     # 1. Fetch from local filesystem
     saved_on_disk = []
@@ -716,32 +1178,41 @@ async def list_models():
     return {"presets": presets, "saved": saved}
 
 @app.get("/compare-circuits")
-async def compare_circuits():
+async def compare_circuits(request: Request):
     """Returns diagrams and metrics for all models for side-by-side comparison."""
-    data = await list_models()
-    all_configs = data["presets"] + data["saved"]
-    
+    token = (_registry_token(), circuit_cache.RENDER_VERSION)
+    return await conditional.respond(request, "compare-circuits", token, _comparisons,
+                                     max_age_seconds=REGISTRY_REFRESH_SECONDS)
+
+async def _comparisons():
+    data = await _models()
+    return await run_cpu("compare-circuits", _compare_circuits, data["presets"] + data["saved"])
+
+def _compare_circuits(all_configs):
+    """Renders one diagram per model configuration (matplotlib, CPU-bound)."""
     results = []
     for conf in all_configs:
         reps = conf["params"]["reps"]
         ent = conf["params"]["entanglement"]
         
-        # Generate a diagram for this specific config
-        diagram = qml.generate_circuit_helper(reps=reps, entanglement=ent)
+        # Make sure the diagram is rendered (normally prewarmed); clients fetch it by URL
+        diagram = circuit_cache.get_png(reps, ent)
+        structure = circuit_table.lookup(reps, ent) or qml.get_circuit_obj(reps=reps, entanglement=ent)
         
         results.append({
             "name": conf["name"],
             "accuracy": conf.get("accuracy", "88.2% (Sim)"), # Default sim accuracy if not saved
             "reps": reps,
             "entanglement": ent,
-            "diagram": diagram,
-            "depth": reps * 2 # Heuristic depth
+            "diagram_url": f"/images/circuits/{circuit_cache.cache_key(reps, ent)}" if diagram is not None else None,
+            "depth": structure["depth"],
+            "gate_counts": structure.get("gate_counts")
         })
         
     return {"comparisons": results}
 
 @app.post("/save-model")
-async def save_model(model_name: str, accuracy: str = "96.2%", reps: int = 2, entanglement: str = "linear"):
+async def save_model(background_tasks: BackgroundTasks, model_name: str, accuracy: str = "96.2%", reps: int = 2, entanglement: str = "linear"):
     """Save the current model state to local file AND cloud database for automatic sync."""
     import os
     import json
@@ -776,6 +1247,10 @@ async def save_model(model_name: str, accuracy: str = "96.2%", reps: int = 2, en
     
     # 2. Save to MongoDB Atlas (for cloud sync - automatic!)
     db_client.save_trained_model(model_data.copy())
+    
+    # 3. Render its diagram now so /compare-circuits never draws it on a request
+    background_tasks.add_task(circuit_cache.prewarm, [(reps, entanglement)])
+    _registry_revision[0] += 1
         
     return {"status": "success", "message": f"Model saved locally AND synced to cloud as '{filename}' with Accuracy: {accuracy}"}
 
@@ -800,6 +1275,7 @@ async def delete_model(model_id: str):
             
     # 2. Attempt Delete from Cloud
     deleted_from_cloud = db_client.delete_trained_model(model_id)
+    _registry_revision[0] += 1
     
     if not deleted_from_disk and not deleted_from_cloud:
         raise HTTPException(status_code=404, detail="Model not found on disk or cloud.")
@@ -814,8 +1290,12 @@ async def delete_model(model_id: str):
     }
 
 @app.get("/compare")
-async def compare_configs():
+async def compare_configs(request: Request):
     """Return comparison data for two quantum configurations."""
+    # Static content: browsers reuse it for an hour, then revalidate against the ETag
+    return await conditional.respond(request, "compare", None, _compare_configs, cache_control="public, max-age=3600")
+
+async def _compare_configs():
     return {
         "configurations": [
             {
@@ -834,20 +1314,30 @@ async def compare_configs():
     }
 
 @app.get("/model-analytics")
-async def model_analytics():
-    """Returns analytics data (ROC, Confusion Matrix, History)."""
+async def model_analytics(request: Request):
+    """Returns analytics data (ROC, Confusion Matrix, History); 304 while model and dataset folder are unchanged."""
+    from ml_engine import analytics
     try:
-        data = qml.get_analytics_data()
-        return data
+        token = analytics.change_token(model_version.current())
+        return await conditional.respond(request, "model-analytics", token, run_cpu, "model-analytics",
+                                         qml.get_analytics_data, cache_control="private, no-cache")
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"ERROR in analytics endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/circuit-interactive")
-async def circuit_interactive(background_tasks: BackgroundTasks, reps: int = Query(2, ge=1, le=5), entanglement: str = Query("linear")):
-    """Returns JSON circuit structure for interactive visualization."""
+async def circuit_interactive(request: Request, background_tasks: BackgroundTasks, reps: int = Query(2, ge=1, le=5), entanglement: str = Query("linear")):
+    """Returns JSON circuit structure for interactive visualization (precomputed, no Qiskit on the request)."""
+    entry = circuit_table.lookup(reps, entanglement)
+    if entry is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported entanglement '{entanglement}'. Use one of: {', '.join(circuit_table.ENTANGLEMENTS)}"
+        )
     try:
-        data = qml.get_circuit_obj(reps=reps, entanglement=entanglement)
+        data = circuit_table.public(entry)
         # Log to MongoDB in background
         background_tasks.add_task(
             db_client.save_circuit_experiment,
@@ -855,7 +1345,11 @@ async def circuit_interactive(background_tasks: BackgroundTasks, reps: int = Que
             qasm_code=data.get("gates"), # Corrected from 'qasm'
             explanation="Q-Lab Interaction"
         )
-        return data
+        # The table never changes while the process runs. no-cache (revalidate, usually a 304)
+        # rather than max-age, so every Q-Lab interaction still reaches the experiment log
+        async def structure():
+            return data
+        return await conditional.respond(request, f"circuit-interactive:{reps}:{entanglement}", None, structure)
     except Exception as e:
         print(f"ERROR in circuit interactive endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -901,8 +1395,13 @@ async def log_grid_analysis(req: GridAnalysisRequest):
     return {"status": "logged"}
 
 @app.get("/statistical-analysis")
+@single_flight("statistical-analysis")
 async def get_statistical_analysis():
     """Returns dynamic statistical analysis data aggregated from MongoDB records."""
+    # Full-collection MongoDB scan plus NumPy aggregation: keep it off the event loop
+    return ORJSONResponse(await run_in_threadpool(_statistical_analysis))
+
+def _statistical_analysis():
     import numpy as np
     
     # 1. Fetch data from MongoDB
@@ -913,6 +1412,9 @@ async def get_statistical_analysis():
         except Exception as e:
             print(f"ERROR fetching stats: {e}")
 
+    # Predictions served before the model was evaluated carry no metrics to aggregate
+    records = [r for r in records if r.get("metrics", {}).get("evaluated", True)]
+
     # Fallback to rich simulated results if no data (Cold Start)
     if len(records) < 1:
         return {
@@ -1018,133 +1520,131 @@ async def get_feature_importance(file: UploadFile = File(...)):
     """Returns feature importance data for the uploaded image."""
     try:
         contents = await file.read()
-        features = extract_features(contents)
+        features, _ = await run_cpu("feature-importance", inference_pool.call, "extract_features", contents)
         
         # Simulate feature importance scores based on extracted features
-        import numpy as np
-        np.random.seed(int(np.sum(features[:10]) * 100) % 1000)
+        # Per-call generator seeded as before (same scores for the same image)
+        rng = np.random.RandomState(int(np.sum(features[:10]) * 100) % 1000)
         
         return {
             "features": [
                 {
                     "name": "Mucosal Pattern",
-                    "importance": round(0.85 + np.random.uniform(0, 0.1), 2),
-                    "contribution": round(35 + np.random.uniform(0, 8), 1),
+                    "importance": round(0.85 + rng.uniform(0, 0.1), 2),
+                    "contribution": round(35 + rng.uniform(0, 8), 1),
                     "interpretation": "Surface texture irregularities detected"
                 },
                 {
                     "name": "Vascular Pattern",
-                    "importance": round(0.72 + np.random.uniform(0, 0.1), 2),
-                    "contribution": round(22 + np.random.uniform(0, 6), 1),
+                    "importance": round(0.72 + rng.uniform(0, 0.1), 2),
+                    "contribution": round(22 + rng.uniform(0, 6), 1),
                     "interpretation": "Blood vessel visibility changes"
                 },
                 {
                     "name": "Color Distribution",
-                    "importance": round(0.58 + np.random.uniform(0, 0.1), 2),
-                    "contribution": round(15 + np.random.uniform(0, 5), 1),
+                    "importance": round(0.58 + rng.uniform(0, 0.1), 2),
+                    "contribution": round(15 + rng.uniform(0, 5), 1),
                     "interpretation": "Erythema and color variations"
                 },
                 {
                     "name": "Edge Features",
-                    "importance": round(0.40 + np.random.uniform(0, 0.1), 2),
-                    "contribution": round(10 + np.random.uniform(0, 4), 1),
+                    "importance": round(0.40 + rng.uniform(0, 0.1), 2),
+                    "contribution": round(10 + rng.uniform(0, 4), 1),
                     "interpretation": "Boundary and structural changes"
                 }
             ]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in feature importance: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/db-history")
 async def get_db_history():
-    """Returns historical data from MongoDB, flattening binary images for the UI."""
-    from bson import json_util
-    import json
-    import base64
+    """Returns historical data from MongoDB; binary images are replaced by /images/db/... URLs."""
+    raw_data = await run_in_threadpool(db_client.get_collections_data)
+    
+    # UI folder -> MongoDB collection holding its images
+    folders = {"predictions": "predictions", "circuits": "prediction_circuits", "xai": "xai_results"}
+    for folder, docs in raw_data.items():
+        collection = folders.get(folder)
+        for doc in docs:
+            for field in db_client.IMAGE_FIELDS.get(collection, ()):
+                if doc.pop(field, None):
+                    doc[f"{field}_url"] = f"/images/db/{collection}/{doc['_id']}/{field}"
+    
+    # ObjectIds/Dates keep their Extended JSON shape, rendered in one pass by orjson
+    return MongoJSONResponse(raw_data)
+
+def _explain_single(contents):
+    """CPU-bound part of /explain-decision: prediction, factor scores and heatmap."""
+    # Image Domain Validation, features and quantum prediction
+    features, scored = inference_pool.call("analyze_image", contents)
+    if not scored["is_medical"]:
+        raise HTTPException(status_code=400, detail="INVALID_IMAGE_DOMAIN: Please upload a colonoscopy or clinical image.")
+    
+    q_pred = scored["quantum"]
+    is_positive = "Positive" in q_pred or "Ulcerative" in q_pred
+    
+    # Per-call generator: global np.random seeding is not thread-safe on the inference pool
+    rng = np.random.RandomState(int(np.sum(features[:10]) * 100) % 1000)
+    
+    confidence = 88 + rng.uniform(0, 10)
     
-    raw_data = db_client.get_collections_data()
+    # Decision factors based on feature analysis
+    factors = {
+        "mucosal_texture": round(0.7 + rng.uniform(0, 0.25), 3),
+        "vascular_pattern": round(0.6 + rng.uniform(0, 0.3), 3),
+        "color_distribution": round(0.5 + rng.uniform(0, 0.35), 3),
+        "ulceration_signs": round(0.4 + rng.uniform(0, 0.4), 3) if is_positive else round(0.1 + rng.uniform(0, 0.2), 3)
+    }
     
-    # Process the data to flatten binary fields (image, diagram, original, heatmap) into base64 strings
-    for collection in raw_data:
-        for doc in raw_data[collection]:
-            # Flatten standard fields
-            if "image" in doc and doc["image"]:
-                doc["image"] = base64.b64encode(doc["image"]).decode('utf-8')
-            if "diagram" in doc and doc["diagram"]:
-                doc["diagram"] = base64.b64encode(doc["diagram"]).decode('utf-8')
-            # Flatten XAI specific fields
-            if "original" in doc and doc["original"]:
-                doc["original"] = base64.b64encode(doc["original"]).decode('utf-8')
-            if "heatmap" in doc and doc["heatmap"]:
-                doc["heatmap"] = base64.b64encode(doc["heatmap"]).decode('utf-8')
+    # Generate natural language explanation
+    if is_positive:
+        explanation = f"The quantum AI model identified concerning patterns in the endoscopy image. The **mucosal texture** analysis (score: {factors['mucosal_texture']:.2f}) shows irregularities consistent with inflammation. **Vascular pattern** analysis (score: {factors['vascular_pattern']:.2f}) reveals reduced visibility of blood vessels. **Color distribution** (score: {factors['color_distribution']:.2f}) indicates areas of erythema. **Ulceration signs** (score: {factors['ulceration_signs']:.2f}) were detected. The 4-qubit quantum feature encoding captured subtle correlations contributing to the {confidence:.1f}% confidence positive classification."
+    else:
+        explanation = f"The quantum AI model analyzed the endoscopy image and found no significant indicators of Ulcerative Colitis. The **mucosal texture** (score: {factors['mucosal_texture']:.2f}) appears normal. **Vascular pattern** (score: {factors['vascular_pattern']:.2f}) shows healthy blood vessel visibility. **Color distribution** (score: {factors['color_distribution']:.2f}) is within normal range. **Ulceration signs** (score: {factors['ulceration_signs']:.2f}) are minimal. The quantum kernel successfully distinguished this as a healthy case with {confidence:.1f}% confidence."
     
-    # Use json_util for other MongoDB types like ObjectIds/Dates
-    serialized = json.loads(json_util.dumps(raw_data))
-    return serialized
+    # Generate a synthetic heatmap for visual explanation
+    import cv2
+    heatmap = None
+    try:
+        img_np = np.frombuffer(contents, np.uint8)
+        img = cv2.imdecode(img_np, cv2.IMREAD_COLOR)
+        if img is not None:
+            h, w = img.shape[:2]
+            
+            # Create a "hot zone" based on where features are strongest
+            heatmap_overlay = np.zeros((h, w), dtype=np.uint8)
+            cv2.circle(heatmap_overlay, (int(w*0.5), int(h*0.5)), int(min(w,h)*0.3), 255, -1)
+            heatmap_overlay = cv2.GaussianBlur(heatmap_overlay, (51, 51), 0)
+            
+            heatmap_color = cv2.applyColorMap(heatmap_overlay, cv2.COLORMAP_JET)
+            heatmap_img = cv2.addWeighted(img, 0.6, heatmap_color, 0.4, 0)
+            
+            _, encoded_img = cv2.imencode('.png', heatmap_img)
+            heatmap = encoded_img.tobytes()
+    except Exception as he:
+        print(f"DEBUG: Heatmap generation failed: {he}")
+        heatmap = contents # Fallback to original image if heatmap fails
+
+    return q_pred, is_positive, confidence, factors, explanation, heatmap
 
 @app.post("/explain-decision")
-async def explain_decision(file: UploadFile = File(...)):
+async def explain_decision(response: Response, background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """Returns explainable AI decision with Grad-CAM style explanations."""
     try:
         contents = await file.read()
-        
-        # Image Domain Validation
-        if not is_medical_image(contents):
-            raise HTTPException(status_code=400, detail="INVALID_IMAGE_DOMAIN: Please upload a colonoscopy or clinical image.")
-            
-        features = extract_features(contents)
-        
-        # Get quantum prediction
-        q_pred = predict_quantum(features, image_bytes=contents)
-        is_positive = "Positive" in q_pred or "Ulcerative" in q_pred
-        
-        import numpy as np
-        np.random.seed(int(np.sum(features[:10]) * 100) % 1000)
-        
-        confidence = 88 + np.random.uniform(0, 10)
-        
-        # Decision factors based on feature analysis
-        factors = {
-            "mucosal_texture": round(0.7 + np.random.uniform(0, 0.25), 3),
-            "vascular_pattern": round(0.6 + np.random.uniform(0, 0.3), 3),
-            "color_distribution": round(0.5 + np.random.uniform(0, 0.35), 3),
-            "ulceration_signs": round(0.4 + np.random.uniform(0, 0.4), 3) if is_positive else round(0.1 + np.random.uniform(0, 0.2), 3)
-        }
-        
-        # Generate natural language explanation
-        if is_positive:
-            explanation = f"The quantum AI model identified concerning patterns in the endoscopy image. The **mucosal texture** analysis (score: {factors['mucosal_texture']:.2f}) shows irregularities consistent with inflammation. **Vascular pattern** analysis (score: {factors['vascular_pattern']:.2f}) reveals reduced visibility of blood vessels. **Color distribution** (score: {factors['color_distribution']:.2f}) indicates areas of erythema. **Ulceration signs** (score: {factors['ulceration_signs']:.2f}) were detected. The 4-qubit quantum feature encoding captured subtle correlations contributing to the {confidence:.1f}% confidence positive classification."
-        else:
-            explanation = f"The quantum AI model analyzed the endoscopy image and found no significant indicators of Ulcerative Colitis. The **mucosal texture** (score: {factors['mucosal_texture']:.2f}) appears normal. **Vascular pattern** (score: {factors['vascular_pattern']:.2f}) shows healthy blood vessel visibility. **Color distribution** (score: {factors['color_distribution']:.2f}) is within normal range. **Ulceration signs** (score: {factors['ulceration_signs']:.2f}) are minimal. The quantum kernel successfully distinguished this as a healthy case with {confidence:.1f}% confidence."
-        
-        # Generate a synthetic heatmap for visual explanation
-        import cv2
-        heatmap = None
-        heatmap_base64 = None
-        try:
-            img_np = np.frombuffer(contents, np.uint8)
-            img = cv2.imdecode(img_np, cv2.IMREAD_COLOR)
-            if img is not None:
-                h, w = img.shape[:2]
-                
-                # Create a "hot zone" based on where features are strongest
-                heatmap_overlay = np.zeros((h, w), dtype=np.uint8)
-                cv2.circle(heatmap_overlay, (int(w*0.5), int(h*0.5)), int(min(w,h)*0.3), 255, -1)
-                heatmap_overlay = cv2.GaussianBlur(heatmap_overlay, (51, 51), 0)
-                
-                heatmap_color = cv2.applyColorMap(heatmap_overlay, cv2.COLORMAP_JET)
-                heatmap_img = cv2.addWeighted(img, 0.6, heatmap_color, 0.4, 0)
-                
-                _, encoded_img = cv2.imencode('.png', heatmap_img)
-                heatmap = encoded_img.tobytes()
-                heatmap_base64 = base64.b64encode(heatmap).decode('utf-8')
-        except Exception as he:
-            print(f"DEBUG: Heatmap generation failed: {he}")
-            heatmap = contents # Fallback to original image if heatmap fails
-
-        # Log XAI analysis to MongoDB
-        db_client.save_xai_analysis(
+        q_pred, is_positive, confidence, factors, explanation, heatmap = await _run_cached(
+            "explain-decision", "explain-decision", response, _explain_single, contents
+        )
+
+        heatmap_url = images.url(await run_in_threadpool(images.put, heatmap)) if heatmap else None
+
+        # Log XAI analysis to MongoDB in background
+        background_tasks.add_task(
+            db_client.save_xai_analysis,
             patient_id=file.filename,
             original_image=contents,
             saliency_map=heatmap, 
@@ -1156,7 +1656,8 @@ async def explain_decision(file: UploadFile = File(...)):
             "is_positive": is_positive,
             "confidence": float(confidence),
             "factors": factors,
-            "explanation": explanation
+            "explanation": explanation,
+            "heatmap_url": heatmap_url
         }
     except HTTPException:
         raise
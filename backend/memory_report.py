@@ -0,0 +1,63 @@
+"""
+Per-worker memory report for the multi-worker server.
+
+    python memory_report.py [master_pid]
+
+Reads /proc/<pid>/smaps_rollup for the gunicorn master and its workers. PSS splits
+copy-on-write pages fairly between the processes sharing them, so the PSS total is the real
+footprint; Private_Dirty per worker is what each additional worker costs.
+"""
+import os
+import sys
+
+DEFAULT_PIDFILE = os.environ.get("GUNICORN_PIDFILE", "/tmp/uc-backend.pid")
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+def read_rollup(pid):
+    """Memory counters (KiB) of one process from /proc/<pid>/smaps_rollup."""
+    stats = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].rstrip(":") in FIELDS:
+                stats[parts[0].rstrip(":")] = int(parts[1])
+    return stats
+
+def child_pids(pid):
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children", "r") as f:
+                children.extend(int(p) for p in f.read().split())
+        except OSError:
+            pass
+    return children
+
+def report(master_pid):
+    rows = [("master", master_pid, read_rollup(master_pid))]
+    rows += [("worker", pid, read_rollup(pid)) for pid in child_pids(master_pid)]
+    workers = [r for r in rows if r[0] == "worker"]
+
+    mb = lambda kib: f"{kib / 1024:8.1f}"
+    print(f"{'role':8} {'pid':>7} {'RSS MB':>9} {'PSS MB':>9} {'shared MB':>10} {'private MB':>11}")
+    for role, pid, s in rows:
+        shared = s.get("Shared_Clean", 0) + s.get("Shared_Dirty", 0)
+        private = s.get("Private_Clean", 0) + s.get("Private_Dirty", 0)
+        print(f"{role:8} {pid:7} {mb(s.get('Rss', 0))} {mb(s.get('Pss', 0))} {mb(shared)}  {mb(private)}")
+
+    total_pss = sum(s.get("Pss", 0) for _, _, s in rows)
+    print(f"\nTotal PSS: {total_pss / 1024:.1f} MB across {len(rows)} processes")
+    if workers:
+        per_worker = sum(s.get("Private_Dirty", 0) for _, _, s in workers) / len(workers)
+        base = total_pss - per_worker * len(workers)
+        print(f"Shared base (models, libraries): ~{base / 1024:.1f} MB")
+        print(f"Marginal cost per worker (private dirty): ~{per_worker / 1024:.1f} MB")
+        print(f"Sizing: memory limit M MB fits WEB_CONCURRENCY <= (M - {base / 1024:.0f}) / {per_worker / 1024:.0f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        pid = int(sys.argv[1])
+    else:
+        with open(DEFAULT_PIDFILE, "r") as f:
+            pid = int(f.read().strip())
+    report(pid)
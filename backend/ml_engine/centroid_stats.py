@@ -0,0 +1,161 @@
+import os
+import json
+import threading
+import numpy as np
+
+# Per-class running statistics (Welford): count, mean and sum of squared deviations (M2).
+# Persisted as a compact .npz so confirmed diagnoses can be folded in one sample at a time.
+STATS_PATH = os.path.join(os.path.dirname(__file__), "centroid_stats.npz")
+LEGACY_JSON_PATH = os.path.join(os.path.dirname(__file__), "centroids.json")
+CLASSES = ("healthy", "uc")
+
+_lock = threading.Lock()
+_stats = None
+_stats_mtime = None
+
+def _empty(dim):
+    return {"count": 0, "mean": np.zeros(dim), "m2": np.zeros(dim)}
+
+def _bootstrap_from_json():
+    """Seeds running stats from a legacy centroids.json (each centroid counts as one sample)."""
+    stats = {}
+    if os.path.exists(LEGACY_JSON_PATH):
+        try:
+            with open(LEGACY_JSON_PATH, "r") as f:
+                centroids = json.load(f)
+            for label in CLASSES:
+                if label in centroids:
+                    mean = np.asarray(centroids[label], dtype=np.float64)
+                    stats[label] = {"count": 1, "mean": mean, "m2": np.zeros_like(mean)}
+            print("DEBUG: Centroid stats bootstrapped from centroids.json")
+        except Exception as e:
+            print(f"ERROR: Failed to bootstrap centroid stats: {e}")
+    return stats
+
+def _read():
+    global _stats, _stats_mtime
+    if not os.path.exists(STATS_PATH):
+        if _stats is None:
+            _stats = _bootstrap_from_json()
+        return _stats
+
+    mtime = os.path.getmtime(STATS_PATH)
+    if _stats is not None and mtime == _stats_mtime:
+        return _stats
+
+    stats = {}
+    with np.load(STATS_PATH) as data:
+        for label in CLASSES:
+            if f"{label}_count" in data:
+                stats[label] = {
+                    "count": int(data[f"{label}_count"]),
+                    "mean": data[f"{label}_mean"].astype(np.float64),
+                    "m2": data[f"{label}_m2"].astype(np.float64)
+                }
+    _stats, _stats_mtime = stats, mtime
+    return _stats
+
+def _write(stats):
+    global _stats, _stats_mtime
+    arrays = {}
+    for label, s in stats.items():
+        arrays[f"{label}_count"] = np.int64(s["count"])
+        arrays[f"{label}_mean"] = s["mean"]
+        arrays[f"{label}_m2"] = s["m2"]
+
+    # Atomic replace so concurrent readers never see a partial file
+    tmp_path = STATS_PATH + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, STATS_PATH)
+    _stats, _stats_mtime = stats, os.path.getmtime(STATS_PATH)
+
+def get_stats():
+    """Returns {label: {"count", "mean", "m2"}} for every class with data."""
+    with _lock:
+        return _read()
+
+def get_centroids():
+    """Returns {label: mean vector} for classes with at least one sample."""
+    return {label: s["mean"] for label, s in get_stats().items() if s["count"] > 0}
+
+def get_variances():
+    """Returns {label: per-feature sample variance} for classes with at least two samples."""
+    return {label: s["m2"] / (s["count"] - 1) for label, s in get_stats().items() if s["count"] > 1}
+
+def _check_dim(stats, dim):
+    # Every class shares the feature dimension, so an empty class is checked against the others
+    expected = next((v["mean"].shape[0] for v in stats.values()), dim)
+    if dim != expected:
+        raise ValueError(f"Expected {expected} features, got {dim}")
+
+def update_sample(label, features, remove=False):
+    """Folds a single labelled sample into (or out of) the running stats in O(d)."""
+    if label not in CLASSES:
+        raise ValueError(f"Unknown centroid class: {label}")
+    x = np.asarray(features, dtype=np.float64).ravel()
+
+    with _lock:
+        stats = {k: dict(v) for k, v in _read().items()}
+        _check_dim(stats, x.shape[0])
+        s = stats.get(label) or _empty(x.shape[0])
+        n, mean, m2 = s["count"], s["mean"], s["m2"]
+
+        if remove:
+            if n <= 1:
+                s = _empty(x.shape[0])
+            else:
+                n_new = n - 1
+                delta = x - mean
+                mean_new = mean - delta / n_new
+                m2_new = np.maximum(m2 - delta * (x - mean_new), 0.0)
+                s = {"count": n_new, "mean": mean_new, "m2": m2_new}
+        else:
+            n_new = n + 1
+            delta = x - mean
+            mean_new = mean + delta / n_new
+            m2_new = m2 + delta * (x - mean_new)
+            s = {"count": n_new, "mean": mean_new, "m2": m2_new}
+
+        stats[label] = s
+        _write(stats)
+        return s["count"]
+
+def _batch_stats(X):
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.ndim != 2 or len(X) == 0:
+        raise ValueError(f"Expected a non-empty (samples, features) matrix, got shape {X.shape}")
+    mean = X.mean(axis=0)
+    return {"count": len(X), "mean": mean, "m2": ((X - mean) ** 2).sum(axis=0)}
+
+def merge_samples(label, X):
+    """Merges a batch of samples into one class (Chan et al. parallel update)."""
+    if label not in CLASSES:
+        raise ValueError(f"Unknown centroid class: {label}")
+    b = _batch_stats(X)
+
+    with _lock:
+        stats = {k: dict(v) for k, v in _read().items()}
+        _check_dim(stats, b["mean"].shape[0])
+        a = stats.get(label) or _empty(b["mean"].shape[0])
+        n = a["count"] + b["count"]
+        delta = b["mean"] - a["mean"]
+        stats[label] = {
+            "count": n,
+            "mean": a["mean"] + delta * (b["count"] / n),
+            "m2": a["m2"] + b["m2"] + delta ** 2 * (a["count"] * b["count"] / n)
+        }
+        _write(stats)
+        return n
+
+def rebuild(samples_by_label):
+    """Replaces all running stats with the given {label: X} samples."""
+    stats = {}
+    for label, X in samples_by_label.items():
+        if label not in CLASSES:
+            raise ValueError(f"Unknown centroid class: {label}")
+        if len(X) > 0:
+            stats[label] = _batch_stats(X)
+    with _lock:
+        _write(stats)
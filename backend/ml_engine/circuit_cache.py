@@ -0,0 +1,161 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Rendered ZZFeatureMap diagrams (PNG bytes), cached in memory (LRU) and on disk, keyed by
+# (reps, entanglement, qubits, bound-parameter hash). The disk cache is prewarmed at image
+# build time (prewarm_circuits.py) so presets and saved models never hit matplotlib at runtime.
+CACHE_DIR = os.environ.get(
+    "CIRCUIT_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "circuit_cache")
+)
+MEMORY_ENTRIES = int(os.environ.get("CIRCUIT_CACHE_ENTRIES", 128))
+# Parameter-bound diagrams are per case: cap how many are kept on disk
+DISK_MAX_FILES = int(os.environ.get("CIRCUIT_CACHE_MAX_FILES", 2000))
+# Bump when the drawing settings change so stale renders are not served
+RENDER_VERSION = 1
+N_QUBITS = 4
+PARAM_DECIMALS = 6
+KEY_RE = re.compile(r"^zz-v\d+_r\d+_[a-z_]+_q\d+_([0-9a-f]{16}|unbound)$")
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+# pyplot keeps global figure state: render one diagram at a time
+_render_lock = threading.Lock()
+stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "failures": 0}
+
+def params_hash(params):
+    """Short stable hash of bound parameters (rounded, so float noise maps to one entry); "unbound" for None."""
+    if params is None:
+        return "unbound"
+    values = np.round(np.asarray(params, dtype=np.float64).ravel(), PARAM_DECIMALS) + 0.0  # + 0.0 folds -0.0
+    return hashlib.sha256(values.tobytes()).hexdigest()[:16]
+
+def cache_key(reps, entanglement, n_qubits=N_QUBITS, params=None):
+    return f"zz-v{RENDER_VERSION}_r{int(reps)}_{entanglement}_q{int(n_qubits)}_{params_hash(params)}"
+
+def _disk_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.png")
+
+def _remember(key, png):
+    with _memory_lock:
+        _memory[key] = png
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def _store(key, png):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _disk_path(key)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(png)
+    os.replace(tmp_path, path)
+
+    names = [n for n in os.listdir(CACHE_DIR) if n.endswith(".png")]
+    if len(names) > DISK_MAX_FILES:
+        # Oldest parameter-bound renders go first; unbound (preset) diagrams are kept
+        bound = [n for n in names if not n.endswith("_unbound.png")]
+        bound.sort(key=lambda n: os.path.getmtime(os.path.join(CACHE_DIR, n)))
+        for n in bound[:len(names) - DISK_MAX_FILES]:
+            try:
+                os.remove(os.path.join(CACHE_DIR, n))
+            except OSError:
+                pass
+
+def _render_png(reps, entanglement, params=None):
+    """Draws the decomposed ZZFeatureMap with matplotlib; returns PNG bytes."""
+    import io
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from qiskit.circuit.library import ZZFeatureMap
+
+    circuit_to_draw = ZZFeatureMap(feature_dimension=N_QUBITS, reps=reps, entanglement=entanglement)
+    if params is not None:
+        # No fallback to the unbound drawing: the result is cached under the bound key, so a
+        # failed bind must fail the render (get_png returns None and stores nothing)
+        circuit_to_draw = circuit_to_draw.assign_parameters(
+            np.asarray(params, dtype=np.float64).ravel()[:circuit_to_draw.num_parameters]
+        )
+
+    fig = circuit_to_draw.decompose().draw(output='mpl', fold=-1)
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', bbox_inches='tight', dpi=120)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+def lookup(key):
+    """Cached PNG bytes for a key (memory, then disk), or None."""
+    with _memory_lock:
+        png = _memory.get(key)
+        if png is not None:
+            _memory.move_to_end(key)
+            stats["memory_hits"] += 1
+            return png
+    try:
+        with open(_disk_path(key), "rb") as f:
+            png = f.read()
+    except OSError:
+        return None
+    stats["disk_hits"] += 1
+    _remember(key, png)
+    return png
+
+def get_png(reps, entanglement, params=None):
+    """PNG bytes of the circuit diagram, rendered only on a cache miss; None if rendering fails."""
+    key = cache_key(reps, entanglement, N_QUBITS, params)
+    png = lookup(key)
+    if png is not None:
+        return png
+    with _render_lock:
+        # Another thread may have rendered the same diagram while we waited
+        png = lookup(key)
+        if png is not None:
+            return png
+        try:
+            png = _render_png(reps, entanglement, params)
+        except Exception as e:
+            stats["failures"] += 1
+            print(f"ERROR: Failed to draw in helper: {e}")
+            return None
+        stats["renders"] += 1
+    _remember(key, png)
+    try:
+        _store(key, png)
+    except OSError as e:
+        print(f"WARNING: Circuit diagram not persisted: {e}")
+    return png
+
+def saved_configs(model_dir):
+    """(reps, entanglement) of every model saved under saved_models/."""
+    configs = []
+    if os.path.isdir(model_dir):
+        for f in os.listdir(model_dir):
+            if not f.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(model_dir, f), "r") as m:
+                    params = json.load(m)["params"]
+                configs.append((int(params["reps"]), params["entanglement"]))
+            except Exception:
+                pass
+    return configs
+
+def prewarm(configs):
+    """Renders (or loads) the unbound diagram of every (reps, entanglement); returns the number available."""
+    ready = 0
+    for reps, entanglement in sorted(set(configs)):
+        if get_png(reps, entanglement) is not None:
+            ready += 1
+    return ready
+
+def cache_stats():
+    with _memory_lock:
+        entries = len(_memory)
+    return {**stats, "memory_entries": entries}
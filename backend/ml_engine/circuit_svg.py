@@ -0,0 +1,119 @@
+from xml.sax.saxutils import escape
+
+# Dependency-free SVG drawing of a gate list as produced by quantum.get_circuit_obj:
+# {"n_qubits": int, "gates": [{"name": str, "qubits": [int], "params": [float | str]}]}.
+# Gates are packed into columns as early as their wires allow (like Qiskit's layering).
+WIRE_GAP = 56
+LEFT_MARGIN = 48
+TOP_MARGIN = 28
+COLUMN_GAP = 14
+GATE_HEIGHT = 34
+MIN_GATE_WIDTH = 34
+CHAR_WIDTH = 6.6
+MAX_PARAM_CHARS = 22
+FONT = "font-family='Helvetica, Arial, sans-serif'"
+
+# Fill colours by gate name (close to Qiskit's default "iqp" palette), fallback for anything else
+GATE_COLORS = {
+    "h": "#FA4D56",
+    "p": "#33B1FF", "rz": "#33B1FF", "rx": "#33B1FF", "ry": "#33B1FF", "u": "#33B1FF",
+    "x": "#002D9C", "cx": "#002D9C", "cz": "#002D9C", "swap": "#002D9C",
+}
+DEFAULT_COLOR = "#9F1853"
+
+def format_param(value):
+    """Short display form of a gate parameter: rounded floats, compacted symbolic expressions."""
+    if isinstance(value, (int, float)):
+        return f"{value:.2f}"
+    text = str(value).replace("3.14159265358979", "π").replace("2.0*", "2·").replace("*", "·")
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS - 1] + "…"
+
+def _gate_width(gate):
+    labels = [gate["name"].upper()] + [format_param(p) for p in gate.get("params", [])]
+    return max(MIN_GATE_WIDTH, max(len(label) for label in labels) * CHAR_WIDTH + 12)
+
+def layout(circuit):
+    """Assigns every gate to the earliest column free on all wires it spans; returns (columns, per-column widths)."""
+    n_qubits = circuit["n_qubits"]
+    next_free = [0] * n_qubits
+    columns = []
+    for gate in circuit["gates"]:
+        low, high = min(gate["qubits"]), max(gate["qubits"])
+        column = max(next_free[low:high + 1])
+        for q in range(low, high + 1):
+            next_free[q] = column + 1
+        if column == len(columns):
+            columns.append([])
+        columns[column].append(gate)
+
+    widths = []
+    for gates in columns:
+        widths.append(max(MIN_GATE_WIDTH if len(g["qubits"]) > 1 and g["name"] in ("cx", "cz", "swap") else _gate_width(g)
+                          for g in gates))
+    return columns, widths
+
+def _wire_y(q):
+    return TOP_MARGIN + q * WIRE_GAP
+
+def _box(x, q_low, q_high, width, gate):
+    color = GATE_COLORS.get(gate["name"], DEFAULT_COLOR)
+    top = _wire_y(q_low) - GATE_HEIGHT / 2
+    height = _wire_y(q_high) - _wire_y(q_low) + GATE_HEIGHT
+    cx = x + width / 2
+    params = [format_param(p) for p in gate.get("params", [])]
+    parts = [f"<rect x='{x:.1f}' y='{top:.1f}' width='{width:.1f}' height='{height:.1f}' rx='3' fill='{color}'/>"]
+    name_y = top + height / 2 + (-2 if params else 4)
+    parts.append(f"<text x='{cx:.1f}' y='{name_y:.1f}' text-anchor='middle' font-size='12' fill='#fff' {FONT}>"
+                 f"{escape(gate['name'].upper())}</text>")
+    if params:
+        parts.append(f"<text x='{cx:.1f}' y='{name_y + 12:.1f}' text-anchor='middle' font-size='9' fill='#fff' {FONT}>"
+                     f"{escape(', '.join(params))}</text>")
+    return parts
+
+def _controlled(x, width, gate):
+    color = GATE_COLORS.get(gate["name"], DEFAULT_COLOR)
+    cx = x + width / 2
+    *controls, target = gate["qubits"]
+    ys = [_wire_y(q) for q in gate["qubits"]]
+    parts = [f"<line x1='{cx:.1f}' y1='{min(ys):.1f}' x2='{cx:.1f}' y2='{max(ys):.1f}' stroke='{color}' stroke-width='2'/>"]
+    for q in controls:
+        parts.append(f"<circle cx='{cx:.1f}' cy='{_wire_y(q):.1f}' r='5' fill='{color}'/>")
+    ty = _wire_y(target)
+    if gate["name"] == "cz":
+        parts.append(f"<circle cx='{cx:.1f}' cy='{ty:.1f}' r='5' fill='{color}'/>")
+    else:
+        parts.append(f"<circle cx='{cx:.1f}' cy='{ty:.1f}' r='11' fill='{color}'/>")
+        parts.append(f"<line x1='{cx - 7:.1f}' y1='{ty:.1f}' x2='{cx + 7:.1f}' y2='{ty:.1f}' stroke='#fff' stroke-width='2'/>")
+        parts.append(f"<line x1='{cx:.1f}' y1='{ty - 7:.1f}' x2='{cx:.1f}' y2='{ty + 7:.1f}' stroke='#fff' stroke-width='2'/>")
+    return parts
+
+def render_svg(circuit, title=None):
+    """SVG document (str) for a get_circuit_obj-style gate list."""
+    n_qubits = circuit["n_qubits"]
+    columns, widths = layout(circuit)
+    width = LEFT_MARGIN + sum(w + COLUMN_GAP for w in widths) + COLUMN_GAP
+    height = _wire_y(n_qubits - 1) + TOP_MARGIN + (18 if title else 0)
+
+    parts = [
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width:.0f}' height='{height:.0f}' viewBox='0 0 {width:.0f} {height:.0f}'>",
+        f"<rect width='100%' height='100%' fill='#fff'/>"
+    ]
+    for q in range(n_qubits):
+        y = _wire_y(q)
+        parts.append(f"<text x='8' y='{y + 4}' font-size='13' fill='#000' {FONT}>q<tspan font-size='9' dy='3'>{q}</tspan></text>")
+        parts.append(f"<line x1='{LEFT_MARGIN - 10}' y1='{y}' x2='{width - 6:.0f}' y2='{y}' stroke='#000' stroke-width='1'/>")
+
+    x = LEFT_MARGIN + COLUMN_GAP
+    for gates, column_width in zip(columns, widths):
+        for gate in gates:
+            qubits = gate["qubits"]
+            if len(qubits) > 1 and gate["name"] in ("cx", "cz"):
+                parts.extend(_controlled(x, column_width, gate))
+            else:
+                parts.extend(_box(x, min(qubits), max(qubits), column_width, gate))
+        x += column_width + COLUMN_GAP
+
+    if title:
+        parts.append(f"<text x='8' y='{height - 8:.0f}' font-size='11' fill='#555' {FONT}>{escape(title)}</text>")
+    parts.append("</svg>")
+    return "\n".join(parts)
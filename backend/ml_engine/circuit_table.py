@@ -0,0 +1,91 @@
+import numpy as np
+
+# Structure, gate counts and depth of every ZZFeatureMap configuration the app offers, built
+# once at import without Qiskit. Every wire carries the same gates and parameter expressions
+# as ZZFeatureMap(...).decompose() (instructions are listed layer by layer), and depth is
+# counted the way QuantumCircuit.depth() does, so /circuit-interactive, /compare-circuits and
+# the SVG renderer never need to build a Qiskit circuit.
+N_QUBITS = 4
+MAX_REPS = 5
+ENTANGLEMENTS = ("linear", "reverse_linear", "circular", "full", "pairwise")
+# Qiskit prints pi to 15 significant digits in parameter expressions
+PI_TEXT = "3.14159265358979"
+
+def entangled_pairs(n_qubits, entanglement):
+    """(control, target) pairs in Qiskit's order; unlike model_artifact.feature_map_pairs, order matters here."""
+    linear = [(i, i + 1) for i in range(n_qubits - 1)]
+    if entanglement == "linear":
+        return linear
+    if entanglement == "reverse_linear":
+        return linear[::-1]
+    if entanglement == "pairwise":
+        return linear[::2] + linear[1::2]
+    if entanglement == "circular":
+        return ([(n_qubits - 1, 0)] if n_qubits > 2 else []) + linear
+    if entanglement == "full":
+        return [(i, j) for j in range(n_qubits) for i in range(j)]
+    raise ValueError(f"Unsupported entanglement: {entanglement}")
+
+def _depth(n_qubits, gates):
+    """Circuit depth as Qiskit counts it: longest chain of gates sharing a qubit."""
+    level = [0] * n_qubits
+    for gate in gates:
+        top = max(level[q] for q in gate["qubits"]) + 1
+        for q in gate["qubits"]:
+            level[q] = top
+    return max(level, default=0)
+
+def _build_entry(reps, entanglement, n_qubits=N_QUBITS):
+    pairs = entangled_pairs(n_qubits, entanglement)
+    gates = []
+    # Bound-angle recipe per gate: () for none, (q,) for 2*x_q, (i, j) for 2*(pi - x_i)*(pi - x_j)
+    angles = []
+    for _ in range(reps):
+        for q in range(n_qubits):
+            gates.append({"name": "h", "qubits": [q], "params": []})
+            gates.append({"name": "p", "qubits": [q], "params": [f"2.0*x[{q}]"]})
+            angles += [(), (q,)]
+        for control, target in pairs:
+            i, j = sorted((control, target))
+            gates.append({"name": "cx", "qubits": [control, target], "params": []})
+            gates.append({"name": "p", "qubits": [target],
+                          "params": [f"2.0*({PI_TEXT} - x[{i}])*({PI_TEXT} - x[{j}])"]})
+            gates.append({"name": "cx", "qubits": [control, target], "params": []})
+            angles += [(), (i, j), ()]
+
+    counts = {}
+    for gate in gates:
+        counts[gate["name"]] = counts.get(gate["name"], 0) + 1
+    return {
+        "n_qubits": n_qubits,
+        "gates": gates,
+        "depth": _depth(n_qubits, gates),
+        "gate_counts": counts,
+        "num_parameters": n_qubits,
+        "_angles": angles
+    }
+
+TABLE = {(reps, ent): _build_entry(reps, ent) for reps in range(1, MAX_REPS + 1) for ent in ENTANGLEMENTS}
+
+def lookup(reps, entanglement):
+    """Precomputed entry for (reps, entanglement), or None for configurations outside the table."""
+    try:
+        return TABLE.get((int(reps), entanglement))
+    except (TypeError, ValueError):
+        return None
+
+def public(entry):
+    """The JSON-facing part of an entry (shared, never mutate it)."""
+    return {key: value for key, value in entry.items() if not key.startswith("_")}
+
+def bind(entry, params):
+    """Copy of an entry's circuit with numeric angles for the given parameters (alpha = 2, as in Qiskit)."""
+    x = np.asarray(params, dtype=np.float64).ravel()[:entry["num_parameters"]]
+    gates = []
+    for gate, angle in zip(entry["gates"], entry["_angles"]):
+        if len(angle) == 1:
+            gate = {**gate, "params": [float(2.0 * x[angle[0]])]}
+        elif len(angle) == 2:
+            gate = {**gate, "params": [float(2.0 * (np.pi - x[angle[0]]) * (np.pi - x[angle[1]]))]}
+        gates.append(gate)
+    return {**public(entry), "gates": gates}
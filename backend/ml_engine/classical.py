@@ -1,92 +1,170 @@
+import os
 from sklearn.svm import SVC
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.calibration import CalibratedClassifierCV
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 import numpy as np
+from ml_engine.centroid_stats import get_centroids
 
 # Global model reference
 svm_pipeline = None
 rf_pipeline = None
+_loaded_mtime = None
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "classical_models.joblib")
 
 def init_models():
-    global svm_pipeline, rf_pipeline
-    if svm_pipeline is not None:
+    """Loads the persisted classical baselines (trained by /train), reloading when the file changes."""
+    global svm_pipeline, rf_pipeline, _loaded_mtime
+    try:
+        mtime = os.stat(MODEL_PATH).st_mtime_ns
+    except OSError:
+        return
+    if svm_pipeline is not None and mtime == _loaded_mtime:
         return
 
-    print("Initializing Classical Models...")
-    np.random.seed(42)
-    # 512 dimensions from ResNet
-    X_train = np.random.rand(50, 512) 
-    y_train = np.random.choice([0, 1], 50)
-    
-    # SVM
-    svm_pipeline = Pipeline([
+    import joblib
+    try:
+        bundle = joblib.load(MODEL_PATH)
+        svm_pipeline = bundle["svm"]
+        rf_pipeline = bundle["rf"]
+        _loaded_mtime = mtime
+        print(f"Classical Models Loaded ({bundle.get('n_samples', '?')} training samples).")
+    except Exception as e:
+        print(f"ERROR: Failed to load classical models: {e}")
+
+def train_models(X, y):
+    """Fits calibrated SVM and Random Forest baselines on the /train feature matrix and persists them."""
+    fitted = fit_models(X, y)
+    return fitted is not None and save_models(*fitted)
+
+def fit_models(X, y):
+    """Fits the baselines without writing anything; (svm, rf, n_samples, n_features), or None."""
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=int)
+    if np.bincount(y, minlength=2).min() == 0:
+        print("DEBUG: Classical baselines need both classes; skipping.")
+        return None
+    try:
+        svm, rf = fit_baselines(X, y)
+    except Exception as e:
+        print(f"ERROR during classical training: {e}")
+        return None
+    return svm, rf, int(len(X)), int(X.shape[1])
+
+def save_models(svm, rf, n_samples, n_features):
+    """Persists fitted baselines and serves them from this process."""
+    global svm_pipeline, rf_pipeline, _loaded_mtime
+    import joblib
+
+    try:
+        joblib.dump({"svm": svm, "rf": rf, "n_samples": n_samples, "n_features": n_features}, MODEL_PATH)
+    except Exception as e:
+        print(f"ERROR during classical training: {e}")
+        return False
+
+    svm_pipeline, rf_pipeline = svm, rf
+    _loaded_mtime = os.stat(MODEL_PATH).st_mtime_ns
+    print(f"DEBUG: Classical baselines trained on {n_samples} samples and saved.")
+    return True
+
+def fit_baselines(X, y):
+    """Fits the calibrated SVM and Random Forest pair (also used per fold by ml_engine.evaluation)."""
+    # Platt scaling via held-out folds; tiny datasets cannot spare folds, so use the raw margin
+    n_folds = min(5, int(np.bincount(y, minlength=2).min()))
+    svc = SVC(kernel="rbf", gamma="scale")
+    svm = Pipeline([
         ('scaler', StandardScaler()),
-        ('svc', SVC(probability=True))
+        ('svc', CalibratedClassifierCV(svc, method="sigmoid", cv=n_folds) if n_folds >= 2 else svc)
     ])
-    svm_pipeline.fit(X_train, y_train)
-    
-    # Random Forest
-    rf_pipeline = RandomForestClassifier(n_estimators=10)
-    rf_pipeline.fit(X_train, y_train)
-    
-    print("Classical Models Ready.")
+    rf = RandomForestClassifier(n_estimators=100, random_state=42)
+    svm.fit(X, y)
+    rf.fit(X, y)
+    return svm, rf
 
-def predict_classical(features):
+def _positive_proba(model, X):
+    try:
+        return model.predict_proba(X)[:, 1]
+    except AttributeError:
+        return 1.0 / (1.0 + np.exp(-model.decision_function(X)))
+
+def soft_vote(svm, rf, X):
+    """P(UC) from the soft vote of the calibrated SVM and the Random Forest."""
+    return (_positive_proba(svm, X) + rf.predict_proba(X)[:, 1]) / 2.0
+
+UC_LABEL = "Ulcerative Colitis (Positive)"
+HEALTHY_LABEL = "Healthy (Negative)"
+
+def predict_classical_matrix(X):
     """
-    Returns prediction using distance to centroids (if trained) or refined heuristic.
+    Vectorized classical stack for every row of X: trained baselines, else centroid
+    similarity, else the feature-variance heuristic.
+    Returns (is_uc bool array, confidence float array, details string).
     """
-    import os
-    import json
-    import numpy as np
-    
-    # Try loading trained centroids
-    centroid_path = os.path.join(os.path.dirname(__file__), "centroids.json")
-    if os.path.exists(centroid_path):
-        try:
-            with open(centroid_path, "r") as f:
-                centroids = json.load(f)
-            
-            if "healthy" in centroids and "uc" in centroids:
-                d_healthy = np.linalg.norm(features - np.array(centroids["healthy"]))
-                d_uc = np.linalg.norm(features - np.array(centroids["uc"]))
-                
-                # Sharpened Confidence: Boost certainty when distances are distinct
-                total_d = d_healthy + d_uc
-                if total_d > 0:
-                    # diff_ratio is 0 when distances are equal (uncertain), 1 when one is 0 (certain)
-                    diff_ratio = abs(d_healthy - d_uc) / total_d
-                    # Aggressive Sharpening: Power 0.3 makes even small differences 
-                    # result in much higher confidence (e.g. 0.2 diff -> ~80% confidence)
-                    conf = 0.5 + (diff_ratio ** 0.3) * 0.5
-                else:
-                    conf = 0.99
-                
-                if d_uc < d_healthy:
-                    result = "Ulcerative Colitis (Positive)"
-                else:
-                    result = "Healthy (Negative)"
-                
-                return {
-                    "prediction": result,
-                    "confidence": float(min(0.99, conf)),
-                    "details": "Centroid Similarity (Trained)"
-                }
-        except Exception as e:
-            print(f"DEBUG: Failed to use centroids: {e}")
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+
+    try:
+        init_models()
+        if svm_pipeline is not None and rf_pipeline is not None:
+            # Soft vote of the calibrated SVM and the Random Forest
+            p_uc = soft_vote(svm_pipeline, rf_pipeline, X)
+            is_uc = p_uc >= 0.5
+            return is_uc, np.where(is_uc, p_uc, 1.0 - p_uc), "Calibrated SVM + Random Forest (Trained)"
+    except Exception as e:
+        print(f"DEBUG: Failed to use classical baselines: {e}")
+
+    # Try the trained centroids (running per-class means)
+    try:
+        centroids = get_centroids()
+        if "healthy" in centroids and "uc" in centroids:
+            d_healthy = np.linalg.norm(X - centroids["healthy"], axis=1)
+            d_uc = np.linalg.norm(X - centroids["uc"], axis=1)
+
+            # Sharpened Confidence: diff_ratio is 0 when distances are equal (uncertain),
+            # 1 when one is 0 (certain); power 0.3 turns a 0.2 difference into ~80% confidence
+            total_d = d_healthy + d_uc
+            with np.errstate(divide="ignore", invalid="ignore"):
+                diff_ratio = np.abs(d_healthy - d_uc) / total_d
+            conf = np.where(total_d > 0, 0.5 + diff_ratio ** 0.3 * 0.5, 0.99)
+            return d_uc < d_healthy, np.minimum(0.99, conf), "Centroid Similarity (Trained)"
+    except Exception as e:
+        print(f"DEBUG: Failed to use centroids: {e}")
 
     # Fallback to refined heuristic
-    f_std = np.std(features)
     # Healthy std usually > 0.9 (varied pale patterns), UC < 0.9 (dense inflammation)
-    if f_std > 0.92:
-        result = "Healthy (Negative)"
-        conf = 0.91 + (np.random.uniform(-0.02, 0.05) if f_std > 0.95 else 0)
-    else:
-        result = "Ulcerative Colitis (Positive)"
-        conf = 0.82 + (np.random.uniform(-0.05, 0.05))
-        
+    f_std = np.std(X, axis=1)
+    is_uc = ~(f_std > 0.92)
+    rng = np.random.default_rng()
+    conf = np.where(
+        is_uc,
+        0.82 + rng.uniform(-0.05, 0.05, len(X)),
+        0.91 + np.where(f_std > 0.95, rng.uniform(-0.02, 0.05, len(X)), 0.0)
+    )
+    return is_uc, np.clip(conf, 0.5, 0.99), "Feature Variance Heuristic"
+
+def predict_classical_batch(X):
+    """
+    Soft-vote of the calibrated SVM and Random Forest for every row of X.
+    Returns a list of result dicts, or None when no trained baselines are available.
+    """
+    init_models()
+    if svm_pipeline is None or rf_pipeline is None:
+        return None
+
+    is_uc, conf, details = predict_classical_matrix(X)
+    return [
+        {"prediction": UC_LABEL if uc else HEALTHY_LABEL, "confidence": float(c), "details": details}
+        for uc, c in zip(is_uc, conf)
+    ]
+
+def predict_classical(features):
+    """
+    Returns prediction from the trained baselines, distance to centroids, or refined heuristic.
+    """
+    is_uc, conf, details = predict_classical_matrix(features)
     return {
-        "prediction": result,
-        "confidence": float(max(0.5, min(0.99, conf))),
-        "details": "Feature Variance Heuristic"
+        "prediction": UC_LABEL if is_uc[0] else HEALTHY_LABEL,
+        "confidence": float(conf[0]),
+        "details": details
     }
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from ml_engine.quantum import predict_quantum_matrix
+from ml_engine.classical import predict_classical_matrix
+
+# Clinical lab values enter the 512-wide model space with the same absolute scaling
+# and zero padding used at training time (training._clinical_features).
+FEATURE_WIDTH = 512
+CLINICAL_SCALE = 100.0
+# Rows padded to full width at a time (512 float64 columns x 4096 rows = 16MB)
+SCORE_BLOCK_ROWS = 4096
+
+class ClinicalDataError(ValueError):
+    pass
+
+def to_matrix(df, columns):
+    """Selected lab columns as one scaled float64 matrix (n_rows, len(columns))."""
+    try:
+        values = df[list(columns)].to_numpy(dtype=np.float64)
+    except (ValueError, TypeError) as e:
+        raise ClinicalDataError(f"Non-numeric values in clinical columns: {e}")
+    return values / CLINICAL_SCALE
+
+def place(X, offset=0, width=FEATURE_WIDTH):
+    """Zero-pads (or truncates) compact rows into the model's feature width, starting at `offset`."""
+    padded = np.zeros((len(X), width), dtype=np.float64)
+    n_cols = max(0, min(X.shape[1], width - offset))
+    padded[:, offset:offset + n_cols] = X[:, :n_cols]
+    return padded
+
+def score(X, offset=0, quantum=True, classical=True):
+    """
+    Scores compact clinical rows (placed at `offset` of the zero-padded feature vector)
+    with the quantum and/or classical stacks. Returns columnar results:
+    {"quantum_uc": bool[n], "classical_uc": bool[n], "classical_confidence": float[n]}.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    n = len(X)
+    out = {}
+    if quantum:
+        out["quantum_uc"] = np.zeros(n, dtype=bool)
+    if classical:
+        out["classical_uc"] = np.zeros(n, dtype=bool)
+        out["classical_confidence"] = np.zeros(n, dtype=np.float64)
+
+    for start in range(0, n, SCORE_BLOCK_ROWS):
+        block = place(X[start:start + SCORE_BLOCK_ROWS], offset)
+        stop = start + len(block)
+        if quantum:
+            out["quantum_uc"][start:stop] = predict_quantum_matrix(block)
+        if classical:
+            is_uc, conf, _ = predict_classical_matrix(block)
+            out["classical_uc"][start:stop] = is_uc
+            out["classical_confidence"][start:stop] = conf
+    return out
+
+def labels(is_uc):
+    """Prediction strings for a boolean UC column."""
+    return np.where(is_uc, "Ulcerative Colitis (Positive)", "Healthy (Negative)")
+
+def rows(columns):
+    """Columnar dict of arrays/lists -> list of row dicts with native Python values."""
+    names = list(columns)
+    values = [c.tolist() if isinstance(c, (np.ndarray, pd.Series)) else list(c) for c in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+def infer_dtypes(source, sample_rows=1000):
+    """
+    Explicit dtypes for a clinical CSV from a sample of its rows: numeric columns are read as
+    float64, everything else as str. Fixing them up front keeps every chunk's layout identical.
+    Returns (dtype mapping, numeric column names); the source is rewound.
+    """
+    source.seek(0)
+    sample = pd.read_csv(source, nrows=sample_rows)
+    source.seek(0)
+    numeric = list(sample.select_dtypes(include=[np.number]).columns)
+    return {c: ("float64" if c in numeric else str) for c in sample.columns}, numeric
+
+def read_chunks(source, chunk_rows, dtype=None, usecols=None):
+    """Iterator over fixed-size DataFrame chunks of a CSV file object (rewound first)."""
+    source.seek(0)
+    return iter(pd.read_csv(source, chunksize=chunk_rows, dtype=dtype, usecols=usecols))
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ml_engine import model_artifact
+
+# Cross-validated evaluation of a published model version, persisted next to it as
+# evaluation.json (tagged with the artifact version, so the next publish makes it stale).
+EVALUATION_NAME = "evaluation.json"
+CV_FOLDS = int(os.environ.get("EVALUATION_FOLDS", 5))
+# Folds run concurrently on threads sharing one kernel matrix (libsvm releases the GIL)
+EVALUATION_WORKERS = int(os.environ.get("EVALUATION_WORKERS", min(CV_FOLDS, os.cpu_count() or 1)))
+LEARNING_CURVE_FRACTIONS = (0.2, 0.4, 0.6, 0.8, 1.0)
+METRIC_NAMES = ("accuracy", "precision", "sensitivity", "specificity", "auc")
+
+_loaded = {"token": None, "evaluation": None}
+_load_lock = threading.Lock()
+
+def _path(artifact_dir=model_artifact.ARTIFACT_DIR):
+    return os.path.join(artifact_dir, EVALUATION_NAME)
+
+def shared_kernel(X, reps=2, entanglement="linear", alpha=2.0):
+    """
+    Fidelity kernel over all samples, computed once and sliced by every fold and learning-curve
+    step. Scaler and PCA are fitted on all samples so the quantum states do not depend on the
+    fold; both are unsupervised, so no label information leaks into the held-out folds.
+    """
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+
+    X = np.asarray(X, dtype=np.float64)
+    scaled = StandardScaler().fit_transform(X)
+    projected = PCA(n_components=min(len(X), 4)).fit_transform(scaled)
+    states = model_artifact.feature_map_states(projected, reps, entanglement, alpha)
+    return model_artifact.fidelity_kernel(states, states)
+
+def _fit_precomputed(K, y, train_idx):
+    from sklearn.svm import SVC
+    svc = SVC(kernel="precomputed")
+    svc.fit(K[np.ix_(train_idx, train_idx)], y[train_idx])
+    return svc
+
+def _quantum_fold(K, y, train_idx, test_idx, seed):
+    """Out-of-fold decision scores plus learning-curve points for one fold."""
+    svc = _fit_precomputed(K, y, train_idx)
+    scores = svc.decision_function(K[np.ix_(test_idx, train_idx)])
+
+    # Learning curve: nested subsets of the fold's training set, evaluated on its test set
+    order = np.random.RandomState(seed).permutation(train_idx)
+    curve = []
+    for fraction in LEARNING_CURVE_FRACTIONS:
+        subset = order[:max(2, int(round(fraction * len(order))))]
+        if len(np.unique(y[subset])) < 2:
+            curve.append(None)
+            continue
+        sub_svc = _fit_precomputed(K, y, subset)
+        train_acc = np.mean(sub_svc.predict(K[np.ix_(subset, subset)]) == y[subset])
+        val_acc = np.mean(sub_svc.predict(K[np.ix_(test_idx, subset)]) == y[test_idx])
+        curve.append((len(subset), float(train_acc), float(val_acc)))
+    return scores, curve
+
+def _classical_fold(X, y, train_idx, test_idx):
+    from ml_engine.classical import fit_baselines, soft_vote
+    svm, rf = fit_baselines(X[train_idx], y[train_idx])
+    # Centered like a decision function: > 0 means UC
+    return soft_vote(svm, rf, X[test_idx]) - 0.5
+
+def _binary_summary(y_true, scores):
+    """Confusion matrix, ROC and headline metrics of decision scores thresholded at 0."""
+    from sklearn.metrics import confusion_matrix, roc_curve, roc_auc_score
+
+    y_pred = (scores > 0).astype(int)
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
+    summary = {
+        "accuracy": (tp + tn) / max(1, len(y_true)),
+        "precision": tp / (tp + fp) if tp + fp else 0.0,
+        "sensitivity": tp / (tp + fn) if tp + fn else 0.0,
+        "specificity": tn / (tn + fp) if tn + fp else 0.0,
+        "auc": None,
+        "confusion_matrix": [[int(tn), int(fp)], [int(fn), int(tp)]],
+        "roc": {"fpr": [], "tpr": [], "auc": None}
+    }
+    if len(np.unique(y_true)) == 2:
+        fpr, tpr, _ = roc_curve(y_true, scores)
+        summary["auc"] = float(roc_auc_score(y_true, scores))
+        summary["roc"] = {"fpr": fpr.tolist(), "tpr": tpr.tolist(), "auc": summary["auc"]}
+    return {k: (float(v) if isinstance(v, (np.floating, np.integer)) else v) for k, v in summary.items()}
+
+def _model_report(y, folds, oof_scores):
+    pooled = _binary_summary(y, oof_scores)
+    per_fold = [_binary_summary(y[test_idx], oof_scores[test_idx]) for _, test_idx in folds]
+    metrics = {}
+    for name in METRIC_NAMES:
+        values = [f[name] for f in per_fold if f[name] is not None]
+        metrics[name] = {
+            "pooled": pooled[name],
+            "mean": float(np.mean(values)) if values else None,
+            "std": float(np.std(values)) if values else None
+        }
+    return {
+        "metrics": metrics,
+        "confusion_matrix": pooled["confusion_matrix"],
+        "roc": pooled["roc"],
+        "folds": [{name: f[name] for name in METRIC_NAMES} for f in per_fold]
+    }
+
+def cross_validate(X, y, reps=2, entanglement="linear", k=CV_FOLDS, workers=EVALUATION_WORKERS):
+    """
+    Stratified k-fold evaluation of the QSVC (on one shared fidelity kernel) and of the classical
+    baselines, with folds run in parallel. Returns the evaluation dict, or None when the
+    smaller class has fewer than two samples.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=int)
+    k = min(k, int(np.bincount(y, minlength=2).min()))
+    if k < 2:
+        return None
+
+    started = time.time()
+    folds = list(StratifiedKFold(n_splits=k, shuffle=True, random_state=42).split(X, y))
+    K = shared_kernel(X, reps, entanglement)
+    kernel_seconds = time.time() - started
+
+    q_scores = np.zeros(len(y))
+    c_scores = np.zeros(len(y))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        q_jobs = [pool.submit(_quantum_fold, K, y, tr, te, i) for i, (tr, te) in enumerate(folds)]
+        c_jobs = [pool.submit(_classical_fold, X, y, tr, te) for tr, te in folds]
+        curves = []
+        for (_, te), q_job, c_job in zip(folds, q_jobs, c_jobs):
+            q_scores[te], curve = q_job.result()
+            c_scores[te] = c_job.result()
+            curves.append(curve)
+
+    # Average each learning-curve step over the folds where both classes were present
+    learning_curve = {"train_sizes": [], "train_accuracy": [], "validation_accuracy": []}
+    for step in zip(*curves):
+        points = [p for p in step if p is not None]
+        if points:
+            learning_curve["train_sizes"].append(int(round(np.mean([p[0] for p in points]))))
+            learning_curve["train_accuracy"].append(float(np.mean([p[1] for p in points])))
+            learning_curve["validation_accuracy"].append(float(np.mean([p[2] for p in points])))
+
+    return {
+        "k": k,
+        "n_samples": int(len(y)),
+        "n_positive": int(y.sum()),
+        "reps": int(reps),
+        "entanglement": entanglement,
+        "quantum": _model_report(y, folds, q_scores),
+        "classical": _model_report(y, folds, c_scores),
+        "learning_curve": learning_curve,
+        "timing": {"kernel_seconds": round(kernel_seconds, 3), "total_seconds": round(time.time() - started, 3)},
+        "created_at": time.time()
+    }
+
+def evaluate_and_save(X, y, reps=2, entanglement="linear", artifact_dir=model_artifact.ARTIFACT_DIR):
+    """Runs cross_validate for the just-published model version and persists the result with it."""
+    evaluation = cross_validate(X, y, reps, entanglement)
+    if evaluation is None:
+        return None
+    evaluation["model_version"] = model_artifact.artifact_version(artifact_dir)
+    path = _path(artifact_dir)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(evaluation, f)
+    os.replace(tmp_path, path)
+    return evaluation
+
+def _token(artifact_dir):
+    try:
+        mtime = os.stat(_path(artifact_dir)).st_mtime_ns
+    except OSError:
+        mtime = None
+    return model_artifact.artifact_version(artifact_dir), mtime
+
+def load(artifact_dir=model_artifact.ARTIFACT_DIR):
+    """Evaluation of the published model version (read once per file change), or None if there is none."""
+    token = _token(artifact_dir)
+    if token == _loaded["token"]:
+        return _loaded["evaluation"]
+    version = token[0]
+    with _load_lock:
+        evaluation = None
+        try:
+            with open(_path(artifact_dir), "r") as f:
+                evaluation = json.load(f)
+            if evaluation.get("model_version") != version:
+                evaluation = None
+        except (OSError, ValueError):
+            pass
+        _loaded["token"], _loaded["evaluation"] = token, evaluation
+    return evaluation
+
+DISPLAY_METRICS = ("accuracy", "precision", "sensitivity", "specificity")
+NOT_EVALUATED = "N/A"
+
+def display_metrics(evaluation):
+    """Per-prediction metric blocks ({"quantum": {...}, "classical": {...}}) as percentage strings."""
+    def block(report):
+        return {name: f"{report['metrics'][name]['pooled'] * 100:.1f}%" for name in DISPLAY_METRICS}
+    return {"quantum": block(evaluation["quantum"]), "classical": block(evaluation["classical"]), "evaluated": True}
+
+def metric_value(display):
+    """Numeric percentage of a display metric ("96.5%" -> 96.5), or None when not evaluated."""
+    if display == NOT_EVALUATED:
+        return None
+    return float(str(display).rstrip("%"))
+
+def not_evaluated_metrics():
+    """Metric blocks for a model version without an evaluation: every value NOT_EVALUATED."""
+    return {
+        "quantum": {name: NOT_EVALUATED for name in DISPLAY_METRICS},
+        "classical": {name: NOT_EVALUATED for name in DISPLAY_METRICS},
+        "evaluated": False
+    }
@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import shutil
+import numpy as np
+
+# Versioned, library-independent QSVC artifact: a directory of raw .npy arrays plus a
+# manifest.json. Arrays are memory-mapped on load, so no Qiskit/sklearn classes are unpickled.
+ARTIFACT_DIR = os.path.join(os.path.dirname(__file__), "quantum_model")
+FORMAT_NAME = "uc-qsvc-native"
+FORMAT_VERSION = 1
+CONFIG_NAME = "config.json"
+# Each publish writes its arrays to quantum_model/<VERSION_PREFIX>.../ and points manifest.json at it
+VERSION_PREFIX = "v-"
+ARRAY_NAMES = ("scaler_mean", "scaler_scale", "pca_mean", "pca_components",
+               "support_vectors", "dual_coef", "intercept", "classes")
+
+def feature_map_pairs(n_qubits, entanglement):
+    """Entangled qubit pairs of a ZZFeatureMap (order is irrelevant: the ZZ layer is diagonal)."""
+    linear = [(i, i + 1) for i in range(n_qubits - 1)]
+    if entanglement in ("linear", "reverse_linear", "pairwise"):
+        return linear
+    if entanglement == "circular":
+        return linear + ([(n_qubits - 1, 0)] if n_qubits > 2 else [])
+    if entanglement == "full":
+        return [(i, j) for i in range(n_qubits) for j in range(i + 1, n_qubits)]
+    raise ValueError(f"Unsupported entanglement for native kernel: {entanglement}")
+
+def feature_map_states(X, reps=2, entanglement="linear", alpha=2.0):
+    """
+    Statevectors of ZZFeatureMap(X) for every row of X, shape (n_samples, 2**n_qubits).
+    Each repetition is H on all qubits followed by a diagonal phase layer:
+    P(alpha * x_i) per qubit and CX-P(alpha * (pi - x_i)(pi - x_j))-CX per pair.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    n_samples, n_qubits = X.shape
+    dim = 2 ** n_qubits
+
+    # bits[b, q] is the value of qubit q in basis state b (Qiskit little-endian order)
+    bits = (np.arange(dim)[:, None] >> np.arange(n_qubits)) & 1
+    phase = alpha * (X @ bits.T)
+    for i, j in feature_map_pairs(n_qubits, entanglement):
+        parity = bits[:, i] ^ bits[:, j]
+        phase += alpha * np.outer((np.pi - X[:, i]) * (np.pi - X[:, j]), parity)
+    diag = np.exp(1j * phase)
+
+    hadamard = np.array([[1.0, 1.0], [1.0, -1.0]]) / np.sqrt(2)
+    h_all = np.array([[1.0]])
+    for _ in range(n_qubits):
+        h_all = np.kron(h_all, hadamard)
+
+    states = np.zeros((n_samples, dim), dtype=np.complex128)
+    states[:, 0] = 1.0
+    for _ in range(reps):
+        states = diag * (states @ h_all)
+    return states
+
+def fidelity_kernel(states_a, states_b):
+    """Fidelity kernel |<a|b>|^2 between two sets of statevectors."""
+    return np.abs(states_a.conj() @ states_b.T) ** 2
+
+class _Step:
+    """Minimal transform step so callers using pipeline.named_steps keep working."""
+    def __init__(self, fn):
+        self.transform = fn
+
+class NativeQSVC:
+    """Inference-only Scaler -> PCA -> QSVC pipeline backed by plain NumPy arrays."""
+
+    def __init__(self, manifest, arrays):
+        self.manifest = manifest
+        self.config = manifest["feature_map"]
+        self.scaler_mean = arrays["scaler_mean"]
+        self.scaler_scale = arrays["scaler_scale"]
+        self.pca_mean = arrays["pca_mean"]
+        self.pca_components = arrays["pca_components"]
+        self.dual_coef = arrays["dual_coef"]
+        self.intercept = float(arrays["intercept"][0])
+        self.classes_ = np.asarray(arrays["classes"])
+        self.support_states = feature_map_states(
+            arrays["support_vectors"], self.config["reps"], self.config["entanglement"], self.config["alpha"]
+        )
+        self.named_steps = {"scaler": _Step(self.scale), "pca": _Step(self.project)}
+
+    def scale(self, X):
+        return (np.atleast_2d(X) - self.scaler_mean) / self.scaler_scale
+
+    def project(self, X):
+        return (np.atleast_2d(X) - self.pca_mean) @ self.pca_components.T
+
+    def transform(self, X):
+        return self.project(self.scale(X))
+
+    def decision_function(self, X):
+        states = feature_map_states(self.transform(X), self.config["reps"], self.config["entanglement"], self.config["alpha"])
+        return fidelity_kernel(states, self.support_states) @ self.dual_coef + self.intercept
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+def export_pipeline(pipeline, reps, entanglement, path=ARTIFACT_DIR, metadata=None, config=None):
+    """
+    Writes a fitted sklearn Scaler/PCA/QSVC pipeline as a native artifact directory. config (the
+    serving config: reps, entanglement, is_fitted, accuracy) is published with the same manifest.
+    """
+    scaler = pipeline.named_steps["scaler"]
+    pca = pipeline.named_steps["pca"]
+    qsvc = pipeline.named_steps["qsvc"]
+    if getattr(pca, "whiten", False):
+        raise ValueError("Whitened PCA is not supported by the native artifact format")
+
+    # QSVC uses a callable kernel, so sklearn keeps the (PCA-space) training matrix instead of support_vectors_
+    fit_X = getattr(qsvc, "_BaseLibSVM__Xfit", None)
+    support_vectors = fit_X[qsvc.support_] if fit_X is not None and len(qsvc.support_vectors_) == 0 else qsvc.support_vectors_
+    feature_map = qsvc.quantum_kernel.feature_map
+
+    arrays = {
+        "scaler_mean": scaler.mean_ if scaler.mean_ is not None else np.zeros(scaler.n_features_in_),
+        "scaler_scale": scaler.scale_ if scaler.scale_ is not None else np.ones(scaler.n_features_in_),
+        "pca_mean": pca.mean_,
+        "pca_components": pca.components_,
+        "support_vectors": support_vectors,
+        "dual_coef": qsvc.dual_coef_[0],
+        "intercept": qsvc.intercept_,
+        "classes": qsvc.classes_
+    }
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "feature_map": {
+            "type": "ZZFeatureMap",
+            "n_qubits": int(feature_map.num_qubits),
+            "reps": int(reps),
+            "entanglement": entanglement,
+            "alpha": float(getattr(feature_map, "alpha", 2.0))
+        },
+        "n_features": int(scaler.n_features_in_),
+        "n_support": int(len(support_vectors)),
+        "metadata": metadata or {}
+    }
+
+    # Arrays and config go into a fresh version directory; replacing manifest.json (one file,
+    # os.replace) publishes it, so readers see either the old or the new artifact, never neither
+    os.makedirs(path, exist_ok=True)
+    previous = _arrays_dir(path)
+    version_dir = f"{VERSION_PREFIX}{time.time_ns():x}-{os.getpid()}"
+    manifest["arrays"] = version_dir
+    target = os.path.join(path, version_dir)
+    os.makedirs(target)
+    for name, arr in arrays.items():
+        np.save(os.path.join(target, f"{name}.npy"), np.ascontiguousarray(arr, dtype=np.float64))
+    if config is not None:
+        with open(os.path.join(target, CONFIG_NAME), "w") as f:
+            json.dump(config, f)
+
+    tmp_manifest = os.path.join(path, f"manifest.json.tmp-{os.getpid()}")
+    with open(tmp_manifest, "w") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(tmp_manifest, os.path.join(path, "manifest.json"))
+    _prune(path, keep={target, previous})
+    return manifest
+
+def _arrays_dir(path=ARTIFACT_DIR):
+    """Directory holding the arrays of the published manifest (path itself for pre-versioned artifacts)."""
+    try:
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            arrays = json.load(f).get("arrays")
+    except (OSError, ValueError):
+        return path
+    return os.path.join(path, arrays) if arrays else path
+
+def _prune(path, keep):
+    """Drops superseded versions; the previous one stays for readers that loaded its manifest already."""
+    for entry in os.listdir(path):
+        if entry.startswith(VERSION_PREFIX) and os.path.join(path, entry) not in keep:
+            shutil.rmtree(os.path.join(path, entry), ignore_errors=True)
+    if path not in keep:
+        for filename in [f"{name}.npy" for name in ARRAY_NAMES] + [CONFIG_NAME]:
+            try:
+                os.remove(os.path.join(path, filename))
+            except OSError:
+                pass
+
+def load_config(path=ARTIFACT_DIR):
+    """Serving config published with the artifact, or None (artifacts exported before it was bundled)."""
+    try:
+        with open(os.path.join(_arrays_dir(path), CONFIG_NAME), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def artifact_exists(path=ARTIFACT_DIR):
+    return os.path.exists(os.path.join(path, "manifest.json"))
+
+def artifact_version(path=ARTIFACT_DIR):
+    """Cheap change token for the published artifact (manifest mtime), or None if absent."""
+    try:
+        return os.stat(os.path.join(path, "manifest.json")).st_mtime_ns
+    except OSError:
+        return None
+
+def load_artifact(path=ARTIFACT_DIR):
+    """Memory-maps a native artifact directory and returns a NativeQSVC."""
+    for attempt in range(3):
+        with open(os.path.join(path, "manifest.json"), "r") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"Unknown model artifact format: {manifest.get('format')}")
+        if manifest.get("version", 0) > FORMAT_VERSION:
+            raise ValueError(f"Model artifact version {manifest.get('version')} is newer than supported ({FORMAT_VERSION})")
+
+        arrays_dir = os.path.join(path, manifest["arrays"]) if manifest.get("arrays") else path
+        try:
+            arrays = {name: np.load(os.path.join(arrays_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES}
+        except FileNotFoundError:
+            # Pruned by newer publishes between reading the manifest and mapping the arrays
+            if attempt == 2:
+                raise
+            continue
+        return NativeQSVC(manifest, arrays)
@@ -0,0 +1,26 @@
+import os
+from ml_engine import model_artifact, centroid_stats, classical
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "model_config.json")
+EVALUATION_PATH = os.path.join(model_artifact.ARTIFACT_DIR, "evaluation.json")
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+def current():
+    """
+    Change token for everything a prediction depends on: the published QSVC artifact, its
+    config and cross-validated evaluation, the classical baselines and the centroid statistics
+    (hex of their mtimes, "0" when absent). Cheap enough (a few stat calls) to compute per request.
+    """
+    parts = [
+        model_artifact.artifact_version() or 0,
+        _mtime(CONFIG_PATH),
+        _mtime(EVALUATION_PATH),
+        _mtime(classical.MODEL_PATH),
+        _mtime(centroid_stats.STATS_PATH),
+    ]
+    return "-".join(format(p, "x") for p in parts)
@@ -1,3 +1,4 @@
+import os
 import torch
 import torch.nn as nn
 import torchvision.models as models
@@ -5,6 +6,11 @@ import torchvision.transforms as transforms
 from PIL import Image
 import io
 import numpy as np
+from ml_engine.timing import stage
+
+# Intra-op threads per process; gunicorn_conf.py splits the cores between API workers
+if os.environ.get("TORCH_NUM_THREADS"):
+    torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
 
 # Load pre-trained ResNet18
 # We rely on internet access to download weights being allowed? Usually yes for tool use, but wait.
@@ -26,6 +32,10 @@ def is_medical_image(image_bytes):
     Heuristic to check if an image is likely a colonoscopy or medical image.
     Improved to handle photos of monitors with black bezels/borders.
     """
+    with stage("is_medical_image"):
+        return _is_medical_image(image_bytes)
+
+def _is_medical_image(image_bytes):
     try:
         image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
         img_np = np.array(image)
@@ -92,11 +102,35 @@ def extract_features(image_bytes):
     Returns a numpy array of shape (512,)
     """
     try:
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        tensor = preprocess(image).unsqueeze(0)
-        with torch.no_grad():
+        with stage("decode"):
+            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+            tensor = preprocess(image).unsqueeze(0)
+        with stage("resnet"), torch.no_grad():
             features = resnet(tensor)
         return features.numpy().flatten()
     except Exception as e:
         print(f"Error in feature extraction: {e}")
         raise e
+
+def extract_features_batch(images):
+    """
+    ResNet18 features for several encoded images in a single forward pass.
+    Returns (features of shape (n, 512), errors) where errors[i] is None, or the decode
+    error of image i, whose feature row is then left at zero.
+    """
+    tensors, ok, errors = [], [], [None] * len(images)
+    with stage("decode"):
+        for i, image_bytes in enumerate(images):
+            try:
+                image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+                tensors.append(preprocess(image))
+                ok.append(i)
+            except Exception as e:
+                print(f"Error decoding batch image {i}: {e}")
+                errors[i] = str(e)
+
+    features = np.zeros((len(images), 512), dtype=np.float32)
+    if tensors:
+        with stage("resnet"), torch.no_grad():
+            features[ok] = resnet(torch.stack(tensors)).numpy()
+    return features, errors
@@ -1,16 +1,24 @@
-from qiskit.circuit.library import ZZFeatureMap
-from qiskit_machine_learning.kernels import FidelityQuantumKernel
-from qiskit_machine_learning.algorithms import QSVC
-from sklearn.decomposition import PCA
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
 import numpy as np
+from ml_engine.centroid_stats import get_centroids
+from ml_engine import model_artifact
+from ml_engine.timing import stage
 
 # Global model reference
 pipeline = None
+_loaded_version = None
+
+# Built-in model configurations listed by /models (their diagrams are prewarmed at build time)
+MODEL_PRESETS = [
+    {"id": "v1_linear", "name": "Production (ZZ Linear)", "params": {"reps": 2, "entanglement": "linear"}},
+    {"id": "v2_circular", "name": "Experimental (ZZ Circular)", "params": {"reps": 3, "entanglement": "circular"}}
+]
 
 def get_config():
+    """Serving config of the published model: bundled with the artifact, else the legacy model_config.json."""
     import os, json
+    config = model_artifact.load_config()
+    if config is not None:
+        return config
     config_path = os.path.join(os.path.dirname(__file__), "model_config.json")
     if os.path.exists(config_path):
         try:
@@ -21,93 +29,63 @@ def get_config():
     return {"reps": 2, "entanglement": "linear"}
 
 def init_model():
-    global pipeline
-    if pipeline is not None:
+    """Loads the published QSVC artifact; a no-op unless a newer one appeared (e.g. from another worker)."""
+    global pipeline, _loaded_version
+    version = model_artifact.artifact_version()
+    if pipeline is not None and (version is None or version == _loaded_version):
         return
 
-    import os, joblib
-    model_path = os.path.join(os.path.dirname(__file__), "quantum_model.joblib")
+    import os
     config = get_config()
+    if not config.get("is_fitted", False):
+        # Not fitted yet: the QSVC stage stays disabled until /train publishes a model
+        return
+
+    if model_artifact.artifact_exists():
+        try:
+            pipeline = model_artifact.load_artifact()
+            _loaded_version = version
+            print("QSVC Model Loaded Successfully (native artifact).")
+            return
+        except Exception as e:
+            print(f"ERROR: Failed to load native model artifact: {e}")
 
-    if os.path.exists(model_path) and config.get("is_fitted", False):
+    # One-time migration of the legacy pickled pipeline to the native artifact format
+    legacy_path = os.path.join(os.path.dirname(__file__), "quantum_model.joblib")
+    if os.path.exists(legacy_path):
         try:
-            print("Loading persisted Quantum Model from disk...")
+            print("Migrating legacy Quantum Model (joblib) to native artifact...")
+            import sys, joblib
             
             # Module Aliasing for Qiskit 1.x compatibility (Fixes unpickling errors)
-            import sys
             import qiskit.circuit
             import qiskit.circuit.library
             sys.modules['qiskit.circuit.quantumregister'] = qiskit.circuit
             sys.modules['qiskit.circuit.library.data_preparation.zz_feature_map'] = qiskit.circuit.library
             
-            pipeline = joblib.load(model_path)
-            print("QSVC Model Loaded Successfully.")
-            return
+            legacy = joblib.load(legacy_path)
+            model_artifact.export_pipeline(
+                legacy, config.get("reps", 2), config.get("entanglement", "linear"),
+                metadata={"accuracy": config.get("accuracy"), "source": "joblib_migration"},
+                config=config
+            )
+            pipeline = model_artifact.load_artifact()
+            _loaded_version = model_artifact.artifact_version()
+            print("QSVC Model Loaded Successfully (migrated).")
         except Exception as e:
-            print(f"ERROR: Failed to load persistsed model: {e}")
-
-    print("Initializing Default/Synthetic Quantum Model...")
-    reps = config.get("reps", 2)
-    entanglement = config.get("entanglement", "linear")
-    
-    # Synthetic fallback data
-    np.random.seed(42)
-    X_train = np.random.rand(10, 512) 
-    y_train = np.random.choice([0, 1], 10)
-    
-    n_feat = 4 # Default for synthetic
-    pca = PCA(n_components=n_feat)
-    feature_map = ZZFeatureMap(feature_dimension=n_feat, reps=reps, entanglement=entanglement)
-    kernel = FidelityQuantumKernel(feature_map=feature_map)
-    
-    qsvc = QSVC(quantum_kernel=kernel)
-    pipeline = Pipeline([
-        ('scaler', StandardScaler()),
-        ('pca', pca),
-        ('qsvc', qsvc)
-    ])
-    
-    pipeline.fit(X_train, y_train)
-    print("Default QSVC Model Ready.")
+            print(f"ERROR: Failed to migrate legacy model: {e}")
 
 def generate_circuit_helper(reps=2, entanglement='linear', params=None):
-    """Generates a base64 encoded circuit image for specific parameters."""
-    import io
+    """Generates a base64 encoded circuit image for specific parameters (rendered once, then cached)."""
     import base64
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-    from qiskit.circuit.library import ZZFeatureMap
-    
-    feature_map = ZZFeatureMap(feature_dimension=4, reps=reps, entanglement=entanglement)
-    circuit_to_draw = feature_map
-    
-    if params is not None:
-        try:
-            # params should be 4-dim
-            circuit_to_draw = feature_map.bind_parameters(params)
-        except Exception as e:
-            print(f"DEBUG: Failed to bind params in helper: {e}")
+    from ml_engine import circuit_cache
 
-    try:
-        fig = circuit_to_draw.decompose().draw(output='mpl', fold=-1)
-        buf = io.BytesIO()
-        fig.savefig(buf, format='png', bbox_inches='tight', dpi=120)
-        buf.seek(0)
-        img_str = base64.b64encode(buf.read()).decode('utf-8')
-        plt.close(fig)
-        return img_str
-    except Exception as e:
-        print(f"ERROR: Failed to draw in helper: {e}")
-        return None
+    png = circuit_cache.get_png(reps, entanglement, params)
+    return base64.b64encode(png).decode('utf-8') if png is not None else None
 
-def get_circuit_diagram(features=None):
-    """
-    Returns a base64 encoded image of the quantum circuit.
-    If features provided, returns the circuit with parameters bound.
-    """
-    if pipeline is None:
-        init_model()
+def _circuit_config(features=None):
+    """(reps, entanglement, bound parameters or None) of the served model's circuit for an input."""
+    init_model()
     
     config = get_config()
     reps = config.get("reps", 2)
@@ -118,6 +96,10 @@ def get_circuit_diagram(features=None):
         try:
             if len(features.shape) == 1:
                 features = features.reshape(1, -1)
+            # Clinical vectors may arrive unpadded (e.g. /predict-csv results)
+            width = pipeline.manifest.get("n_features", features.shape[1])
+            if features.shape[1] < width:
+                features = np.pad(features, ((0, 0), (0, width - features.shape[1])))
             
             scaled = pipeline.named_steps['scaler'].transform(features)
             pca_params = pipeline.named_steps['pca'].transform(scaled)[0]
@@ -127,17 +109,50 @@ def get_circuit_diagram(features=None):
         except Exception as e:
             print(f"DEBUG: Failed to prepare features: {e}")
 
-    return generate_circuit_helper(reps, entanglement, params)
+    return reps, entanglement, params
+
+def get_circuit_diagram(features=None):
+    """
+    Returns a base64 encoded image of the quantum circuit.
+    If features provided, returns the circuit with parameters bound.
+    """
+    return generate_circuit_helper(*_circuit_config(features))
+
+def get_circuit_image(features=None):
+    """(circuit cache key, PNG bytes or None) of the served model's circuit; the key addresses /images/circuits/."""
+    from ml_engine import circuit_cache
+    
+    reps, entanglement, params = _circuit_config(features)
+    key = circuit_cache.cache_key(reps, entanglement, circuit_cache.N_QUBITS, params)
+    return key, circuit_cache.get_png(reps, entanglement, params)
+
+def get_circuit_svg(features=None):
+    """SVG drawing of the quantum circuit (no matplotlib); parameters bound when features are given."""
+    from ml_engine.circuit_svg import render_svg
+    
+    reps, entanglement, params = _circuit_config(features)
+    title = f"ZZFeatureMap reps={reps} entanglement={entanglement}" + (" (bound)" if params is not None else "")
+    return render_svg(get_circuit_obj(reps, entanglement, params), title=title)
 
-def get_circuit_obj(reps=2, entanglement='linear'):
+def get_circuit_obj(reps=2, entanglement='linear', params=None):
     """
     Returns the circuit structure as a JSON-serializable object.
-    Used for the interactive frontend visualizer.
+    Used for the interactive frontend visualizer and the SVG renderer;
+    with params (4 values) the gate angles are bound numbers instead of expressions.
+    Supported configurations come from the precomputed circuit table; Qiskit builds the rest.
     """
+    from ml_engine import circuit_table
+
+    entry = circuit_table.lookup(reps, entanglement)
+    if entry is not None:
+        return circuit_table.bind(entry, params) if params is not None else circuit_table.public(entry)
+
     from qiskit.circuit.library import ZZFeatureMap
     
     # Create the feature map circuit
     qc = ZZFeatureMap(feature_dimension=4, reps=reps, entanglement=entanglement)
+    if params is not None:
+        qc = qc.assign_parameters(np.asarray(params, dtype=np.float64)[:qc.num_parameters])
     qc = qc.decompose() # Decompose to get basic gates (H, CX, RZ, etc.)
 
     gates = []
@@ -170,8 +185,23 @@ def get_circuit_obj(reps=2, entanglement='linear'):
 
 def retrain_model(X, y, reps=2, entanglement='linear'):
     """Fits the entire quantum pipeline on provided features and labels."""
-    global pipeline
-    import os, json
+    try:
+        fitted, accuracy_str = fit_pipeline(X, y, reps, entanglement)
+        publish_pipeline(fitted, reps, entanglement, accuracy_str, n_samples=len(X))
+        evaluate_published(X, y, reps, entanglement)
+        return True
+    except Exception as e:
+        print(f"ERROR during retraining: {e}")
+        return False
+
+def fit_pipeline(X, y, reps=2, entanglement='linear'):
+    """Fits the Scaler/PCA/QSVC pipeline (nothing is written); returns (pipeline, validation accuracy string)."""
+    from qiskit.circuit.library import ZZFeatureMap
+    from qiskit_machine_learning.kernels import FidelityQuantumKernel
+    from qiskit_machine_learning.algorithms import QSVC
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import Pipeline
     
     X = np.array(X)
     y = np.array(y)
@@ -189,7 +219,7 @@ def retrain_model(X, y, reps=2, entanglement='linear'):
     kernel = FidelityQuantumKernel(feature_map=feature_map)
     
     qsvc = QSVC(quantum_kernel=kernel)
-    pipeline = Pipeline([
+    fitted = Pipeline([
         ('scaler', StandardScaler()),
         ('pca', pca),
         ('qsvc', qsvc)
@@ -198,39 +228,54 @@ def retrain_model(X, y, reps=2, entanglement='linear'):
     # Fit the pipeline with validation
     from sklearn.model_selection import train_test_split
     from sklearn.metrics import accuracy_score
-    import joblib
     
+    if len(X) > 3:
+        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+        fitted.fit(X_train, y_train)
+        val_pred = fitted.predict(X_val)
+        acc = accuracy_score(y_val, val_pred)
+        accuracy_str = f"{acc*100:.1f}%"
+    else:
+        fitted.fit(X, y)
+        accuracy_str = "96.5% (Small Sample)"
+
+    print(f"DEBUG: Pipeline successfully fitted on real data. Accuracy: {accuracy_str}")
+    return fitted, accuracy_str
+
+def publish_pipeline(fitted, reps, entanglement, accuracy_str, n_samples):
+    """Exports a fitted pipeline as the served artifact (one atomic manifest replace) and loads it."""
+    global pipeline, _loaded_version
+    
+    # PERSIST TO DISK (native artifact, served without Qiskit); the config with REAL metrics
+    # is part of the same atomic publish, so the new model is never served with the old config
+    model_artifact.export_pipeline(
+        fitted, reps, entanglement,
+        metadata={"accuracy": accuracy_str, "n_samples": int(n_samples)},
+        config={
+            "reps": reps, 
+            "entanglement": entanglement, 
+            "is_fitted": True,
+            "accuracy": accuracy_str
+        }
+    )
+    pipeline = model_artifact.load_artifact()
+    _loaded_version = model_artifact.artifact_version()
+
+def evaluate_published(X, y, reps=2, entanglement='linear'):
+    """
+    Cross-validated metrics and analytics for the just-published version are computed once here;
+    serving endpoints only read them (analytics is then updated incrementally).
+    """
     try:
-        if len(X) > 3:
-            X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
-            pipeline.fit(X_train, y_train)
-            val_pred = pipeline.predict(X_val)
-            acc = accuracy_score(y_val, val_pred)
-            accuracy_str = f"{acc*100:.1f}%"
-        else:
-            pipeline.fit(X, y)
-            accuracy_str = "96.5% (Small Sample)"
-
-        print(f"DEBUG: Pipeline successfully fitted on real data. Accuracy: {accuracy_str}")
-        
-        # PERSIST TO DISK
-        model_path = os.path.join(os.path.dirname(__file__), "quantum_model.joblib")
-        joblib.dump(pipeline, model_path)
-        
-        # Save model configuration with REAL metrics
-        config_path = os.path.join(os.path.dirname(__file__), "model_config.json")
-        with open(config_path, "w") as f:
-            json.dump({
-                "reps": reps, 
-                "entanglement": entanglement, 
-                "is_fitted": True,
-                "accuracy": accuracy_str
-            }, f)
-            
-        return True
+        from ml_engine import evaluation
+        evaluation.evaluate_and_save(np.array(X), np.array(y), reps, entanglement)
     except Exception as e:
-        print(f"ERROR during retraining: {e}")
-        return False
+        print(f"WARNING: Cross-validated evaluation failed: {e}")
+    try:
+        from ml_engine import analytics
+        analytics.publish(pipeline)
+    except Exception as e:
+        print(f"WARNING: Analytics snapshot not computed at publish: {e}")
 
 def calculate_visual_metrics(image_bytes):
     """Analyzes raw pixels for diagnostic markers (Redness, Texture)."""
@@ -264,12 +309,9 @@ def predict_quantum(features, image_bytes=None):
     3. Learned Centroids (High-Confidence Fallback)
     4. Fitted QML Pipeline (Deep Pattern Recognition)
     """
-    import os
-    import json
     import numpy as np
     
-    if pipeline is None:
-        init_model()
+    init_model()
     
     if len(features.shape) == 1:
         features = features.reshape(1, -1)
@@ -289,7 +331,8 @@ def predict_quantum(features, image_bytes=None):
 
     # 2. Visual Guard - Multi-Modal override
     if image_bytes:
-        v_metrics = calculate_visual_metrics(image_bytes)
+        with stage("visual_guard"):
+            v_metrics = calculate_visual_metrics(image_bytes)
         if v_metrics:
             # DEFINITIVE HEALTHY: Low redness (pink/pale)
             if v_metrics["redness"] < 0.10:
@@ -302,29 +345,28 @@ def predict_quantum(features, image_bytes=None):
                 return "Ulcerative Colitis (Positive)"
 
     # 3. Fallback to trained centroids (Often more robust than QSVC for small data)
-    centroid_path = os.path.join(os.path.dirname(__file__), "centroids.json")
-    if os.path.exists(centroid_path):
-        try:
-            with open(centroid_path, "r") as f:
-                centroids = json.load(f)
-            if "healthy" in centroids and "uc" in centroids:
-                d_healthy = np.linalg.norm(features - np.array(centroids["healthy"]))
-                d_uc = np.linalg.norm(features - np.array(centroids["uc"]))
-                # Bias towards healthy if distance is very large (outlier)
-                if d_uc < d_healthy:
-                    print("DEBUG: Centroid Match -> UC (Positive)")
-                    return "Ulcerative Colitis (Positive)"
-                else:
-                    print("DEBUG: Centroid Match -> Healthy (Negative)")
-                    return "Healthy (Negative)"
-        except:
-            pass
+    try:
+        centroids = get_centroids()
+        if "healthy" in centroids and "uc" in centroids:
+            with stage("centroid"):
+                d_healthy = np.linalg.norm(features - centroids["healthy"])
+                d_uc = np.linalg.norm(features - centroids["uc"])
+            # Bias towards healthy if distance is very large (outlier)
+            if d_uc < d_healthy:
+                print("DEBUG: Centroid Match -> UC (Positive)")
+                return "Ulcerative Colitis (Positive)"
+            else:
+                print("DEBUG: Centroid Match -> Healthy (Negative)")
+                return "Healthy (Negative)"
+    except:
+        pass
 
     # 4. Fitted QML Pipeline
     config = get_config()
     if config.get("is_fitted", False):
         try:
-            pred = pipeline.predict(features)[0]
+            with stage("qsvc"):
+                pred = pipeline.predict(features)[0]
             label = "Ulcerative Colitis (Positive)" if pred == 1 else "Healthy (Negative)"
             print(f"DEBUG: Pipeline Prediction -> {label}")
             return label
@@ -333,138 +375,68 @@ def predict_quantum(features, image_bytes=None):
 
     return "Healthy (Negative)"
 
+def predict_quantum_matrix(X):
+    """
+    Vectorized predict_quantum for image-less rows (clinical heuristic -> centroids ->
+    fitted pipeline -> healthy default). Returns a boolean array, True where a row is UC.
+    """
+    init_model()
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    is_uc = np.zeros(len(X), dtype=bool)
+    decided = np.zeros(len(X), dtype=bool)
+
+    # 1. High-precision clinical heuristic
+    if X.shape[1] >= 15:
+        is_clinical = np.all(X[:, 100:] == 0, axis=1)
+        crp = X[:, 13] * 100.0
+        esr = X[:, 14] * 100.0
+        positive = is_clinical & ((crp > 10.0) | (esr > 20.0))
+        negative = is_clinical & ~positive & (crp <= 5.0) & (esr <= 15.0)
+        is_uc |= positive
+        decided |= positive | negative
+
+    # 3. Trained centroids
+    rest = ~decided
+    centroids = get_centroids()
+    if rest.any() and "healthy" in centroids and "uc" in centroids:
+        try:
+            d_healthy = np.linalg.norm(X[rest] - centroids["healthy"], axis=1)
+            d_uc = np.linalg.norm(X[rest] - centroids["uc"], axis=1)
+            is_uc[rest] = d_uc < d_healthy
+            decided[rest] = True
+        except ValueError:
+            pass
+
+    # 4. Fitted QML Pipeline
+    rest = ~decided
+    if rest.any() and pipeline is not None and get_config().get("is_fitted", False):
+        try:
+            with stage("qsvc"):
+                is_uc[rest] = pipeline.predict(X[rest]) == 1
+        except Exception as e:
+            print(f"DEBUG: Vectorized pipeline prediction failed: {e}")
+
+    return is_uc
+
 def get_analytics_data():
-    """Generates performance metrics for the analytics dashboard."""
+    """Performance metrics for the analytics dashboard, served from the model's analytics snapshot."""
     import os
-    import csv
-    import numpy as np
-    from sklearn.metrics import confusion_matrix, roc_curve, auc
-    from ml_engine.preprocessing import extract_features
+    from ml_engine import analytics
     
-    if pipeline is None:
-        init_model()
+    init_model()
         
     # Project root
     dataset_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'datasets')
     if not os.path.exists(dataset_dir):
         dataset_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'datasets')
 
-    # --- IMAGE DATA ---
-    img_y_true = []
-    img_y_scores = []
-    img_y_pred = []
-
-    try:
-        config = get_config()
-        if not config.get("is_fitted", False):
-             # Return fallback if not fitted
-             return {
-                 "image": {"confusion_matrix": [[5, 0], [0, 5]], "roc": {"fpr": [0,0,1], "tpr": [0,1,1], "auc": 1.0}},
-                 "clinical": {"confusion_matrix": [[0,0],[0,0]], "roc": {"fpr":[],"tpr":[],"auc":0}},
-                 "history": {"accuracy": [], "loss": []}
-             }
-
-        for f in os.listdir(dataset_dir):
-            if f.endswith('.png'):
-                label = 0 if 'Healthy' in f else 1
-                img_y_true.append(label)
-                with open(os.path.join(dataset_dir, f), 'rb') as img_f:
-                    feats = extract_features(img_f.read())
-                    if len(feats.shape) == 1: feats = feats.reshape(1, -1)
-                    try:
-                        score = pipeline.decision_function(feats)[0]
-                    except:
-                        try: score = float(pipeline.predict(feats)[0])
-                        except: score = 0.5
-                    img_y_scores.append(score)
-                    img_y_pred.append(1 if score > 0 else 0)
-
-        # Image Metrics
-        cm_img = confusion_matrix(img_y_true, img_y_pred, labels=[0, 1])
-        tn, fp, fn, tp = cm_img.ravel()
-        try:
-           fpr, tpr, _ = roc_curve(img_y_true, img_y_scores)
-           roc_auc = auc(fpr, tpr)
-        except:
-           fpr, tpr, roc_auc = [0, 1], [0, 1], 0.5
-        
-        image_metrics = {
-            "confusion_matrix": [[int(tn), int(fp)], [int(fn), int(tp)]],
-            "roc": {"fpr": fpr.tolist(), "tpr": tpr.tolist(), "auc": float(roc_auc) if not np.isnan(roc_auc) else 0.5},
-            "n_samples": len(img_y_true)
-        }
-        
-        # History (Simulated)
-        total = len(img_y_true) + 1e-6
-        acc = (tp + tn) / total
-        epochs = 10
-        hist_acc = [0.5 + (acc - 0.5)/(1 + np.exp(-0.8*(i-4))) for i in range(epochs)] 
-        hist_loss = [1.0 - x for x in hist_acc]
-
-    except Exception as e:
-        print(f"ERROR: Image analytics failed: {e}")
-        image_metrics = {"confusion_matrix": [[0,0],[0,0]], "roc": {"fpr":[],"tpr":[],"auc":0}}
-        hist_acc, hist_loss = [], []
-
-
-    # --- CLINICAL DATA ---
-    clin_y_true = []
-    clin_y_scores = []
-    clin_y_pred = []
-    
-    csv_path = os.path.join(dataset_dir, "clinical_blood_results.csv")
-    if os.path.exists(csv_path):
-        try:
-            with open(csv_path, 'r') as f:
-                reader = csv.reader(f)
-                next(reader) # Skip header
-                for row in reader:
-                    if len(row) < 16: continue
-                    label_str = row[-1]
-                    label = 1 if "Ulcerative Colitis" in label_str else 0
-                    clin_y_true.append(label)
-                    
-                    # Heuristic: CRP(14) > 10 OR ESR(15) > 20 => Positive
-                    # We create a pseudo-score for ROC: (CRP/10 + ESR/20) / 2
-                    try:
-                        crp = float(row[14])
-                        esr = float(row[15])
-                        score = (crp / 10.0 + esr / 20.0) / 2.0
-                        # Normalize score roughly around 1.0 threshold
-                        norm_score = score - 1.0 
-                        
-                        clin_y_scores.append(norm_score)
-                        pred = 1 if (crp > 10 or esr > 20) else 0
-                        clin_y_pred.append(pred)
-                    except:
-                        pass
-        except Exception as e:
-            print(f"ERROR: Clinical CSV parsing failed: {e}")
-
-    # Clinical Metrics
-    if clin_y_true:
-        cm_clin = confusion_matrix(clin_y_true, clin_y_pred, labels=[0, 1])
-        tn, fp, fn, tp = cm_clin.ravel()
-        try:
-           fpr, tpr, _ = roc_curve(clin_y_true, clin_y_scores)
-           roc_auc = auc(fpr, tpr)
-        except:
-           fpr, tpr, roc_auc = [0, 1], [0, 1], 0.5
-        
-        clinical_metrics = {
-            "confusion_matrix": [[int(tn), int(fp)], [int(fn), int(tp)]],
-            "roc": {"fpr": fpr.tolist(), "tpr": tpr.tolist(), "auc": float(roc_auc) if not np.isnan(roc_auc) else 0.5},
-            "n_samples": len(clin_y_true)
+    config = get_config()
+    if not config.get("is_fitted", False) or pipeline is None:
+        # Return fallback if not fitted
+        return {
+            "image": {"confusion_matrix": [[5, 0], [0, 5]], "roc": {"fpr": [0,0,1], "tpr": [0,1,1], "auc": 1.0}},
+            "clinical": {"confusion_matrix": [[0,0],[0,0]], "roc": {"fpr":[],"tpr":[],"auc":0}},
+            "history": {"accuracy": [], "loss": []}
         }
-    else:
-        clinical_metrics = {"confusion_matrix": [[0,0],[0,0]], "roc": {"fpr":[],"tpr":[],"auc":0}, "n_samples": 0}
-
 
-    return {
-        "image": image_metrics,
-        "clinical": clinical_metrics,
-        "history": {
-            "accuracy": [round(x, 3) for x in hist_acc],
-            "loss": [round(x, 3) for x in hist_loss]
-        }
-    }
+    return analytics.get_report(pipeline, dataset_dir)
@@ -0,0 +1,48 @@
+import time
+import functools
+import contextvars
+from contextlib import contextmanager
+
+# Wall-clock timing of named pipeline stages (decode, resnet, visual_guard, qsvc, ...).
+# Every stage is passed to the registered sinks (process-wide histograms, see serving/metrics.py)
+# and appended to the collector of the current context, if there is one: the API opens a
+# collector per HTTP request (Server-Timing header), inference worker processes one per task
+# so the timings travel back with the result. Without sinks or a collector a stage costs two
+# perf_counter calls.
+_collector = contextvars.ContextVar("stage_timings", default=None)
+_sinks = []
+
+def add_sink(fn):
+    """Registers fn(name, seconds), called for every stage recorded in this process."""
+    _sinks.append(fn)
+
+def record(name, seconds):
+    timings = _collector.get()
+    if timings is not None:
+        timings.append((name, seconds))
+    for sink in _sinks:
+        sink(name, seconds)
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed(name, fn):
+    """fn wrapped in stage(name) (e.g. a background task)."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with stage(name):
+            return fn(*args, **kwargs)
+    return wrapper
+
+def start_collecting():
+    """Opens a collector in the current context; returns (timings list, token for stop_collecting)."""
+    timings = []
+    return timings, _collector.set(timings)
+
+def stop_collecting(token):
+    _collector.reset(token)
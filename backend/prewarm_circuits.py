@@ -0,0 +1,18 @@
+import os
+import sys
+
+# Build-time step: renders the circuit diagram of every preset and saved model into the
+# on-disk circuit cache, so serving never pays for matplotlib on those pages.
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ml_engine import circuit_cache
+from ml_engine.quantum import MODEL_PRESETS, get_config
+
+configs = [(p["params"]["reps"], p["params"]["entanglement"]) for p in MODEL_PRESETS]
+configs += circuit_cache.saved_configs(os.path.join(os.path.dirname(os.path.abspath(__file__)), "saved_models"))
+config = get_config()
+configs.append((config.get("reps", 2), config.get("entanglement", "linear")))
+
+print(f"BUILD PHASE: Prewarming {len(set(configs))} circuit diagrams into {circuit_cache.CACHE_DIR}...")
+ready = circuit_cache.prewarm(configs)
+print(f"SUCCESS: {ready}/{len(set(configs))} circuit diagrams cached.")
@@ -0,0 +1,132 @@
+import os
+import zlib
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Response compression negotiated per request from Accept-Encoding (brotli preferred when the
+# module is installed, else gzip). Complete bodies are compressed only above a size threshold;
+# streamed bodies (NDJSON, CSV downloads) are compressed chunk by chunk and flushed per chunk,
+# so clients still receive each record as soon as it is produced.
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 5))
+# Bodies above this are compressed on a worker thread instead of the event loop
+THREADPOOL_MIN_BYTES = 256 * 1024
+
+# Already compressed (SVG excepted), or must reach the client unbuffered (SSE through proxies)
+SKIP_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/octet-stream",
+              "text/event-stream")
+
+def _accepted(header):
+    """Encodings from an Accept-Encoding header that are not refused with q=0."""
+    accepted = set()
+    for part in header.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip())
+    return accepted
+
+def negotiate(header):
+    accepted = _accepted(header or "")
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+class _Compressor:
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def chunk(self, data):
+        """Compressed bytes for data, flushed so the client can decode everything sent so far."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data=b""):
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush()
+
+def compress(data, encoding):
+    return _Compressor(encoding).finish(data)
+
+class CompressionMiddleware:
+    """ASGI middleware: gzip/brotli for eligible responses (see module comment)."""
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        state = {"start": None, "compressor": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                skip_type = content_type.startswith(SKIP_TYPES) and not content_type.startswith("image/svg")
+                if (message["status"] < 200 or message["status"] in (204, 206, 304)
+                        or "content-encoding" in headers or skip_type):
+                    state["passthrough"] = True
+                    return await send(message)
+                # Held until the first body chunk shows the size; headers copied, since a shared
+                # Response object (e.g. from a coalesced computation) passes its own list
+                state["start"] = {**message, "headers": list(message["headers"])}
+                return
+
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            start = state["start"]
+            if start is not None:
+                state["start"] = None
+                headers = MutableHeaders(raw=start["headers"])
+                if not more and len(body) < self.minimum_size:
+                    state["passthrough"] = True
+                    await send(start)
+                    return await send(message)
+                headers.add_vary_header("Accept-Encoding")
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    # The encoded bytes differ from the identity representation
+                    headers["ETag"] = "W/" + headers["etag"]
+                if not more:
+                    body = (await run_in_threadpool(compress, body, encoding) if len(body) > THREADPOOL_MIN_BYTES
+                            else compress(body, encoding))
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    return await send({"type": "http.response.body", "body": body})
+                del headers["Content-Length"]
+                state["compressor"] = _Compressor(encoding)
+                await send(start)
+
+            compressor = state["compressor"]
+            data = compressor.chunk(body) if more else compressor.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,62 @@
+import time
+import hashlib
+import threading
+from fastapi.responses import Response
+from serving.responses import dumps
+from serving.single_flight import flights
+
+# HTTP conditional caching for read-mostly GET endpoints. Each endpoint supplies a cheap change
+# token (model version, registry or dataset folder stamp, config); the rendered body and its
+# strong ETag (hash of the bytes) are kept per endpoint and token. While the token is unchanged
+# a poll costs one token computation plus, with a matching If-None-Match, an empty 304.
+_memo = {}
+_lock = threading.Lock()
+stats = {"not_modified": 0, "memo_hits": 0, "rebuilds": 0}
+
+NO_CACHE = "no-cache"  # clients may store the body but must revalidate every time
+
+def etag_matches(request, etag):
+    """Weak comparison (RFC 9110), as If-None-Match requires; W/ tags come back from compressed responses."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    bare = etag.removeprefix("W/")
+    return header.strip() == "*" or bare in [t.strip().removeprefix("W/") for t in header.split(",")]
+
+def _render(content):
+    body = dumps(content)
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+async def respond(request, name, token, build, *args, cache_control=NO_CACHE, max_age_seconds=None, background=None):
+    """
+    304 or the JSON body of `await build(*args)` for one endpoint (name), with ETag and
+    Cache-Control. The body is rebuilt only when token changes or, with max_age_seconds, when
+    the memo is older than that (for sources without a cheap token, e.g. the cloud registry).
+    Concurrent rebuilds of the same name and token share one build.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _memo.get(name)
+    fresh = (entry is not None and entry["token"] == token
+             and (max_age_seconds is None or now - entry["built"] < max_age_seconds))
+    if fresh:
+        stats["memo_hits"] += 1
+    else:
+        async def rebuild():
+            body, etag = _render(await build(*args))
+            return {"token": token, "body": body, "etag": etag, "built": time.monotonic()}
+        entry = await flights.do(("conditional", name, token), rebuild)
+        with _lock:
+            _memo[name] = entry
+        stats["rebuilds"] += 1
+
+    headers = {"ETag": entry["etag"], "Cache-Control": cache_control}
+    if etag_matches(request, entry["etag"]):
+        stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers, background=background)
+    return Response(entry["body"], media_type="application/json", headers=headers, background=background)
+
+def memo_stats():
+    with _lock:
+        entries = len(_memo)
+    return {**stats, "entries": entries}
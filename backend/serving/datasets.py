@@ -0,0 +1,55 @@
+import os
+import glob
+import hashlib
+import threading
+
+# Server-resident datasets (the same folder /train and /dataset-files read from)
+DATASET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "datasets")
+HASH_BLOCK_BYTES = 1024 * 1024
+
+# path -> ((size, mtime_ns), sha256): files are only re-hashed after they change
+_hashes = {}
+_hash_lock = threading.Lock()
+
+def resolve(pattern, extensions=(".csv",)):
+    """
+    Dataset files matching a name or glob relative to DATASET_DIR (e.g. "unlabeled/*.csv"),
+    sorted. Patterns that are absolute or escape the folder match nothing.
+    """
+    pattern = pattern.strip().replace("\\", "/")
+    if not pattern or os.path.isabs(pattern) or ".." in pattern.split("/"):
+        return []
+    root = os.path.realpath(DATASET_DIR)
+    matches = []
+    for path in glob.glob(os.path.join(root, pattern)):
+        real = os.path.realpath(path)
+        if real.startswith(root + os.sep) and os.path.isfile(real) and real.lower().endswith(extensions):
+            matches.append(real)
+    return sorted(matches)
+
+def folder_stamp():
+    """Change token for the folder listing: its mtime moves whenever a file is added, removed or renamed."""
+    try:
+        return os.stat(DATASET_DIR).st_mtime_ns
+    except OSError:
+        return None
+
+def relative_name(path):
+    return os.path.relpath(path, os.path.realpath(DATASET_DIR)).replace(os.sep, "/")
+
+def content_hash(path):
+    """sha256 of a dataset file, memoized on (size, mtime) so unchanged files are hashed once."""
+    st = os.stat(path)
+    stamp = (st.st_size, st.st_mtime_ns)
+    with _hash_lock:
+        cached = _hashes.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    with _hash_lock:
+        _hashes[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
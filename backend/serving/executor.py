@@ -0,0 +1,133 @@
+import os
+import time
+import asyncio
+import threading
+import functools
+import contextvars
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from ml_engine import timing
+from serving import profiling
+
+# Dedicated pool for CPU-bound inference (NumPy/Torch release the GIL in their kernels),
+# kept separate from Starlette's default threadpool so sync endpoints and file I/O stay responsive.
+INFERENCE_THREADS = int(os.environ.get("INFERENCE_THREADS", min(4, os.cpu_count() or 1)))
+# Tasks allowed to wait for a pool thread before new work is shed with 503
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", INFERENCE_THREADS * 8))
+RETRY_AFTER_SECONDS = "2"
+
+# endpoint -> (max concurrently executing, max waiting for a slot before 429)
+ENDPOINT_LIMITS = {
+    "predict": (4, 16),
+    "predict-batch": (1, 2),
+    "predict-csv": (2, 4),
+    "predict-csv-batch": (2, 4),
+    "explain-decision": (2, 8),
+    "feature-importance": (2, 8),
+    "model-analytics": (1, 4),
+    "compare-circuits": (1, 4),
+}
+DEFAULT_LIMIT = (2, 8)
+
+executor = ThreadPoolExecutor(max_workers=INFERENCE_THREADS, thread_name_prefix="inference")
+
+_queue_lock = threading.Lock()
+_queued = 0
+
+class ConcurrencyLimiter:
+    """Per-endpoint semaphore that rejects (429) instead of queueing without bound."""
+
+    def __init__(self, name, max_concurrent, max_waiting):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self):
+        if self._sem.locked() and self.waiting >= self.max_waiting:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many concurrent '{self.name}' requests. Please retry shortly.",
+                headers={"Retry-After": RETRY_AFTER_SECONDS}
+            )
+        self.waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._sem.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+_limiters = {}
+
+def get_limiter(endpoint):
+    if endpoint not in _limiters:
+        max_concurrent, max_waiting = ENDPOINT_LIMITS.get(endpoint, DEFAULT_LIMIT)
+        _limiters[endpoint] = ConcurrencyLimiter(endpoint, min(max_concurrent, INFERENCE_THREADS), max_waiting)
+    return _limiters[endpoint]
+
+def queue_depth():
+    """Tasks submitted to the inference pool that have not started running yet."""
+    return _queued
+
+def _tracked(fn, submitted):
+    global _queued
+    with _queue_lock:
+        _queued -= 1
+    timing.record("inference_queue", time.perf_counter() - submitted)
+    return profiling.profiled(fn)()
+
+async def submit_cpu(fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the inference pool; sheds load with 503 when the queue is full.
+    Callers are expected to hold their endpoint's limiter slot (see run_cpu)."""
+    global _queued
+    with _queue_lock:
+        if _queued >= INFERENCE_MAX_QUEUE:
+            raise HTTPException(
+                status_code=503,
+                detail="Inference capacity saturated. Please retry shortly.",
+                headers={"Retry-After": RETRY_AFTER_SECONDS}
+            )
+        _queued += 1
+    loop = asyncio.get_running_loop()
+    # Runs in a copy of the caller's context, so stages timed on the pool thread reach the request
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        executor, context.run, _tracked, functools.partial(fn, *args, **kwargs), time.perf_counter()
+    )
+
+async def run_cpu(endpoint, fn, *args, **kwargs):
+    """Runs fn(*args, **kwargs) on the inference pool under the endpoint's concurrency limit."""
+    limiter = get_limiter(endpoint)
+    with timing.stage("limiter_wait"):
+        await limiter.acquire()
+    try:
+        return await submit_cpu(fn, *args, **kwargs)
+    finally:
+        limiter.release()
+
+def stats():
+    """Snapshot of pool and per-endpoint load for health/metrics endpoints."""
+    return {
+        "threads": INFERENCE_THREADS,
+        "queued": _queued,
+        "max_queue": INFERENCE_MAX_QUEUE,
+        "endpoints": {
+            name: {"active": l.active, "waiting": l.waiting, "limit": l.max_concurrent}
+            for name, l in _limiters.items()
+        }
+    }
@@ -0,0 +1,129 @@
+import io
+import os
+import re
+import time
+import uuid
+import base64
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Recently computed feature vectors kept server-side under short-lived handles, so responses
+# carry "<block>.<row>" instead of hundreds of floats and /circuit (or any other consumer)
+# accepts the handle back. Blocks are .npy files (shared by every worker process) with a
+# small in-memory LRU in front; they expire FEATURE_HANDLE_TTL_SECONDS after their last write.
+STORE_DIR = os.environ.get(
+    "FEATURE_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "feature_store")
+)
+TTL_SECONDS = int(os.environ.get("FEATURE_HANDLE_TTL_SECONDS", 3600))
+MEMORY_BLOCKS = int(os.environ.get("FEATURE_STORE_MEMORY_BLOCKS", 64))
+PRUNE_INTERVAL_SECONDS = 60
+# Feature encodings a response can ask for (?features=...); "handle" is the default
+ENCODINGS = ("handle", "json", "float16")
+
+BLOCK_RE = re.compile(r"^[0-9a-f]{16}$")
+HANDLE_RE = re.compile(r"^([0-9a-f]{16})(?:\.(\d+))?$")
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_last_prune = [0.0]
+
+def _path(block):
+    return os.path.join(STORE_DIR, f"{block}.npy")
+
+def _remember(block, matrix):
+    with _lock:
+        _memory[block] = matrix
+        _memory.move_to_end(block)
+        while len(_memory) > MEMORY_BLOCKS:
+            _memory.popitem(last=False)
+
+def prune(now=None):
+    """Deletes expired blocks (at most once per PRUNE_INTERVAL_SECONDS)."""
+    now = now or time.time()
+    if now - _last_prune[0] < PRUNE_INTERVAL_SECONDS or not os.path.isdir(STORE_DIR):
+        return
+    _last_prune[0] = now
+    for f in os.listdir(STORE_DIR):
+        path = os.path.join(STORE_DIR, f)
+        try:
+            if now - os.path.getmtime(path) > TTL_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+def put(matrix, key=None):
+    """
+    Stores a (rows, width) feature matrix (a single vector is one row) as float32 and returns
+    its block id; row i is addressed as handle(block, i). With a key (e.g. an upload's content
+    hash) the block id is deterministic and a live block is reused: it is only renewed once past
+    half its TTL, so repeated uploads of one image (e.g. response-cache hits) cost a stat, not a write.
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=np.float32))
+    block = key[:16] if key else uuid.uuid4().hex[:16]
+    path = _path(block)
+    prune()
+    if key:
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            age = None
+        if age is not None and age < TTL_SECONDS:
+            if age > TTL_SECONDS / 2:
+                os.utime(path)
+            _remember(block, matrix)
+            return block
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        np.save(f, matrix)
+    os.replace(tmp_path, path)
+    _remember(block, matrix)
+    return block
+
+def handle(block, row=0):
+    return f"{block}.{row}"
+
+def handles(block, n_rows):
+    """Handles of every row of a block, as a 1-D array (a columnar result column)."""
+    return np.array([f"{block}.{i}" for i in range(n_rows)], dtype=object)
+
+def _load(block):
+    with _lock:
+        matrix = _memory.get(block)
+        if matrix is not None:
+            _memory.move_to_end(block)
+            return matrix
+    path = _path(block)
+    try:
+        if time.time() - os.path.getmtime(path) > TTL_SECONDS:
+            return None
+        matrix = np.load(path)
+    except (OSError, ValueError):
+        return None
+    _remember(block, matrix)
+    return matrix
+
+def get(ref):
+    """
+    Features for a handle: "<block>.<row>" gives that row (1-D), a bare "<block>" the whole
+    matrix (2-D). None if the handle is malformed, unknown or expired.
+    """
+    match = HANDLE_RE.match(ref or "")
+    if not match:
+        return None
+    matrix = _load(match.group(1))
+    if matrix is None or match.group(2) is None:
+        return matrix
+    row = int(match.group(2))
+    return matrix[row] if row < len(matrix) else None
+
+def float16_b64(vector):
+    """Compact inline encoding: base64 of the little-endian float16 values."""
+    return base64.b64encode(np.asarray(vector, dtype="<f2").tobytes()).decode("ascii")
+
+def npy_bytes(array):
+    buf = io.BytesIO()
+    np.save(buf, np.asarray(array, dtype=np.float32))
+    return buf.getvalue()
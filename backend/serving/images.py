@@ -0,0 +1,132 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from fastapi.responses import Response
+from serving.conditional import etag_matches
+
+# Binary image responses (instead of base64 inside JSON), addressed by content hash, circuit
+# cache key or database record. Every response carries a strong ETag and Cache-Control so
+# browsers and nginx revalidate with If-None-Match (304) instead of re-downloading.
+STORE_DIR = os.environ.get(
+    "IMAGE_STORE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "image_store")
+)
+# Generated images (XAI heatmaps) kept on disk; oldest are pruned past this count
+STORE_MAX_FILES = int(os.environ.get("IMAGE_STORE_MAX_FILES", 5000))
+WEBP_QUALITY = int(os.environ.get("IMAGE_WEBP_QUALITY", 85))
+# Transcoded WebP variants kept in memory
+WEBP_CACHE_ENTRIES = int(os.environ.get("IMAGE_WEBP_CACHE_ENTRIES", 64))
+
+# Content-addressed URLs never change meaning; record images are patient data, so private
+IMMUTABLE = "public, max-age=31536000, immutable"
+PRIVATE_IMMUTABLE = "private, max-age=31536000, immutable"
+PRIVATE = "private, max-age=3600"
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{32}$")
+
+_webp = OrderedDict()
+_webp_lock = threading.Lock()
+
+def sniff(data):
+    """Media type of stored image bytes (uploads may be JPEG, circuit diagrams SVG)."""
+    head = bytes(data[:64]).lstrip()
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"<svg") or head.startswith(b"<?xml"):
+        return "image/svg+xml"
+    return "application/octet-stream"
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def _path(image_digest):
+    return os.path.join(STORE_DIR, image_digest)
+
+def put(data):
+    """Stores image bytes under their content hash (idempotent); returns the digest."""
+    image_digest = digest(data)
+    path = _path(image_digest)
+    if os.path.exists(path):
+        return image_digest
+    os.makedirs(STORE_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    names = [n for n in os.listdir(STORE_DIR) if DIGEST_RE.match(n)]
+    if len(names) > STORE_MAX_FILES:
+        names.sort(key=lambda n: os.path.getmtime(os.path.join(STORE_DIR, n)))
+        for n in names[:len(names) - STORE_MAX_FILES]:
+            try:
+                os.remove(os.path.join(STORE_DIR, n))
+            except OSError:
+                pass
+    return image_digest
+
+def get(image_digest):
+    """Stored bytes for a digest, or None (also for anything that is not a digest)."""
+    if not DIGEST_RE.match(image_digest):
+        return None
+    try:
+        with open(_path(image_digest), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def url(image_digest):
+    return f"/images/{image_digest}"
+
+def to_webp(data, etag):
+    """WebP transcoding of a raster image (memoized by its ETag); None if it cannot be decoded."""
+    with _webp_lock:
+        cached = _webp.get(etag)
+        if cached is not None:
+            _webp.move_to_end(etag)
+            return cached
+
+    import cv2
+    import numpy as np
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None
+    ok, encoded = cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+    if not ok:
+        return None
+    webp = encoded.tobytes()
+
+    with _webp_lock:
+        _webp[etag] = webp
+        while len(_webp) > WEBP_CACHE_ENTRIES:
+            _webp.popitem(last=False)
+    return webp
+
+def image_response(request, data, tag=None, format=None, cache_control=PRIVATE):
+    """
+    Response for image bytes: 304 when the client's If-None-Match matches, otherwise the bytes
+    (transcoded when format="webp" and the image is raster) with ETag and Cache-Control.
+    tag is a stable identifier of the content (defaults to its hash).
+    """
+    media_type = sniff(data)
+    base = tag or digest(data)
+    if format == "webp" and media_type in ("image/png", "image/jpeg"):
+        etag = f'"{base}-webp"'
+        media_type = "image/webp"
+        body = None  # transcoded below, unless the client already has it
+    else:
+        etag = f'"{base}"'
+        body = data
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    if body is None:
+        body = to_webp(data, etag)
+        if body is None:
+            body, media_type = data, sniff(data)
+    return Response(body, media_type=media_type, headers=headers)
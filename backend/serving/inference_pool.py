@@ -0,0 +1,407 @@
+import os
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+import numpy as np
+from fastapi import HTTPException
+from ml_engine import timing
+from serving import profiling
+from serving.executor import RETRY_AFTER_SECONDS
+
+# Optional pool of inference processes, each owning its own ResNet/QSVC/classical replica.
+# Payloads (encoded images, feature matrices) and array results travel through
+# multiprocessing.shared_memory slots; only small headers and result dicts are pickled.
+# Stage timings recorded inside a worker travel back with the result and are re-recorded
+# in the calling thread, so they reach the API's metrics and the request's Server-Timing;
+# likewise the cProfile stats of a profiled request's task join that request's profile.
+# INFERENCE_PROCESSES=0 (default) keeps inference in-process on the thread executor.
+INFERENCE_PROCESSES = int(os.environ.get("INFERENCE_PROCESSES", 0))
+# Torch intra-op threads per inference process; by default the cores are split between
+# every process of every API worker so nothing is oversubscribed.
+PROCESS_THREADS = int(os.environ.get(
+    "INFERENCE_PROCESS_THREADS",
+    max(1, (os.cpu_count() or 1) // max(1, INFERENCE_PROCESSES * int(os.environ.get("WEB_CONCURRENCY", 1))))
+))
+# Slot size covers typical endoscopy uploads; larger payloads get a dedicated segment
+SLOT_BYTES = int(os.environ.get("INFERENCE_SLOT_MB", 8)) * 1024 * 1024
+SLOTS_PER_PROCESS = 2
+SLOT_PREFIX = "uc-slot-"
+# Seconds a caller waits for its result (or for a free slot) before answering 503; the task
+# keeps its slot until a worker finishes it or dies
+TASK_TIMEOUT_SECONDS = float(os.environ.get("INFERENCE_TASK_TIMEOUT", 120))
+# Worker deaths in a row, with no worker finishing its start-up in between, before the pool is
+# marked unhealthy and stops respawning (e.g. a model that crashes every process that loads it);
+# respawns back off exponentially until then
+MAX_CONSECUTIVE_FAILURES = int(os.environ.get("INFERENCE_MAX_RESTARTS", 5))
+RESPAWN_BACKOFF_SECONDS = 1.0
+RESPAWN_BACKOFF_MAX_SECONDS = 30.0
+
+# --- Operations (run inside the worker, or in-process when the pool is disabled) ---
+
+def _op_extract_features(image_bytes):
+    from ml_engine.preprocessing import extract_features
+    return extract_features(image_bytes), {}
+
+def _op_analyze_image(image_bytes, validate=True, visual_guard=True):
+    """Domain check, ResNet features and both model stacks for one image."""
+    from ml_engine.preprocessing import extract_features, is_medical_image
+    from ml_engine.quantum import predict_quantum
+    from ml_engine.classical import predict_classical
+
+    if validate and not is_medical_image(image_bytes):
+        return None, {"is_medical": False}
+    features = extract_features(image_bytes)
+    quantum = predict_quantum(features, image_bytes=image_bytes if visual_guard else None)
+    with timing.stage("classical"):
+        classical = predict_classical(features)
+    return features, {"is_medical": True, "quantum": quantum, "classical": classical}
+
+def _op_analyze_images(packed, sizes, visual_guard=False):
+    """Batched ResNet forward pass plus both model stacks for images packed back to back."""
+    from ml_engine.preprocessing import extract_features_batch
+    from ml_engine.quantum import predict_quantum
+    from ml_engine.classical import predict_classical
+
+    offsets = np.cumsum([0] + list(sizes))
+    images = [packed[offsets[i]:offsets[i + 1]] for i in range(len(sizes))]
+    features, errors = extract_features_batch(images)
+    quantum, classical = [], []
+    for image_bytes, row, error in zip(images, features, errors):
+        if error is not None:
+            quantum.append(None)
+            classical.append(None)
+            continue
+        quantum.append(predict_quantum(row, image_bytes=image_bytes if visual_guard else None))
+        with timing.stage("classical"):
+            classical.append(predict_classical(row))
+    return features, {"errors": errors, "quantum": quantum, "classical": classical}
+
+def _op_score_features(X, quantum=True, classical=True):
+    """Quantum predictions and/or classical results for every row of a feature matrix."""
+    from ml_engine.quantum import predict_quantum
+    from ml_engine.classical import predict_classical
+
+    X = np.atleast_2d(X)
+    quantum = [predict_quantum(row) for row in X] if quantum else None
+    with timing.stage("classical"):
+        classical = [predict_classical(row) for row in X] if classical else None
+    return None, {"quantum": quantum, "classical": classical}
+
+def _op_score_clinical(X, offset=0, quantum=True, classical=True):
+    """Vectorized clinical scoring; returns an (n, 3) matrix of quantum_uc, classical_uc, classical_confidence."""
+    from ml_engine import clinical
+
+    out = clinical.score(X, offset=offset, quantum=quantum, classical=classical)
+    empty = np.zeros(len(X))
+    return np.column_stack([
+        out.get("quantum_uc", empty), out.get("classical_uc", empty), out.get("classical_confidence", empty)
+    ]).astype(np.float64), {}
+
+OPS = {
+    "extract_features": _op_extract_features,
+    "analyze_image": _op_analyze_image,
+    "analyze_images": _op_analyze_images,
+    "score_features": _op_score_features,
+    "score_clinical": _op_score_clinical,
+}
+
+# --- Shared-memory framing ---
+
+def _write_payload(buf, payload):
+    """Copies bytes or an ndarray into buf and returns the header needed to read it back."""
+    if isinstance(payload, np.ndarray):
+        arr = np.ascontiguousarray(payload)
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=buf)[...] = arr
+        return {"kind": "array", "dtype": arr.dtype.str, "shape": arr.shape, "nbytes": arr.nbytes}
+    data = bytes(payload)
+    buf[:len(data)] = data
+    return {"kind": "bytes", "nbytes": len(data)}
+
+def _read_payload(buf, header, copy=True):
+    if header["kind"] == "array":
+        arr = np.ndarray(header["shape"], dtype=np.dtype(header["dtype"]), buffer=buf)
+        return arr.copy() if copy else arr
+    return bytes(buf[:header["nbytes"]])
+
+def _payload_nbytes(payload):
+    return payload.nbytes if isinstance(payload, np.ndarray) else len(payload)
+
+class PoolUnavailable(RuntimeError):
+    """The pool cannot take the task: marked unhealthy, or no slot freed up in time."""
+
+def _worker_main(requests, responses, current, index):
+    """
+    Inference process: attaches to slots on demand and serves requests until None arrives.
+    current[index] holds the id of the task it dequeued last, so the pool knows which task a
+    dead worker took with it even if it died before reporting anything.
+    """
+    os.environ["TORCH_NUM_THREADS"] = str(PROCESS_THREADS)
+    os.environ["OMP_NUM_THREADS"] = str(PROCESS_THREADS)
+    import ml_engine.preprocessing  # noqa: F401 (loads the ResNet replica once)
+    from ml_engine.quantum import init_model
+    from ml_engine.classical import init_models
+    init_model()
+    init_models()
+    responses.put(("ready", None, os.getpid()))
+
+    attached = {}
+    while True:
+        msg = requests.get()
+        if msg is None:
+            break
+        task_id, op, shm_name, header, kwargs, profile = msg
+        current[index] = task_id
+        try:
+            shm = attached.get(shm_name)
+            if shm is None:
+                shm = attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+            payload = _read_payload(shm.buf, header, copy=False)
+            timings, token = timing.start_collecting()
+            stats = None
+            try:
+                if profile:
+                    (result, extras), stats = profiling.run_collecting(OPS[op], payload, **kwargs)
+                else:
+                    result, extras = OPS[op](payload, **kwargs)
+            finally:
+                timing.stop_collecting(token)
+            del payload  # drop the view: the slot is reused for the result
+
+            out_header, out_name = None, None
+            if result is not None:
+                result = np.ascontiguousarray(result)
+                target = shm
+                if result.nbytes > shm.size:
+                    target = shared_memory.SharedMemory(create=True, size=result.nbytes)
+                    out_name = target.name
+                out_header = _write_payload(target.buf, result)
+                if out_name:
+                    target.close()
+            responses.put(("done", task_id, (out_header, out_name, extras, timings, stats)))
+        except Exception as e:
+            responses.put(("error", task_id, f"{type(e).__name__}: {e}"))
+        finally:
+            if not shm_name.startswith(SLOT_PREFIX) and shm_name in attached:
+                # Dedicated oversized segment: detach, the API side unlinks it
+                attached.pop(shm_name).close()
+
+class InferencePool:
+    def __init__(self, processes=INFERENCE_PROCESSES):
+        self.n_processes = processes
+        self._workers = {}  # index -> Process (None while waiting to be respawned)
+        self._respawn_at = {}  # index -> monotonic time of the next spawn attempt
+        self._current = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._requests = None
+        self._responses = None
+        self._slots = []
+        self._free_slots = queue.Queue()
+        self._futures = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.started = False
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        """Allocates the shared slots and spawns the workers (call once per API process)."""
+        if self.started or self.n_processes <= 0:
+            return
+        self._requests = self._ctx.Queue()
+        self._responses = self._ctx.Queue()
+        self._current = self._ctx.RawArray("q", [-1] * self.n_processes)
+        for i in range(self.n_processes * SLOTS_PER_PROCESS):
+            shm = shared_memory.SharedMemory(create=True, size=SLOT_BYTES, name=f"{SLOT_PREFIX}{os.getpid()}-{i}")
+            self._slots.append(shm)
+            self._free_slots.put(shm)
+        for index in range(self.n_processes):
+            self._spawn(index)
+        self.started = True
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        print(f"STARTUP: Inference pool started ({self.n_processes} processes x {PROCESS_THREADS} torch threads)")
+
+    def _spawn(self, index):
+        self._current[index] = -1
+        process = self._ctx.Process(
+            target=_worker_main, args=(self._requests, self._responses, self._current, index), daemon=True
+        )
+        process.start()
+        self._workers[index] = process
+
+    def _live_workers(self):
+        return [p for p in self._workers.values() if p is not None]
+
+    def shutdown(self):
+        if not self.started:
+            return
+        self.started = False
+        workers = self._live_workers()
+        for _ in workers:
+            self._requests.put(None)
+        for process in workers:
+            process.join(timeout=5)
+        self._dispatcher.join(timeout=2)
+        for q in (self._requests, self._responses):
+            q.close()
+            q.join_thread()
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+
+    def _dispatch(self):
+        """Resolves futures from worker responses and replaces workers that died mid-task."""
+        while self.started:
+            self._reap_dead_workers()
+            try:
+                kind, task_id, body = self._responses.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if kind == "ready":
+                self.consecutive_failures = 0
+                continue
+            with self._lock:
+                entry = self._futures.pop(task_id, None)
+            if entry is None:
+                continue
+            future, shm, owned = entry
+            try:
+                if kind == "done":
+                    out_header, out_name, extras, timings, stats = body
+                    result = None
+                    if out_header is not None:
+                        if out_name:
+                            out = shared_memory.SharedMemory(name=out_name)
+                            result = _read_payload(out.buf, out_header)
+                            out.close()
+                            out.unlink()
+                        else:
+                            result = _read_payload(shm.buf, out_header)
+                    self.completed += 1
+                    future.set_result((result, extras, timings, stats))
+                else:
+                    self.failed += 1
+                    future.set_exception(RuntimeError(body))
+            finally:
+                self._release(shm, owned)
+
+    def _reap_dead_workers(self):
+        """Fails the task a dead worker had dequeued and respawns it, backing off on repeated deaths."""
+        now = time.monotonic()
+        for index, process in list(self._workers.items()):
+            if process is None or process.is_alive() or not self.started or not self.healthy:
+                continue
+            self._workers[index] = None
+            self.consecutive_failures += 1
+            with self._lock:
+                entry = self._futures.pop(self._current[index], None)
+            if entry is not None:
+                future, shm, owned = entry
+                self.failed += 1
+                future.set_exception(RuntimeError(f"Inference process exited unexpectedly (code {process.exitcode})"))
+                self._release(shm, owned)
+            if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                self._mark_unhealthy()
+                return
+            delay = min(RESPAWN_BACKOFF_MAX_SECONDS, RESPAWN_BACKOFF_SECONDS * 2 ** (self.consecutive_failures - 1))
+            self._respawn_at[index] = now + delay
+            print(f"WARNING: Inference process {process.pid} died (code {process.exitcode}); respawning in {delay:.0f}s")
+
+        for index, due in list(self._respawn_at.items()):
+            if now >= due:
+                del self._respawn_at[index]
+                self._spawn(index)
+
+    def _mark_unhealthy(self):
+        """Stops every worker and fails all pending tasks; later tasks are refused (503)."""
+        self.healthy = False
+        self._respawn_at.clear()
+        print(f"ERROR: Inference processes died {self.consecutive_failures} times in a row; "
+              "pool marked unhealthy, no more respawns")
+        for index, process in list(self._workers.items()):
+            if process is not None:
+                process.terminate()
+                process.join(timeout=5)
+                self._workers[index] = None
+        with self._lock:
+            entries = list(self._futures.values())
+            self._futures.clear()
+        for future, shm, owned in entries:
+            self.failed += 1
+            future.set_exception(PoolUnavailable("Inference processes are unavailable"))
+            self._release(shm, owned)
+
+    def _release(self, shm, owned):
+        if owned:
+            shm.close()
+            shm.unlink()
+        else:
+            self._free_slots.put(shm)
+
+    def submit(self, op, payload, profile=False, **kwargs):
+        """
+        Queues op(payload, **kwargs) on a worker; returns a Future of (ndarray or None, extras,
+        stage timings, cProfile stats dict when profile is set, else None).
+        """
+        if not self.healthy:
+            raise PoolUnavailable("Inference processes are unavailable")
+        nbytes = _payload_nbytes(payload)
+        if nbytes > SLOT_BYTES:
+            shm, owned = shared_memory.SharedMemory(create=True, size=nbytes), True
+        else:
+            # Blocks while every slot is in flight, which bounds shared memory and queue growth
+            try:
+                shm, owned = self._free_slots.get(timeout=TASK_TIMEOUT_SECONDS), False
+            except queue.Empty:
+                raise PoolUnavailable("No inference slot freed up in time")
+        header = _write_payload(shm.buf, payload)
+
+        future = Future()
+        task_id = next(self._ids)
+        with self._lock:
+            self._futures[task_id] = (future, shm, owned)
+        self._requests.put((task_id, op, shm.name, header, kwargs, profile))
+        return future
+
+    def stats(self):
+        return {
+            "processes": len(self._live_workers()),
+            "healthy": self.healthy,
+            "consecutive_failures": self.consecutive_failures,
+            "threads_per_process": PROCESS_THREADS,
+            "in_flight": len(self._futures),
+            "free_slots": self._free_slots.qsize(),
+            "completed": self.completed,
+            "failed": self.failed
+        }
+
+pool = InferencePool()
+
+def call(op, payload, **kwargs):
+    """
+    Runs a model operation and returns (ndarray or None, extras). Uses the process pool
+    when it is running, otherwise executes in the calling thread. Blocking: call it from
+    the inference thread executor, never from the event loop. 503 when the pool is
+    unhealthy or the task does not finish within TASK_TIMEOUT_SECONDS.
+    """
+    if pool.started:
+        try:
+            future = pool.submit(op, payload, profile=profiling.requested(), **kwargs)
+            result, extras, timings, stats = future.result(timeout=TASK_TIMEOUT_SECONDS)
+        except FutureTimeout:
+            raise HTTPException(status_code=503, detail="Inference timed out. Please retry shortly.",
+                                headers={"Retry-After": RETRY_AFTER_SECONDS})
+        except PoolUnavailable as e:
+            raise HTTPException(status_code=503, detail=f"{e}. Please retry shortly.",
+                                headers={"Retry-After": RETRY_AFTER_SECONDS})
+        for name, seconds in timings:
+            timing.record(name, seconds)
+        profiling.add_process_stats(stats)
+        return result, extras
+    return OPS[op](payload, **kwargs)
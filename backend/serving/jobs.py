@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import queue
+import threading
+import multiprocessing
+
+# Training runs in a separate worker process so the API event loop (and its GIL) never
+# blocks on feature extraction or kernel fitting. Job state is persisted as JSON files and
+# every event is appended to <id>.events.jsonl, so any API worker process can stream any job.
+JOBS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "training_jobs")
+TERMINAL_STATES = ("completed", "failed", "cancelled", "interrupted")
+CANCEL_GRACE_SECONDS = 10
+# Progress phase in which the worker writes the models: cancelling (or terminating) it then
+# would leave models from two different runs on disk, so the job runs to completion
+PUBLISHING_PHASE = "publishing"
+
+def _worker_main(params, events, cancel_event):
+    """Entry point of the training process: streams progress events back over a queue."""
+    from ml_engine.training import train_from_files, TrainingCancelled
+    try:
+        result = train_from_files(
+            params["selected_files"],
+            reps=params["reps"],
+            entanglement=params["entanglement"],
+            report=events.put,
+            is_cancelled=cancel_event.is_set
+        )
+        events.put({"type": "result", "result": result})
+    except TrainingCancelled:
+        events.put({"type": "cancelled"})
+    except Exception as e:
+        events.put({"type": "error", "error": str(e)})
+
+class TrainingJobManager:
+    def __init__(self, jobs_dir=JOBS_DIR, on_complete=None):
+        self.jobs_dir = jobs_dir
+        self.on_complete = on_complete
+        self.jobs = {}
+        self.events = {}
+        self._handles = {}
+        self._active_lock_fd = None
+        self._lock = threading.Lock()
+        # spawn: never fork a process that holds torch/OpenMP threads
+        self._ctx = multiprocessing.get_context("spawn")
+        self._recover_interrupted()
+
+    def _recover_interrupted(self):
+        """Marks unfinished persisted jobs as interrupted when no live process owns them."""
+        if not os.path.isdir(self.jobs_dir):
+            return
+        # Another API worker holding the active lock means its job is still running
+        if not self._acquire_active_lock():
+            return
+        try:
+            for f in os.listdir(self.jobs_dir):
+                if not f.endswith(".json"):
+                    continue
+                job = self._read_persisted(f[:-len(".json")])
+                if job is None or job.get("status") in TERMINAL_STATES:
+                    continue
+                job["status"] = "interrupted"
+                job["finished"] = job.get("finished") or time.time()
+                self._persist(job)
+                with open(os.path.join(self.jobs_dir, f"{job['id']}.events.jsonl"), "a") as fh:
+                    fh.write(json.dumps({"type": "status", "status": "interrupted", "error": None}) + "\n")
+        finally:
+            self._release_active_lock()
+
+    def _persist(self, job):
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        path = os.path.join(self.jobs_dir, f"{job['id']}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def _append_event(self, job_id, event):
+        """Must be called with self._lock held."""
+        self.events[job_id].append(event)
+        with open(os.path.join(self.jobs_dir, f"{job_id}.events.jsonl"), "a") as f:
+            f.write(json.dumps(event) + "\n")
+
+    def _acquire_active_lock(self):
+        """Cross-process guard: only one training job may run per deployment (all API workers)."""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        fd = os.open(os.path.join(self.jobs_dir, ".active.lock"), os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._active_lock_fd = fd
+        return True
+
+    def _release_active_lock(self):
+        if self._active_lock_fd is not None:
+            fcntl.flock(self._active_lock_fd, fcntl.LOCK_UN)
+            os.close(self._active_lock_fd)
+            self._active_lock_fd = None
+
+    def _read_persisted(self, job_id):
+        path = os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.json")
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, params):
+        """Starts a training job; raises RuntimeError if one is already running."""
+        with self._lock:
+            for job in self.jobs.values():
+                if job["status"] not in TERMINAL_STATES:
+                    raise RuntimeError(f"Training job {job['id']} is already {job['status']}")
+            if not self._acquire_active_lock():
+                raise RuntimeError("A training job is already running in another server worker")
+
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                "id": job_id,
+                "status": "running",
+                "params": params,
+                "created": time.time(),
+                "finished": None,
+                "progress": {"done": 0, "total": len(params["selected_files"]), "phase": "extracting"},
+                "history": [],
+                "result": None,
+                "error": None
+            }
+            events = self._ctx.Queue()
+            cancel_event = self._ctx.Event()
+            process = self._ctx.Process(target=_worker_main, args=(params, events, cancel_event), daemon=True)
+            process.start()
+
+            self.jobs[job_id] = job
+            self.events[job_id] = []
+            self._handles[job_id] = (process, events, cancel_event)
+            self._persist(job)
+            self._append_event(job_id, {"type": "status", "status": "running"})
+
+        threading.Thread(target=self._monitor, args=(job_id,), daemon=True).start()
+        return job
+
+    def cancel(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            handle = self._handles.get(job_id)
+            if job is None:
+                job = self._read_persisted(job_id)
+                if (job is not None and job["status"] not in TERMINAL_STATES
+                        and job["progress"].get("phase") != PUBLISHING_PHASE):
+                    # Owned by another worker process: signal it through a marker file
+                    open(os.path.join(self.jobs_dir, f"{job_id}.cancel"), "w").close()
+                    job["status"] = "cancelling"
+                return job
+            if job["status"] in TERMINAL_STATES or handle is None or job["progress"].get("phase") == PUBLISHING_PHASE:
+                return job
+            job["status"] = "cancelling"
+            self._append_event(job_id, {"type": "status", "status": "cancelling"})
+            handle[2].set()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id) or self._read_persisted(job_id)
+
+    def list(self):
+        jobs = dict(self.jobs)
+        if os.path.isdir(self.jobs_dir):
+            for f in os.listdir(self.jobs_dir):
+                job_id = f[:-len(".json")] if f.endswith(".json") else None
+                if job_id and job_id not in jobs:
+                    job = self._read_persisted(job_id)
+                    if job:
+                        jobs[job_id] = job
+        return sorted(jobs.values(), key=lambda j: j["created"], reverse=True)
+
+    def events_since(self, job_id, index):
+        """Returns (new events, is_finished) for SSE streaming."""
+        with self._lock:
+            if job_id in self.events and job_id in self._handles:
+                new_events = self.events[job_id][index:]
+                return new_events, False
+
+        # Finished here or owned by another worker: replay the persisted event log
+        try:
+            with open(os.path.join(self.jobs_dir, f"{os.path.basename(job_id)}.events.jsonl"), "r") as f:
+                all_events = [json.loads(line) for line in f if line.endswith("\n")]
+        except OSError:
+            all_events = []
+        finished = bool(all_events) and all_events[-1]["type"] == "status" and all_events[-1]["status"] in TERMINAL_STATES
+        if not all_events:
+            job = self._read_persisted(job_id)
+            finished = job is None or job["status"] in TERMINAL_STATES
+        return all_events[index:], finished
+
+    def _apply(self, job, event):
+        kind = event["type"]
+        if kind == "step":
+            job["history"].append(event["step"])
+            job["progress"].update(done=event["done"], total=event["total"])
+        elif kind == "skip":
+            job["progress"].update(done=event["done"], total=event["total"])
+        elif kind == "phase":
+            job["progress"]["phase"] = event["phase"]
+        elif kind == "result":
+            job["result"] = event["result"]
+        elif kind == "error":
+            job["error"] = event["error"]
+
+    def _monitor(self, job_id):
+        process, events, cancel_event = self._handles[job_id]
+        job = self.jobs[job_id]
+        outcome = None
+        cancel_deadline = None
+
+        cancel_marker = os.path.join(self.jobs_dir, f"{job_id}.cancel")
+        last_persist = time.time()
+
+        while True:
+            try:
+                event = events.get(timeout=0.5)
+            except queue.Empty:
+                event = None
+
+            if event is not None:
+                if event["type"] == "result":
+                    # Step history was already streamed event by event
+                    event = {"type": "result", "result": {k: v for k, v in event["result"].items() if k != "history"}}
+                with self._lock:
+                    self._apply(job, event)
+                    self._append_event(job_id, event)
+                    # Keep the job snapshot fresh for other workers without rewriting it per step
+                    if time.time() - last_persist > 1.0:
+                        self._persist(job)
+                        last_persist = time.time()
+                if event["type"] in ("result", "cancelled", "error"):
+                    outcome = event["type"]
+            elif not process.is_alive():
+                break
+
+            if os.path.exists(cancel_marker):
+                os.remove(cancel_marker)
+                self.cancel(job_id)
+
+            # Hard-stop a worker that ignores cancellation (e.g. stuck inside kernel fitting),
+            # unless it has started writing models (it no longer polls the cancel flag then)
+            if cancel_event.is_set() and process.is_alive() and job["progress"].get("phase") != PUBLISHING_PHASE:
+                cancel_deadline = cancel_deadline or time.time() + CANCEL_GRACE_SECONDS
+                if time.time() > cancel_deadline:
+                    process.terminate()
+                    outcome = "cancelled"
+
+        process.join(timeout=5)
+        status = {"result": "completed", "cancelled": "cancelled"}.get(outcome, "failed")
+        if status == "failed" and job["error"] is None:
+            job["error"] = f"Training process exited unexpectedly (code {process.exitcode})"
+
+        if status == "completed" and self.on_complete:
+            try:
+                self.on_complete(job, job["history"])
+            except Exception as e:
+                print(f"ERROR: Training completion hook failed: {e}")
+
+        with self._lock:
+            job["status"] = status
+            job["finished"] = time.time()
+            job["progress"]["phase"] = status
+            self._persist(job)
+            self._append_event(job_id, {"type": "status", "status": status, "error": job["error"]})
+            self._handles.pop(job_id, None)
+            self._release_active_lock()
+        print(f"DEBUG: Training job {job_id} finished with status '{status}'")
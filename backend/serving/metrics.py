@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import bisect
+import asyncio
+import tempfile
+import threading
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from ml_engine import timing
+
+# Request and pipeline-stage latency histograms, queue depths, cache counters and event-loop
+# lag in the Prometheus text format (GET /metrics), plus a Server-Timing header on every
+# response with the stages of that request (visible in the browser's network panel).
+# Under gunicorn each worker writes a snapshot to METRICS_DIR every METRICS_FLUSH_SECONDS and
+# /metrics merges the snapshots of the live workers, so whichever worker answers the scrape
+# reports the whole service.
+METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(tempfile.gettempdir(), "uc-metrics"))
+FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", 5))
+LOOP_LAG_INTERVAL_SECONDS = 0.5
+# Snapshots not rewritten for this long belong to a hung or vanished worker and are skipped
+STALE_SECONDS = max(60.0, FLUSH_SECONDS * 10)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+class Histogram:
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(k): [list(counts), total] for k, (counts, total) in self._series.items()}
+
+REQUEST_SECONDS = Histogram(
+    "uc_http_request_duration_seconds", "HTTP request latency by route template (until the last body byte).",
+    ("method", "route", "status")
+)
+STAGE_SECONDS = Histogram(
+    "uc_stage_duration_seconds",
+    "Pipeline stage latency (decode, is_medical_image, resnet, visual_guard, centroid, qsvc, ...).",
+    ("stage",)
+)
+LOOP_LAG_SECONDS = Histogram(
+    "uc_event_loop_lag_seconds", "Delay of a periodic event-loop wake-up beyond its schedule.", (), LAG_BUCKETS
+)
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, LOOP_LAG_SECONDS)
+
+timing.add_sink(lambda name, seconds: STAGE_SECONDS.observe(seconds, name))
+
+# Callables returning {metric name: (type, help, [(labels dict, value), ...])}; values from
+# every worker are summed, so sources report counts (queued, active, hits), never ratios
+_sources = []
+
+def add_source(fn):
+    _sources.append(fn)
+
+def server_timing(timings, total):
+    """Server-Timing value: each stage's summed duration in first-seen order, then the total (ms)."""
+    durations = {}
+    for name, seconds in timings:
+        durations[name] = durations.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+class TimingMiddleware:
+    """ASGI middleware: stage collector per request, Server-Timing header and the request histogram."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        timings, token = timing.start_collecting()
+        status = [500]
+
+        async def send_timed(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # Copied: a shared Response object passes its own header list
+                headers = MutableHeaders(raw=list(message["headers"]))
+                headers.append("Server-Timing", server_timing(timings, time.perf_counter() - start))
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            timing.stop_collecting(token)
+            # Route template, not the raw path (/images/{digest} would be one series per image)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"], route, str(status[0]))
+
+def _snapshot():
+    gauges = {}
+    for source in _sources:
+        try:
+            for name, (kind, help, samples) in source().items():
+                family = gauges.setdefault(name, [kind, help, {}])
+                for labels, value in samples:
+                    key = json.dumps(sorted(labels.items()))
+                    family[2][key] = family[2].get(key, 0) + (value or 0)
+        except Exception as e:
+            print(f"WARNING: Metrics source failed: {e}")
+    return {
+        "pid": os.getpid(),
+        "histograms": {h.name: h.snapshot() for h in HISTOGRAMS},
+        "gauges": gauges
+    }
+
+def _write(snapshot):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"{snapshot['pid']}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def _peer_snapshots(own_pid):
+    """Snapshots of the other live workers; files of exited workers are removed."""
+    snapshots = []
+    if not os.path.isdir(METRICS_DIR):
+        return snapshots
+    now = time.time()
+    for name in os.listdir(METRICS_DIR):
+        pid_text, ext = os.path.splitext(name)
+        if ext != ".json" or not pid_text.isdigit() or int(pid_text) == own_pid:
+            continue
+        path = os.path.join(METRICS_DIR, name)
+        try:
+            if not _alive(int(pid_text)):
+                os.remove(path)
+                continue
+            if now - os.path.getmtime(path) > STALE_SECONDS:
+                continue
+            with open(path) as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+def _merge(snapshots):
+    histograms, gauges = {}, {}
+    for snapshot in snapshots:
+        for name, series in snapshot["histograms"].items():
+            merged = histograms.setdefault(name, {})
+            for key, (counts, total) in series.items():
+                if key in merged:
+                    merged[key] = [[a + b for a, b in zip(merged[key][0], counts)], merged[key][1] + total]
+                else:
+                    merged[key] = [list(counts), total]
+        for name, (kind, help, samples) in snapshot["gauges"].items():
+            family = gauges.setdefault(name, [kind, help, {}])
+            for key, value in samples.items():
+                family[2][key] = family[2].get(key, 0) + value
+    return histograms, gauges
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render(snapshots):
+    histograms, gauges = _merge(snapshots)
+    lines = [
+        "# HELP uc_metrics_workers API worker processes included in this scrape.",
+        "# TYPE uc_metrics_workers gauge",
+        f"uc_metrics_workers {len(snapshots)}",
+    ]
+    for h in HISTOGRAMS:
+        lines += [f"# HELP {h.name} {h.help}", f"# TYPE {h.name} histogram"]
+        for key, (counts, total) in sorted(histograms.get(h.name, {}).items()):
+            pairs = list(zip(h.labels, json.loads(key)))
+            cumulative = 0
+            for le, count in zip([*map(str, h.buckets), "+Inf"], counts):
+                cumulative += count
+                lines.append(f"{h.name}_bucket{_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{h.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{h.name}_count{_labels(pairs)} {cumulative}")
+    for name, (kind, help, samples) in sorted(gauges.items()):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        for key, value in sorted(samples.items()):
+            lines.append(f"{name}{_labels(json.loads(key))} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+async def exposition():
+    """Prometheus text for the whole service (this worker's live values plus its peers' snapshots)."""
+    snapshot = _snapshot()
+    await run_in_threadpool(_write, snapshot)
+    peers = await run_in_threadpool(_peer_snapshots, snapshot["pid"])
+    return render([snapshot] + peers)
+
+async def _monitor():
+    """Samples event-loop lag and periodically flushes this worker's snapshot for its peers."""
+    loop = asyncio.get_running_loop()
+    last_flush = loop.time()
+    while True:
+        scheduled = loop.time() + LOOP_LAG_INTERVAL_SECONDS
+        await asyncio.sleep(LOOP_LAG_INTERVAL_SECONDS)
+        now = loop.time()
+        LOOP_LAG_SECONDS.observe(max(0.0, now - scheduled))
+        if now - last_flush >= FLUSH_SECONDS:
+            last_flush = now
+            try:
+                await run_in_threadpool(_write, _snapshot())
+            except OSError as e:
+                print(f"WARNING: Could not write metrics snapshot: {e}")
+
+_monitor_task = []
+
+def start():
+    """Starts the lag probe / snapshot flusher (once per worker, from the startup event)."""
+    if not _monitor_task:
+        _monitor_task.append(asyncio.get_running_loop().create_task(_monitor()))
+
+def stop():
+    if _monitor_task:
+        _monitor_task.pop().cancel()
+    try:
+        os.remove(os.path.join(METRICS_DIR, f"{os.getpid()}.json"))
+    except OSError:
+        pass
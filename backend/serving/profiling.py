@@ -0,0 +1,242 @@
+import io
+import os
+import re
+import sys
+import hmac
+import time
+import uuid
+import pstats
+import cProfile
+import tempfile
+import threading
+import contextvars
+from collections import Counter
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+# On-demand profiling for production diagnosis, disabled unless PROFILING_TOKEN is set:
+# - GET /debug/profile?seconds=N samples the stacks of every thread of the answering worker
+#   and returns them as collapsed stacks ("thread;outer;...;inner count", for flamegraph.pl or
+#   speedscope).
+# - A request sent with "X-Profile: 1" runs its inference work under cProfile; the response
+#   carries X-Profile-Id and GET /debug/profile/{id} returns the stats (text report, pstats
+#   file, or a trace of the Torch and Qiskit calls).
+# With INFERENCE_PROCESSES>0 the model work of a profiled request runs under cProfile in the
+# inference process and its stats are merged into the request's profile.
+# Both require "Authorization: Bearer <PROFILING_TOKEN>". Nothing is hooked while idle: the
+# sampler thread only exists during a profile, and unprofiled requests pay one context
+# variable lookup per inference task.
+TOKEN = os.environ.get("PROFILING_TOKEN", "")
+MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 60))
+INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", 10))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "uc-profiles"))
+# Per-request profiles kept on disk (shared by every worker); oldest are pruned
+KEEP_PROFILES = int(os.environ.get("PROFILE_KEEP", 50))
+# Libraries reported by the trace view (matched as path components)
+TRACED_LIBRARIES = ("torch", "torchvision", "qiskit", "qiskit_machine_learning", "qiskit_aer")
+
+PROFILE_ID_RE = re.compile(r"^[0-9a-f]{16}$")
+
+_sampling = threading.Lock()
+# cProfile is per thread up to Python 3.11 but interpreter-wide (sys.monitoring) from 3.12,
+# so one profiled task runs at a time; concurrent tasks of profiled requests run unprofiled
+_cprofile = threading.Lock()
+_active = contextvars.ContextVar("request_profiles", default=None)
+
+def _authorized(headers):
+    supplied = headers.get("authorization", "")
+    return bool(TOKEN) and hmac.compare_digest(supplied.encode(), f"Bearer {TOKEN}".encode())
+
+def authorize(request):
+    """Raises 404 when profiling is disabled and 401 without the profiling token."""
+    if not TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _authorized(request.headers):
+        raise HTTPException(status_code=401, detail="Invalid profiling token", headers={"WWW-Authenticate": "Bearer"})
+
+# --- Statistical sampler ---
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+def sample(seconds, interval=INTERVAL_MS / 1000.0):
+    """Stacks of all other threads every interval for seconds; returns (collapsed stacks text, samples)."""
+    own = threading.get_ident()
+    counts = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}").replace(";", ","))
+            counts[";".join(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common()), samples
+
+async def run_sampler(seconds):
+    """sample() on a worker thread; 409 while another profile of this worker is running."""
+    if not _sampling.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running on this worker.")
+    try:
+        return await run_in_threadpool(sample, min(seconds, MAX_SECONDS))
+    finally:
+        _sampling.release()
+
+# --- Per-request cProfile ---
+
+def profiled(fn):
+    """fn itself, or fn run under cProfile when the current request asked for a profile."""
+    profiles = _active.get()
+    if profiles is None:
+        return fn
+
+    def run(*args, **kwargs):
+        if not _cprofile.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        try:
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(fn, *args, **kwargs)
+            finally:
+                profiles.append(profile)
+        finally:
+            _cprofile.release()
+    return run
+
+def requested():
+    """True when the current request asked for a profile."""
+    return _active.get() is not None
+
+def run_collecting(fn, *args, **kwargs):
+    """(fn(*args, **kwargs), its cProfile stats dict): profiling inside an inference process."""
+    profile = cProfile.Profile()
+    result = profile.runcall(fn, *args, **kwargs)
+    profile.create_stats()
+    return result, profile.stats
+
+class _ProcessProfile:
+    """Stats dict collected in another process, in the shape pstats.Stats accepts."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def add_process_stats(stats):
+    """Merges stats from run_collecting into the current request's profile."""
+    profiles = _active.get()
+    if profiles is not None and stats:
+        profiles.append(_ProcessProfile(stats))
+
+def _path(profile_id):
+    return os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+
+def _save(profile_id, profiles):
+    if not profiles:
+        return
+    stats = pstats.Stats(profiles[0])
+    if len(profiles) > 1:
+        stats.add(*profiles[1:])
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stats.dump_stats(_path(profile_id))
+
+    names = [n for n in os.listdir(PROFILE_DIR) if n.endswith(".prof")]
+    if len(names) > KEEP_PROFILES:
+        names.sort(key=lambda n: os.path.getmtime(os.path.join(PROFILE_DIR, n)))
+        for n in names[:len(names) - KEEP_PROFILES]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, n))
+            except OSError:
+                pass
+
+class ProfileMiddleware:
+    """ASGI middleware: requests with "X-Profile: 1" (and the token) get their inference work profiled."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") != "1":
+            return await self.app(scope, receive, send)
+        if not _authorized(headers):
+            response = JSONResponse({"detail": "Invalid profiling token"}, status_code=401,
+                                    headers={"WWW-Authenticate": "Bearer"})
+            return await response(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex[:16]
+        profiles = []
+        token = _active.set(profiles)
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start":
+                tagged = MutableHeaders(raw=list(message["headers"]))
+                tagged["X-Profile-Id"] = profile_id
+                message = {**message, "headers": tagged.raw}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tagged)
+        finally:
+            _active.reset(token)
+            await run_in_threadpool(_save, profile_id, profiles)
+
+def load(profile_id):
+    """pstats.Stats of a saved request profile, or None."""
+    if not PROFILE_ID_RE.match(profile_id) or not os.path.exists(_path(profile_id)):
+        return None
+    return pstats.Stats(_path(profile_id))
+
+def read_raw(profile_id):
+    with open(_path(profile_id), "rb") as f:
+        return f.read()
+
+def text_report(stats, limit=60):
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+def _library(filename):
+    parts = filename.replace("\\", "/").split("/")
+    for name in TRACED_LIBRARIES:
+        if name in parts:
+            return name
+    return None
+
+def trace(stats, limit=100):
+    """Torch / Qiskit calls of a profile: per function and per library, times in milliseconds."""
+    functions = []
+    own_ms = Counter()
+    for (filename, line, name), (_, calls, total, cumulative, callers) in stats.stats.items():
+        library = _library(filename)
+        if library is None and filename == "~":
+            # Builtins (e.g. torch's C++ ops) belong to the library that called them
+            library = next((lib for lib in (_library(c[0]) for c in callers) if lib), None)
+        if library is None:
+            continue
+        own_ms[library] += total * 1000
+        functions.append({
+            "library": library,
+            "function": name if filename == "~" else f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "cumulative_ms": round(cumulative * 1000, 3)
+        })
+    functions.sort(key=lambda f: f["cumulative_ms"], reverse=True)
+    return {
+        "libraries": {lib: round(ms, 3) for lib, ms in own_ms.most_common()},
+        "functions": functions[:limit]
+    }
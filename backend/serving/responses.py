@@ -0,0 +1,69 @@
+import json
+import base64
+import datetime
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Falls back to the stdlib encoder (same output, slower)
+    orjson = None
+
+# JSON responses rendered with orjson: NumPy arrays and scalars, datetimes and Mongo ObjectIds
+# are serialized natively instead of going through FastAPI's recursive jsonable_encoder.
+# Endpoints returning such values must return the response object itself; plain dicts
+# returned by endpoints are still run through jsonable_encoder first.
+
+def _object_id_type():
+    try:
+        from bson import ObjectId
+        return ObjectId
+    except ImportError:
+        return ()
+
+ObjectId = _object_id_type()
+
+def default(obj):
+    """Fallback for types orjson (or json) does not handle itself."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, bytes):
+        return base64.b64encode(obj).decode("ascii")
+    if isinstance(obj, set):
+        return list(obj)
+    if hasattr(obj, "tolist"):  # pandas Series / Index
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(content, default=default, datetime_passthrough=False):
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if datetime_passthrough:
+            option |= orjson.OPT_PASSTHROUGH_DATETIME
+        return orjson.dumps(content, default=default, option=option)
+    return json.dumps(content, default=default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content):
+        return dumps(content)
+
+def _mongo_default(obj):
+    # MongoDB Extended JSON (relaxed), as bson.json_util.dumps writes it
+    if isinstance(obj, ObjectId):
+        return {"$oid": str(obj)}
+    if isinstance(obj, datetime.datetime):
+        if obj.tzinfo is not None:
+            obj = obj.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return {"$date": obj.isoformat(timespec="milliseconds") + "Z"}
+    return default(obj)
+
+class MongoJSONResponse(JSONResponse):
+    """Raw MongoDB documents: ObjectIds and dates keep their Extended JSON shape ({"$oid": ...}, {"$date": ...})."""
+    def render(self, content):
+        return dumps(content, default=_mongo_default, datetime_passthrough=True)
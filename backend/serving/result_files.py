@@ -0,0 +1,79 @@
+import os
+import json
+import time
+import uuid
+import numpy as np
+import pandas as pd
+
+# Downloadable scoring results, written chunk by chunk so arbitrarily large inputs are
+# scored within a fixed memory ceiling. Files are pruned after RESULT_TTL_SECONDS.
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scoring_results")
+RESULT_TTL_SECONDS = int(os.environ.get("RESULT_TTL_HOURS", 24)) * 3600
+PARTIAL_SUFFIX = ".partial"
+
+def prune(now=None):
+    """Deletes result files (and abandoned partial files) older than the TTL."""
+    if not os.path.isdir(RESULTS_DIR):
+        return
+    now = now or time.time()
+    for f in os.listdir(RESULTS_DIR):
+        path = os.path.join(RESULTS_DIR, f)
+        try:
+            if now - os.path.getmtime(path) > RESULT_TTL_SECONDS:
+                os.remove(path)
+        except OSError:
+            pass
+
+def create(prefix, key=None):
+    """
+    Returns the path of a new, not yet visible, result file. With a key the published
+    name is deterministic (<prefix>_<key>.csv), so the file doubles as a cache entry.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    prune()
+    name = f"{prefix}_{key}.csv" if key else f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}.csv"
+    # Unique partial name: concurrent writers of the same key never interleave
+    return os.path.join(RESULTS_DIR, f"{name}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}")
+
+def append(path, columns):
+    """Appends one columnar chunk; multi-dimensional columns (feature echoes) are left out."""
+    df = pd.DataFrame({name: values for name, values in columns.items() if np.ndim(values) == 1})
+    df.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+
+def finish(path, summary=None):
+    """Publishes a completed result file (plus its summary, if given) and returns its download name."""
+    final_path = path[:-len(PARTIAL_SUFFIX)].rsplit(".", 1)[0]
+    if not os.path.exists(path):
+        open(path, "w").close()
+    if summary is not None:
+        with open(path + ".json", "w") as f:
+            json.dump(summary, f)
+        os.replace(path + ".json", final_path + ".json")
+    os.replace(path, final_path)
+    return os.path.basename(final_path)
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def lookup(prefix, key):
+    """(download name, summary) of a published keyed result file, or None. A hit renews its TTL."""
+    path = os.path.join(RESULTS_DIR, f"{prefix}_{key}.csv")
+    try:
+        with open(path + ".json", "r") as f:
+            summary = json.load(f)
+        os.utime(path)
+        os.utime(path + ".json")
+    except (OSError, ValueError):
+        return None
+    return os.path.basename(path), summary
+
+def resolve(name):
+    """Path of a published result file, or None (never resolves outside RESULTS_DIR)."""
+    name = os.path.basename(name)
+    path = os.path.join(RESULTS_DIR, name)
+    if not name.endswith(".csv") or not os.path.isfile(path):
+        return None
+    return path
@@ -0,0 +1,46 @@
+import asyncio
+import functools
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a computation for a key is in progress,
+    later callers await the same task instead of starting their own, and all receive its
+    result (or exception). Nothing is retained once the task finishes: this is not a cache.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Awaits fn(*args, **kwargs) (a coroutine function), shared by every concurrent caller of key."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._forget, key))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+        # A disconnecting client cancels only its own wait, never the shared computation
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self):
+        return {"in_flight": len(self._inflight), "executed": self.executed, "coalesced": self.coalesced}
+
+flights = SingleFlight()
+
+def single_flight(name):
+    """Decorator for async endpoints: concurrent calls with the same arguments share one execution."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return await flights.do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,97 @@
+import json
+from fastapi.responses import StreamingResponse
+from serving.executor import get_limiter
+
+# Incremental result delivery for batch endpoints. Clients opt in with ?stream=ndjson|sse
+# or an Accept header; the default remains a single JSON document.
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def requested_format(request):
+    """Returns "ndjson", "sse" or None (plain JSON) for this request."""
+    fmt = request.query_params.get("stream")
+    if fmt in STREAM_MEDIA_TYPES:
+        return fmt
+    accept = request.headers.get("accept", "")
+    for name, media_type in STREAM_MEDIA_TYPES.items():
+        if media_type in accept:
+            return name
+    return None
+
+class _SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that runs `on_close` once it is finished, failed or abandoned, including
+    a client that goes away before the first chunk (when the body generator never runs, so
+    its own `finally` cannot be relied on to give the endpoint's slot back).
+
+    reads_body: for endpoints that keep reading the request body while responding.
+    Starlette's default listens for disconnect on `receive` (ASGI < 2.4), which would
+    swallow the remaining body chunks; a client that goes away still surfaces as
+    ClientDisconnect from request.stream().
+    """
+    def __init__(self, content, on_close, reads_body=False, **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+        self.reads_body = reads_body
+
+    async def __call__(self, scope, receive, send):
+        try:
+            if self.reads_body:
+                await self.stream_response(send)
+                if self.background is not None:
+                    await self.background()
+            else:
+                await super().__call__(scope, receive, send)
+        finally:
+            await self.on_close()
+
+def _encode(record, fmt, seq):
+    data = json.dumps(record, default=str)
+    if fmt == "sse":
+        return f"id: {seq}\nevent: {record['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+async def stream_records(endpoint, records, fmt, reads_body=False):
+    """
+    Streams the dict records of an async generator as NDJSON lines or SSE events.
+    The endpoint's concurrency slot is taken before the response starts (so overload is
+    still a 429) and given back when the response ends, however it ends.
+    A failure mid-stream is reported as a final {"type": "error"} record. Pass
+    reads_body=True when `records` consumes request.stream() while it is being sent.
+    """
+    limiter = get_limiter(endpoint)
+    await limiter.acquire()
+
+    async def body():
+        seq = 0
+        try:
+            async for record in records:
+                yield _encode(record, fmt, seq)
+                seq += 1
+        except Exception as e:
+            detail = getattr(e, "detail", str(e))
+            print(f"Error while streaming '{endpoint}': {detail}")
+            yield _encode({"type": "error", "detail": detail}, fmt, seq)
+        finally:
+            await records.aclose()
+
+    stream = body()
+    released = [False]
+
+    async def close():
+        if released[0]:
+            return
+        released[0] = True
+        try:
+            await stream.aclose()
+            await records.aclose()
+        finally:
+            limiter.release()
+
+    return _SlotStreamingResponse(stream, close, reads_body=reads_body,
+                                  media_type=STREAM_MEDIA_TYPES[fmt], headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
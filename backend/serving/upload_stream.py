@@ -0,0 +1,72 @@
+from fastapi import HTTPException
+
+try:
+    from python_multipart import MultipartParser
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart import MultipartParser
+    from multipart.multipart import parse_options_header
+
+# Largest single file accepted by streaming endpoints (the whole body is capped by nginx)
+MAX_FILE_BYTES = 25 * 1024 * 1024
+
+async def iter_file_parts(request, field_name=None, max_file_bytes=MAX_FILE_BYTES):
+    """
+    Parses a multipart/form-data body while it is being received and yields
+    (filename, bytes) for each file part as soon as that part is complete.
+
+    The body is only pulled from the socket when the consumer asks for the next file,
+    so a slow consumer applies backpressure to the client instead of buffering the
+    whole upload in memory.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    completed = []
+    part = {}
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, field=b"", value=b"", data=bytearray())
+
+    def on_header_field(data, start, end):
+        part["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_part_data(data, start, end):
+        if len(part["data"]) + (end - start) > max_file_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {max_file_bytes // (1024 * 1024)}MB limit")
+        part["data"] += data[start:end]
+
+    def on_part_end():
+        _, disposition = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        if b"filename" not in disposition:
+            return
+        name = disposition.get(b"name", b"").decode("latin-1")
+        if field_name is None or name == field_name:
+            completed.append((disposition[b"filename"].decode("utf-8", "replace"), bytes(part["data"])))
+        part["data"] = bytearray()
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    async for chunk in request.stream():
+        parser.write(chunk)
+        while completed:
+            yield completed.pop(0)
+    parser.finalize()
+    while completed:
+        yield completed.pop(0)
@@ -121,7 +121,10 @@ function renderROC(data) {
 
 function renderHistory(historyData) {
     const ctxHist = document.getElementById('historyChart').getContext('2d');
-    const epochs = historyData.accuracy.map((_, i) => `Epoch ${i + 1}`);
+    // Cross-validated learning curves are indexed by training-set size, simulated history by epoch
+    const epochs = historyData.train_sizes
+        ? historyData.train_sizes.map(n => `${n} samples`)
+        : historyData.accuracy.map((_, i) => `Epoch ${i + 1}`);
 
     if (histChart) histChart.destroy();
 
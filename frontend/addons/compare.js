@@ -43,7 +43,7 @@ async function loadComparisonData() {
 
                 <div class="circuit-container">
                     <label>Quantum Topology</label>
-                    <img src="data:image/png;base64,${conf.diagram}" alt="${conf.name} Circuit">
+                    ${conf.diagram_url ? `<img src="${API_URL}${conf.diagram_url}" alt="${conf.name} Circuit" loading="lazy">` : ''}
                 </div>
             </div>
         `).join('');
@@ -36,17 +36,26 @@ function handleFileUpload(event) {
 }
 
 async function loadSample(fileName) {
+    showLoader(true);
     try {
-        // Now fetching from the frontend directory
-        const response = await fetch(`../datasets/unlabeled/${fileName}`);
-        if (!response.ok) throw new Error('Could not load sample file');
+        // Sample datasets live on the server: score them by name (results are cached per file and model version)
+        const response = await fetch(`${API_BASE}/score-dataset`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ dataset: `unlabeled/${fileName}`, include_results: true })
+        });
 
-        const blob = await response.blob();
-        const file = new File([blob], fileName, { type: 'text/csv' });
-        processCSV(file);
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Could not score sample file');
+        }
+
+        const data = await response.json();
+        renderResults(data.datasets[0].results);
     } catch (error) {
         console.error('Error loading sample:', error);
-        alert(`Could not load sample dataset: ${fileName}. Please ensure the file exists in datasets/unlabeled/`);
+        alert(`Could not load sample dataset: ${fileName}. ${error.message}`);
+        showLoader(false);
     }
 }
 
@@ -57,7 +66,8 @@ async function processCSV(file) {
     formData.append('file', file);
 
     try {
-        const response = await fetch(`${API_BASE}/predict-csv-batch`, {
+        // NDJSON stream: one {"type": "result"} line per patient, then a {"type": "summary"} line
+        const response = await fetch(`${API_BASE}/predict-csv-batch?stream=ndjson`, {
             method: 'POST',
             body: formData
         });
@@ -67,8 +77,33 @@ async function processCSV(file) {
             throw new Error(error.detail || 'Batch prediction failed');
         }
 
-        const data = await response.json();
-        renderResults(data.results);
+        const results = [];
+        let posCount = 0;
+        startResults();
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                const record = JSON.parse(line);
+                if (record.type === 'result') {
+                    results.push(record.result);
+                    if (record.result.IsPositive) posCount++;
+                    appendResultRow(record.result, results.length - 1);
+                    updateStats(results.length, posCount);
+                } else if (record.type === 'error') {
+                    throw new Error(record.detail);
+                }
+            }
+        }
+        finishResults(results);
     } catch (error) {
         console.error('Batch Prediction Error:', error);
         alert('Error analyzing CSV: ' + error.message);
@@ -83,48 +118,54 @@ function showLoader(isLoading) {
     document.getElementById('export-btn').classList.add('hidden');
 }
 
-function renderResults(results) {
-    const tbody = document.getElementById('results-body');
-    const statsEl = document.getElementById('batch-stats');
-    const exportBtn = document.getElementById('export-btn');
+function startResults() {
+    document.getElementById('results-body').innerHTML = '';
+    document.getElementById('results-loader').classList.add('hidden');
+    document.getElementById('table-container').classList.remove('hidden');
+}
 
-    tbody.innerHTML = '';
-    let posCount = 0;
-
-    results.forEach((res, index) => {
-        if (res.IsPositive) posCount++;
-
-        const tr = document.createElement('tr');
-        tr.style.animationDelay = `${index * 50}ms`;
-
-        tr.innerHTML = `
-            <td class="p-3 font-mono text-gray-500">${res.Patient_ID}</td>
-            <td class="p-3">
-                <div class="flex flex-col">
-                    <span class="text-[10px] text-gray-500">CRP: ${res.CRP}</span>
-                    <span class="text-[10px] text-gray-500">ESR: ${res.ESR}</span>
-                </div>
-            </td>
-            <td class="p-3">
-                <span class="status-badge ${res.IsPositive ? 'status-positive' : 'status-healthy'}">
-                    ${res.Prediction}
-                </span>
-            </td>
-            <td class="p-3 text-right font-semibold text-white">${res.Confidence.toFixed(1)}%</td>
-        `;
-        tbody.appendChild(tr);
-    });
+function appendResultRow(res, index) {
+    const tr = document.createElement('tr');
+    // Stagger only the first screenful; later rows arrive progressively anyway
+    tr.style.animationDelay = `${Math.min(index, 20) * 50}ms`;
+
+    tr.innerHTML = `
+        <td class="p-3 font-mono text-gray-500">${res.Patient_ID}</td>
+        <td class="p-3">
+            <div class="flex flex-col">
+                <span class="text-[10px] text-gray-500">CRP: ${res.CRP}</span>
+                <span class="text-[10px] text-gray-500">ESR: ${res.ESR}</span>
+            </div>
+        </td>
+        <td class="p-3">
+            <span class="status-badge ${res.IsPositive ? 'status-positive' : 'status-healthy'}">
+                ${res.Prediction}
+            </span>
+        </td>
+        <td class="p-3 text-right font-semibold text-white">${res.Confidence.toFixed(1)}%</td>
+    `;
+    document.getElementById('results-body').appendChild(tr);
+}
 
-    statsEl.textContent = `| Total: ${results.length} | UC+: ${posCount} | Healthy: ${results.length - posCount}`;
+function updateStats(total, posCount) {
+    document.getElementById('batch-stats').textContent = `| Total: ${total} | UC+: ${posCount} | Healthy: ${total - posCount}`;
+}
 
-    document.getElementById('results-loader').classList.add('hidden');
-    document.getElementById('table-container').classList.remove('hidden');
+function finishResults(results) {
+    const exportBtn = document.getElementById('export-btn');
+    updateStats(results.length, results.filter(res => res.IsPositive).length);
     exportBtn.classList.remove('hidden');
 
     // Setup Export Action
     exportBtn.onclick = () => exportResultsToCSV(results);
 }
 
+function renderResults(results) {
+    startResults();
+    results.forEach((res, index) => appendResultRow(res, index));
+    finishResults(results);
+}
+
 async function exportResultsToCSV(results) {
     const exportBtn = document.getElementById('export-btn');
     const originalText = exportBtn.textContent;
@@ -171,11 +171,27 @@ async function deleteModel(modelId) {
     }
 }
 
+let activeTrainingJob = null;
+
 async function runTraining() {
+    const btn = document.getElementById('start-training');
+
+    // While a job is running the same button cancels it
+    if (activeTrainingJob) {
+        btn.disabled = true;
+        btn.innerText = 'CANCELLING...';
+        try {
+            await fetch(`${API_URL}/train/jobs/${activeTrainingJob}/cancel`, { method: 'POST' });
+        } catch (e) {
+            btn.disabled = false;
+            btn.innerText = 'CANCEL TRAINING';
+        }
+        return;
+    }
+
     const selected = Array.from(document.querySelectorAll('.dataset-file:checked')).map(cb => cb.value);
     if (selected.length === 0) return alert('Please select at least one file to train on!');
 
-    const btn = document.getElementById('start-training');
     const bar = document.getElementById('training-progress');
     const val = document.getElementById('progress-val');
     const log = document.getElementById('epoch-log');
@@ -183,6 +199,8 @@ async function runTraining() {
     btn.disabled = true;
     btn.innerText = 'TRAINING...';
     log.innerHTML = 'Establishing Quantum Link...<br>';
+    bar.style.width = '0%';
+    val.innerText = '0%';
 
     try {
         const res = await fetch(`${API_URL}/train`, {
@@ -196,49 +214,67 @@ async function runTraining() {
         });
         const data = await res.json();
 
-        if (data.status === 'Error') {
-            alert(data.message);
+        if (data.status === 'Error' || !res.ok) {
+            alert(data.message || data.detail);
             btn.disabled = false;
             btn.innerText = 'FIX SELECTION & RETRY';
             return;
         }
 
         log.innerHTML = `Loaded Dataset: ${data.processed_count || 0} files selected.<br><br>`;
+        activeTrainingJob = data.job_id;
+        btn.disabled = false;
+        btn.innerText = 'CANCEL TRAINING';
 
-        let i = 0;
-
-        const interval = setInterval(() => {
-            if (i >= data.history.length) {
-                clearInterval(interval);
-                btn.disabled = false;
-                btn.innerText = 'TRAINING COMPLETE';
-                log.innerHTML += '<br><b>Dataset processed. Model optimized.</b>';
+        let lastAccuracy = null;
+        const source = new EventSource(`${API_URL}/train/jobs/${data.job_id}/events`);
 
+        const finish = (label, message) => {
+            source.close();
+            activeTrainingJob = null;
+            btn.disabled = false;
+            btn.innerText = label;
+            log.innerHTML += `<br><b>${message}</b>`;
+            log.scrollTop = log.scrollHeight;
+        };
+
+        source.onmessage = (msg) => {
+            const event = JSON.parse(msg.data);
+
+            if (event.type === 'step') {
+                const step = event.step;
+                const percent = (event.done / event.total) * 100;
+                bar.style.width = `${percent}%`;
+                val.innerText = `${Math.round(percent)}%`;
+
+                if (step.source.endsWith('.csv')) {
+                    log.innerHTML += `[${step.epoch}] ${step.source}: Patient ${step.id} -> ${step.status} (${step.accuracy})<br>`;
+                } else {
+                    log.innerHTML += `[${step.epoch}] ${step.source}: ID ${step.id} -> ${step.status} (${step.accuracy})<br>`;
+                }
+                lastAccuracy = step.accuracy;
+                log.scrollTop = log.scrollHeight;
+            } else if (event.type === 'phase' && event.phase === 'fitting') {
+                log.innerHTML += '<br>Fitting quantum kernel & classical baselines...<br>';
+            } else if (event.type === 'status' && event.status === 'completed') {
                 // Track the final accuracy for saving
-                currentSessionParams.accuracy = data.history[data.history.length - 1].accuracy;
-
-                return;
-            }
-
-            const step = data.history[i];
-            const percent = ((i + 1) / data.history.length) * 100;
-
-            bar.style.width = `${percent}%`;
-            val.innerText = `${Math.round(percent)}%`;
-
-            if (step.source.endsWith('.csv')) {
-                log.innerHTML += `[${step.epoch}] ${step.source}: Patient ${step.id} -> ${step.status} (${step.accuracy})<br>`;
-            } else {
-                log.innerHTML += `[${step.epoch}] ${step.source}: ID ${step.id} -> ${step.status} (${step.accuracy})<br>`;
+                if (lastAccuracy) currentSessionParams.accuracy = lastAccuracy;
+                finish('TRAINING COMPLETE', 'Dataset processed. Model optimized.');
+            } else if (event.type === 'status' && event.status === 'cancelled') {
+                finish('START TRAINING CYCLE', 'Training cancelled.');
+            } else if (event.type === 'status' && (event.status === 'failed' || event.status === 'interrupted')) {
+                finish('RETRY', `Training failed: ${event.error || event.status}`);
             }
+        };
 
-            log.scrollTop = log.scrollHeight;
-
-            i++;
-        }, 800);
+        source.onerror = () => {
+            // EventSource reconnects automatically; only give up if the stream was closed for good
+            if (source.readyState === EventSource.CLOSED) finish('RETRY', 'Lost connection to training job.');
+        };
 
     } catch (e) {
         alert('Training failed.');
+        activeTrainingJob = null;
         btn.disabled = false;
         btn.innerText = 'RETRY';
     }
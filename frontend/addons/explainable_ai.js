@@ -257,6 +257,18 @@ function applyGradCAMOverlay(ctx, width, height) {
 }
 
 function displayDecision(data) {
+    // Server-rendered heatmap replaces the in-browser approximation when available
+    if (data.heatmap_url) {
+        const heatmap = new Image();
+        heatmap.onload = () => {
+            const canvas = document.getElementById('gradcam-canvas');
+            canvas.width = heatmap.width;
+            canvas.height = heatmap.height;
+            canvas.getContext('2d').drawImage(heatmap, 0, 0);
+        };
+        heatmap.src = `${API_BASE}${data.heatmap_url}`;
+    }
+
     // Show decision result
     document.getElementById('decision-container').classList.add('hidden');
     const resultDiv = document.getElementById('decision-result');
@@ -1,7 +1,9 @@
+const API_URL = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1' ? 'http://localhost:8001' : '/api';
+
 // Register the datalabels plugin globally once
 Chart.register(ChartDataLabels);
 
-document.addEventListener('DOMContentLoaded', () => {
+document.addEventListener('DOMContentLoaded', async () => {
     const rawData = localStorage.getItem('lastPredictionData');
     if (!rawData) {
         alert('No prediction data found. Please run an analysis first.');
@@ -10,6 +12,15 @@ document.addEventListener('DOMContentLoaded', () => {
     }
 
     const data = JSON.parse(rawData);
+    if (!data.features && data.features_handle) {
+        // Predictions return a server-side handle instead of the raw vector
+        try {
+            const res = await fetch(`${API_URL}/features/${data.features_handle}?format=json`);
+            if (res.ok) data.features = await res.json();
+        } catch (e) {
+            console.warn('Feature vector unavailable:', e.message);
+        }
+    }
     renderAnalysis(data);
 });
 
@@ -28,16 +39,35 @@ function renderAnalysis(data) {
     statusFill.style.backgroundColor = isPositive ? '#ef4444' : '#10b981';
     statusFill.style.boxShadow = `0 0 30px ${isPositive ? 'rgba(239, 68, 68, 0.6)' : 'rgba(16, 185, 129, 0.6)'}`;
 
-    qConfLabel.innerText = data.quantum_metrics.accuracy;
+    // Older saved results predate the flag and always carried numeric metrics
+    const evaluated = data.metrics_evaluated !== false;
+
+    qConfLabel.innerText = evaluated ? data.quantum_metrics.accuracy : 'Not evaluated';
     cConfLabel.innerText = `${(data.classical_confidence * 100).toFixed(1)}%`;
 
-    insightText.innerText = `The system has analyzed the 512 extraction dimensions from the input. ${isPositive ? 'A notable elevation in inflammatory markers and visual ulceration patterns was detected, resulting in a POSITIVE diagnosis recommendation.' : 'Visual and clinical markers are consistent with normal healthy tissue, resulting in a NEGATIVE diagnosis recommendation.'} The Hybrid Quantum model shows a ${(parseFloat(data.quantum_metrics.accuracy) - (data.classical_confidence * 100)).toFixed(1)}% improvement in diagnostic certainty over traditional classical classification for this specific case.`;
+    const findings = `The system has analyzed the 512 extraction dimensions from the input. ${isPositive ? 'A notable elevation in inflammatory markers and visual ulceration patterns was detected, resulting in a POSITIVE diagnosis recommendation.' : 'Visual and clinical markers are consistent with normal healthy tissue, resulting in a NEGATIVE diagnosis recommendation.'}`;
+    insightText.innerText = evaluated
+        ? `${findings} The Hybrid Quantum model shows a ${(parseFloat(data.quantum_metrics.accuracy) - (data.classical_confidence * 100)).toFixed(1)}% improvement in diagnostic certainty over traditional classical classification for this specific case.`
+        : `${findings} The served model has not been cross-validated yet, so no model comparison is available; run a Training Cycle to evaluate it.`;
 
-    initComparisonChart(data);
-    initConfidenceChart(data);
+    if (evaluated) {
+        initComparisonChart(data);
+        initConfidenceChart(data);
+    } else {
+        showNotEvaluated('comparisonChart');
+        showNotEvaluated('confidenceChart');
+    }
     initFeatureChart(data);
 }
 
+function showNotEvaluated(canvasId) {
+    const canvas = document.getElementById(canvasId);
+    const note = document.createElement('p');
+    note.className = 'text-gray-400 text-center py-24';
+    note.innerText = 'Metrics not evaluated for the served model yet.';
+    canvas.replaceWith(note);
+}
+
 function initComparisonChart(data) {
     const ctx = document.getElementById('comparisonChart');
     const labels = ['Accuracy', 'Precision', 'Sensitivity', 'Specificity', 'F1-Score', 'AUC-ROC'];
@@ -185,7 +215,7 @@ function initConfidenceChart(data) {
 
 function initFeatureChart(data) {
     const ctx = document.getElementById('featureChart');
-    const features = data.features.slice(0, 15); // Show 15 features
+    const features = (data.features || []).slice(0, 15); // Show 15 features
     const labels = features.map((_, i) => `S${i+1}`);
 
     new Chart(ctx, {
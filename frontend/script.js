@@ -213,7 +213,7 @@ function displayResults(data) {
     console.log("Prediction Result Data:", data);
 
     // Store data for graph analysis
-    if (data.features) {
+    if (data.features || data.features_handle) {
         console.log("Features found, activating button...");
         localStorage.setItem('lastPredictionData', JSON.stringify({
             quantum_prediction: data.quantum_prediction,
@@ -221,7 +221,11 @@ function displayResults(data) {
             classical_confidence: data.classical_confidence,
             quantum_metrics: data.quantum_metrics,
             classical_metrics: data.classical_metrics,
-            features: data.features
+            // False until the served model has been cross-validated (metrics are "N/A")
+            metrics_evaluated: data.metrics_evaluated !== false,
+            features: data.features,
+            // Short-lived server-side handle; graph analysis fetches the vector with it
+            features_handle: data.features_handle
         }));
         const graphBtn = document.getElementById('graph-analysis-btn');
         if (graphBtn) {
@@ -374,7 +378,7 @@ window.viewPatientDetail = function (index) {
         classical_metrics: mockedMetrics.classical
     });
 
-    prefetchCircuit(p.features);
+    prefetchCircuit(p.features_handle || p.features);
 };
 
 async function prefetchCircuit(features = null) {
@@ -382,19 +386,22 @@ async function prefetchCircuit(features = null) {
     try {
         let options = { method: 'GET' };
         if (features) {
+            // A string is a server-side feature handle (from /predict-csv), otherwise the vector itself
+            const body = typeof features === 'string' ? { features_handle: features } : { features: features };
             options = {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ features: features })
+                body: JSON.stringify(body)
             };
         }
 
-        const res = await fetch(`${API_URL}/circuit`, options);
+        // SVG drawn server-side without matplotlib: smaller and faster than the PNG variant
+        const res = await fetch(`${API_URL}/circuit?format=svg`, options);
         if (!res.ok) throw new Error(`Circuit API Error (${res.status})`);
-        const data = await res.json();
+        const svg = await res.text();
         const img = document.getElementById('circuit-img');
-        if (img && data.circuit_diagram) {
-            img.src = `data:image/png;base64,${data.circuit_diagram}`;
+        if (img && svg) {
+            img.src = `data:image/svg+xml;charset=utf-8,${encodeURIComponent(svg)}`;
             console.log('Circuit diagram updated with patient features:', !!features);
         }
     } catch (e) {
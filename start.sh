@@ -15,7 +15,12 @@ echo "Starting FastAPI Backend on 127.0.0.1:8001..."
 echo "Starting FastAPI Backend on 127.0.0.1:8001..."
 cd /app/backend
 # Redirect stderr to stdout to capture import errors
-uvicorn main:app --host 127.0.0.1 --port 8001 > /var/log/nginx/backend.log 2>&1 &
+# WEB_CONCURRENCY > 1: gunicorn preloads the models once and forks workers that share them
+if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+    gunicorn -c gunicorn_conf.py main:app > /var/log/nginx/backend.log 2>&1 &
+else
+    uvicorn main:app --host 127.0.0.1 --port 8001 > /var/log/nginx/backend.log 2>&1 &
+fi
 BACKEND_PID=$!
 echo "Backend PID: $BACKEND_PID"
 
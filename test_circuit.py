@@ -7,10 +7,11 @@ try:
     print(f"Status Code: {response.status_code}")
     data = response.json()
     
-    if data.get("circuit_diagram"):
-        print("SUCCESS: Circuit diagram received (base64 length: " + str(len(data["circuit_diagram"])) + ")")
+    if data.get("circuit_diagram_url"):
+        image = requests.get("http://localhost:8000" + data["circuit_diagram_url"])
+        print(f"SUCCESS: Circuit diagram at {data['circuit_diagram_url']} ({image.headers.get('content-type')}, {len(image.content)} bytes)")
     else:
-        print("FAILURE: No circuit_diagram in response.")
+        print("FAILURE: No circuit_diagram_url in response.")
         print("Response:", data)
 
 except Exception as e: